@@ -0,0 +1,140 @@
+"""Control de admisión para endpoints pesados.
+
+Cada clase de ruta tiene un máximo de peticiones simultáneas y una cola
+acotada. Si la cola está llena se responde 429 de inmediato; si se espera
+más de lo permitido, 503. Ambos con Retry-After, para que las rutas
+ligeras no se queden sin workers ni conexiones.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict
+
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+
+load_dotenv()
+
+# Límite por sentencia para las consultas de analítica (ms)
+ANALYTICS_STATEMENT_TIMEOUT_MS = int(os.getenv("ANALYTICS_STATEMENT_TIMEOUT_MS", "5000"))
+
+
+class ConcurrencyLimiter:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    def _retry_after(self) -> str:
+        return str(max(1, int(self.queue_timeout)))
+
+    async def acquire(self) -> None:
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Servidor ocupado, intenta de nuevo en unos segundos",
+                    headers={"Retry-After": self._retry_after()},
+                )
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Servidor saturado, intenta de nuevo en unos segundos",
+                    headers={"Retry-After": self._retry_after()},
+                )
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        self.admitted += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+def _limiter_from_env(name: str, max_concurrent: int, max_queue: int, queue_timeout: float) -> ConcurrencyLimiter:
+    prefix = name.upper()
+    return ConcurrencyLimiter(
+        name,
+        max_concurrent=int(os.getenv(f"{prefix}_MAX_CONCURRENT", max_concurrent)),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue)),
+        queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", queue_timeout)),
+    )
+
+
+# Clases de rutas: analítica de usuario y listados/recálculos masivos de admin
+LIMITERS: Dict[str, ConcurrencyLimiter] = {
+    "analytics": _limiter_from_env("analytics", max_concurrent=8, max_queue=32, queue_timeout=5),
+    "admin_bulk": _limiter_from_env("admin_bulk", max_concurrent=2, max_queue=4, queue_timeout=10),
+}
+
+
+def admission(name: str, auth: Callable[..., Any]):
+    """Dependencia que reserva un cupo de la clase `name` durante la petición.
+
+    `auth` es la dependencia de autenticación de la ruta (p. ej.
+    `get_current_user` o `check_admin_role`): se resuelve antes de pedir el
+    cupo, así las peticiones sin token válido o sin permisos no ocupan lugar
+    ni en el semáforo ni en la cola. FastAPI la resuelve una sola vez por
+    petición aunque la ruta también la use.
+    """
+    limiter = LIMITERS[name]
+
+    async def dependency(_user=Depends(auth)):
+        await limiter.acquire()
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    return dependency
+
+
+def admission_metrics() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.metrics() for name, limiter in LIMITERS.items()}
+
+
+@asynccontextmanager
+async def analytics_session() -> AsyncIterator[AsyncSession]:
+    """Sesión propia con statement_timeout en cada transacción (consultas de analítica).
+
+    Es independiente de la sesión de la petición, así la pueden usar los
+    cálculos compartidos entre peticiones (single-flight).
+    """
+    timeout = f"SET LOCAL statement_timeout = {int(ANALYTICS_STATEMENT_TIMEOUT_MS)}"
+    async with AsyncSessionLocal() as db:
+
+        @event.listens_for(db.sync_session, "after_begin")
+        def _set_timeout(session, transaction, connection):
+            connection.exec_driver_sql(timeout)
+
+        yield db
@@ -0,0 +1,170 @@
+"""Monitor de bloqueos del event loop.
+
+Una tarea duerme `interval` segundos en bucle y mide cuánto tarde despierta
+(lag de planificación). Un hilo vigía revisa el último latido de esa tarea:
+si el loop lleva más de `threshold` sin correr, toma el stack del hilo del
+loop, busca en sus frames el `scope` ASGI de la petición en curso y lo
+registra. Así aparecen bcrypt, pandas o cualquier llamada síncrona que se
+cuele en un handler async.
+
+En tests:
+
+    async with assert_no_loop_blocking(threshold_ms=50):
+        await client.get("/stats/analysis")
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))  # segundos
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+
+logger = logging.getLogger(__name__)
+
+
+class BlockReport(NamedTuple):
+    blocked_for: float     # segundos sin correr al detectarlo
+    route: Optional[str]   # "GET /stats/analysis" si se encontró la petición
+    stack: str
+
+
+def _route_of(frame) -> Optional[str]:
+    # El middleware ASGI más interno con `scope` en sus variables locales
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            route = scope.get("route")
+            return f"{scope.get('method')} {route.path if route is not None else scope.get('path')}"
+        frame = frame.f_back
+    return None
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL,
+        threshold: float = LOOP_BLOCK_THRESHOLD_MS / 1000,
+        max_reports: int = 50,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.ticks = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.lag_sum = 0.0
+        self.blocks = 0
+        self.reports: Deque[BlockReport] = deque(maxlen=max_reports)
+        self._heartbeat = 0.0
+        self._reported_beat: Optional[float] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick(), name="loop-monitor")
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        # Un bloqueo justo antes de parar puede no haber pasado por el vigía
+        self._check(with_stack=False)
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+
+    async def _tick(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.ticks += 1
+            self.lag_last = lag
+            self.lag_sum += lag
+            self.lag_max = max(self.lag_max, lag)
+            self._heartbeat = now
+
+    def _check(self, with_stack: bool) -> None:
+        beat = self._heartbeat
+        blocked_for = time.monotonic() - beat - self.interval
+        if blocked_for <= self.threshold or self._reported_beat == beat:
+            return
+        self._reported_beat = beat
+
+        route, stack = None, "<stack no disponible>"
+        if with_stack:
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                route = _route_of(frame)
+                stack = "".join(traceback.format_stack(frame))
+
+        self.blocks += 1
+        self.reports.append(BlockReport(blocked_for, route, stack))
+        logger.warning(
+            "Event loop blocked for %.0f ms (route: %s)\n%s",
+            blocked_for * 1000, route or "-", stack,
+        )
+
+    def _watch(self) -> None:
+        period = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(period):
+            self._check(with_stack=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": int(self.running),
+            "lag_last_seconds": round(self.lag_last, 6),
+            "lag_max_seconds": round(self.lag_max, 6),
+            "lag_avg_seconds": round(self.lag_sum / self.ticks, 6) if self.ticks else 0.0,
+            "blocks": self.blocks,
+        }
+
+
+loop_monitor = LoopMonitor()
+
+
+@asynccontextmanager
+async def assert_no_loop_blocking(threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS):
+    """Falla si el event loop queda bloqueado más de `threshold_ms` dentro del bloque"""
+    threshold = threshold_ms / 1000
+    monitor = LoopMonitor(interval=min(0.01, threshold), threshold=threshold)
+    monitor.start()
+    try:
+        yield monitor
+    finally:
+        await monitor.stop()
+    if monitor.reports:
+        details = "\n".join(
+            f"- {r.blocked_for * 1000:.0f} ms at {r.route or '-'}\n{r.stack}" for r in monitor.reports
+        )
+        raise AssertionError(f"Event loop blocked {monitor.blocks} time(s):\n{details}")
@@ -0,0 +1,138 @@
+"""Métricas HTTP por ruta en formato de texto de Prometheus.
+
+`MetricsMiddleware` es un middleware ASGI puro: por petición solo toma el
+tiempo, cuenta bytes y actualiza contadores de un objeto por ruta (clave
+método + plantilla de la ruta, p. ej. "/sessions/{session_id}"). Las
+etiquetas se formatean una sola vez al crear ese objeto.
+"""
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+# Segundos
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RouteMetrics:
+    __slots__ = ("labels", "buckets", "latency_sum", "count", "status_counts", "response_bytes")
+
+    def __init__(self, method: str, route: str):
+        self.labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+        self.buckets: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)  # el último es +Inf
+        self.latency_sum = 0.0
+        self.count = 0
+        self.status_counts: Dict[int, int] = {}
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.in_flight = 0
+        # Fuentes extra (single-flight, admisión, ...) que aportan líneas al render
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float, size: int) -> None:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics(method, route)
+        metrics.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        metrics.latency_sum += seconds
+        metrics.count += 1
+        metrics.status_counts[status_code] = metrics.status_counts.get(status_code, 0) + 1
+        metrics.response_bytes += size
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Peticiones HTTP en curso",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_request_duration_seconds Latencia de peticiones HTTP por ruta",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        routes = list(self.routes.values())
+        for m in routes:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, m.buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{m.labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{m.labels},le="+Inf"}} {m.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{m.labels}}} {m.latency_sum}")
+            lines.append(f"http_request_duration_seconds_count{{{m.labels}}} {m.count}")
+
+        lines += [
+            "# HELP http_requests_total Peticiones HTTP por ruta y código de estado",
+            "# TYPE http_requests_total counter",
+        ]
+        for m in routes:
+            for status_code, count in sorted(m.status_counts.items()):
+                lines.append(f'http_requests_total{{{m.labels},status="{status_code}"}} {count}')
+
+        lines += [
+            "# HELP http_response_size_bytes_total Bytes de cuerpo enviados por ruta",
+            "# TYPE http_response_size_bytes_total counter",
+        ]
+        for m in routes:
+            lines.append(f"http_response_size_bytes_total{{{m.labels}}} {m.response_bytes}")
+
+        for collector in self.collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.in_flight += 1
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            registry.in_flight -= 1
+            # El router de FastAPI deja la ruta encontrada en el scope
+            route = scope.get("route")
+            registry.observe(
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status_code,
+                elapsed,
+                size,
+            )
+
+
+def gauge_lines(name: str, help_text: str, samples: Dict[str, Dict[str, float]], label: str) -> List[str]:
+    """Exportar un dict {grupo: {campo: valor}} como una familia de gauges"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for group, values in samples.items():
+        for field, value in values.items():
+            lines.append(f'{name}{{{label}="{_escape(group)}",field="{_escape(field)}"}} {value}')
+    return lines
@@ -0,0 +1,75 @@
+import asyncio
+import contextvars
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# Número de procesos para cálculos pesados (pandas). 0 = ejecutar en el propio proceso
+STATS_POOL_WORKERS = int(os.getenv("STATS_POOL_WORKERS", "2"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+# True en las peticiones que se perfilan: sus cálculos no van al pool
+_inline: contextvars.ContextVar[bool] = contextvars.ContextVar("stats_inline", default=False)
+
+
+def _warm_up() -> None:
+    # Importar pandas en el worker para que la primera petición no lo pague
+    import app.services.stats_compute  # noqa: F401
+
+
+def get_stats_pool() -> Optional[ProcessPoolExecutor]:
+    """Pool de procesos compartido (se crea la primera vez)"""
+    global _pool
+    if STATS_POOL_WORKERS <= 0:
+        return None
+    if _pool is None:
+        # spawn: los workers no heredan el event loop ni las conexiones a la bd
+        _pool = ProcessPoolExecutor(
+            max_workers=STATS_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def start_stats_pool() -> None:
+    pool = get_stats_pool()
+    if pool is not None:
+        for _ in range(STATS_POOL_WORKERS):
+            pool.submit(_warm_up)
+
+
+def shutdown_stats_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+@contextmanager
+def stats_inline() -> Iterator[None]:
+    """Ejecutar en este proceso los cálculos lanzados dentro del bloque (y de las
+    tareas que cree), p. ej. para que un profiler del hilo los vea"""
+    token = _inline.set(True)
+    try:
+        yield
+    finally:
+        _inline.reset(token)
+
+
+async def run_in_stats_pool(func: Callable[..., T], *args: Any) -> T:
+    """Ejecutar un cálculo CPU-bound fuera del event loop"""
+    pool = get_stats_pool()
+    if pool is None or _inline.get():
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, partial(func, *args))
@@ -0,0 +1,146 @@
+"""Perfilado de peticiones individuales bajo demanda (solo admins).
+
+Una petición con el header `X-Profile: 1` o el parámetro `?profile=1` se
+ejecuta bajo cProfile si el token pertenece a un admin (misma cadena que
+`check_admin_role`). El resultado se guarda como archivo pstats en
+PROFILE_DIR y su id vuelve en el header `X-Profile-Id`; se descarga desde
+/profiles. Se conservan los PROFILE_KEEP más recientes: al guardar uno se
+borran los más viejos. Sin el header o el parámetro no se hace nada más que
+buscarlos.
+
+cProfile mide todo el hilo: mientras corre también registra lo que el event
+loop ejecute de otras peticiones, por eso se perfila una petición a la vez.
+
+Tampoco ve otros procesos, y los cálculos grandes de stats (motor pandas)
+normalmente van al pool de procesos. Una petición perfilada los ejecuta en
+el propio proceso (`stats_inline`): el motor elegido es el mismo, así que
+el perfil muestra el código que corre en producción, aunque esa petición
+bloquee el event loop mientras calcula. Si se suma a un cálculo idéntico
+que otra petición ya había lanzado (single-flight), ese cálculo corre donde
+lo lanzó la otra y no aparece en el perfil.
+"""
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import re
+import tempfile
+import uuid
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+from app.core.database import AsyncSessionLocal
+from app.core.process_pool import stats_inline
+from app.utils.security import get_current_user, get_current_active_user, check_admin_role
+
+load_dotenv()
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "meditation-profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))  # perfiles guardados como máximo
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_lock = asyncio.Lock()
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def profile_requested(scope) -> bool:
+    if _header(scope, b"x-profile") in (b"1", b"true"):
+        return True
+    query = scope.get("query_string", b"")
+    return b"profile=" in query and re.search(rb"(^|&)profile=(1|true)(&|$)", query) is not None
+
+
+async def _check_admin(scope) -> None:
+    authorization = (_header(scope, b"authorization") or b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="No autenticado", headers={"WWW-Authenticate": "Bearer"})
+
+    async with AsyncSessionLocal() as db:
+        user = await get_current_user(token, db)
+    await check_admin_role(await get_current_active_user(user))
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    return os.path.join(PROFILE_DIR, f"{profile_id}.pstats")
+
+
+def list_profiles() -> List[str]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    files = [f for f in os.listdir(PROFILE_DIR) if f.endswith(".pstats")]
+    files.sort(key=lambda f: os.path.getmtime(os.path.join(PROFILE_DIR, f)), reverse=True)
+    return [f[:-len(".pstats")] for f in files]
+
+
+def profile_summary(path: str, sort: str = "cumulative", limit: int = 50) -> str:
+    """Las `limit` funciones más costosas en texto"""
+    stream = io.StringIO()
+    pstats.Stats(path, stream=stream).sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def _prune(keep: int) -> None:
+    """Borrar los perfiles más viejos y dejar solo los `keep` más recientes"""
+    for profile_id in list_profiles()[keep:]:
+        try:
+            os.remove(profile_path(profile_id))
+        except FileNotFoundError:
+            # Otro worker ya lo borró
+            pass
+
+
+def _dump(profiler: cProfile.Profile, path: str) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(path)
+    _prune(max(1, PROFILE_KEEP))
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILING_ENABLED or not profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await _check_admin(scope)
+        except HTTPException as e:
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+            await response(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode())
+                ]
+            await send(message)
+
+        async with _lock:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                with stats_inline():
+                    await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+                await asyncio.to_thread(_dump, profiler, profile_path(profile_id))
@@ -0,0 +1,139 @@
+"""Conteo de consultas SQL por petición.
+
+Los eventos del engine cuentan cada sentencia y su duración en el
+`QueryStats` de la petición en curso (contextvar; SQLAlchemy propaga el
+contexto al greenlet que ejecuta el driver). `QueryStatsMiddleware` lo
+expone en el header `Server-Timing`. Las sentencias que superan
+SLOW_QUERY_MS se registran normalizadas en el logger "app.slow_query".
+
+En tests:
+
+    with assert_max_queries(3):
+        client.get("/sessions/")
+"""
+import logging
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+load_dotenv()
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+
+class QueryStats:
+    __slots__ = ("count", "total_time", "statements")
+
+    def __init__(self, record: bool = False):
+        self.count = 0
+        self.total_time = 0.0
+        # Solo se guardan las sentencias si se pide (tests)
+        self.statements: Optional[List[str]] = [] if record else None
+
+    def add(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        if self.statements is not None:
+            self.statements.append(normalize_sql(statement))
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Capturas activas de assert_max_queries. Es global y no un contextvar porque
+# el TestClient ejecuta la app en otro hilo.
+_captures: List[QueryStats] = []
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Quitar literales y parámetros para agrupar sentencias iguales"""
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info["query_start"].pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, elapsed)
+    for capture in _captures:
+        capture.add(statement, elapsed)
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_query_logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, normalize_sql(statement))
+
+
+def install_query_hooks(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """Agrega `Server-Timing: db;dur=<ms>;desc="<n> queries"` a cada respuesta"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                timing = f'db;dur={stats.total_time * 1000:.1f};desc="{stats.count} queries"'
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Falla si dentro del bloque se ejecutan más de `limit` sentencias"""
+    capture = QueryStats(record=True)
+    _captures.append(capture)
+    try:
+        yield capture
+    finally:
+        _captures.remove(capture)
+    if capture.count > limit:
+        listing = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(capture.statements))
+        raise AssertionError(f"Expected at most {limit} queries, got {capture.count}:\n{listing}")
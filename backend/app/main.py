@@ -1,10 +1,24 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
 from app.core.database import Base, engine
+from app.core.query_stats import QueryStatsMiddleware, install_query_hooks
+from app.core.profiling import ProfilingMiddleware
+from app.core.metrics import MetricsMiddleware, registry as metrics_registry, gauge_lines
+from app.core.singleflight import singleflight_metrics
+from app.core.admission import admission_metrics
+from app.core.loop_monitor import loop_monitor, LOOP_MONITOR_ENABLED
+from app.core.process_pool import start_stats_pool, shutdown_stats_pool
+from app.services.stats_scheduler import stats_scheduler, STATS_REFRESH_ENABLED
+from app.services.recommendation_service import recommendation_metrics
+from app.services.reminder_scheduler import reminder_scheduler, REMINDER_SCHEDULER_ENABLED
+from app.services.notification_service import resume_fanouts
+from app.services.similarity_service import similarity_updater, SIMILARITY_UPDATES_ENABLED
 
 
 # Importar routers (los agregaremos luego)
-from app.routes import auth, meditation_types, meditations, sessions, preferences, stats
+from app.routes import auth, meditation_types, meditations, sessions, preferences, stats, profiles, recommendations, notifications
 # from app.routes import auth, meditations, users, etc
 
 app = FastAPI(
@@ -22,16 +36,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cantidad y duración de consultas SQL por petición (header Server-Timing)
+install_query_hooks(engine)
+app.add_middleware(QueryStatsMiddleware)
+
+# Latencia, estados y tamaño de respuesta por ruta (expuestos en /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Perfilado de una petición con X-Profile: 1 o ?profile=1 (solo admins)
+app.add_middleware(ProfilingMiddleware)
+
+metrics_registry.collectors += [
+    lambda: gauge_lines("singleflight", "Cálculos coalescidos por grupo", singleflight_metrics(), "group"),
+    lambda: gauge_lines("admission", "Control de admisión por clase", admission_metrics(), "limiter"),
+    lambda: gauge_lines("stats_refresh", "Refresco de stats en segundo plano", {
+        "scheduler": {
+            "running": int(stats_scheduler.running),
+            "leader": int(stats_scheduler.leader),
+            "refreshed": stats_scheduler.refreshed,
+            "failed": stats_scheduler.failed,
+        }
+    }, "component"),
+    lambda: gauge_lines("event_loop", "Lag de planificación y bloqueos del event loop", {
+        "monitor": loop_monitor.metrics()
+    }, "component"),
+    lambda: gauge_lines("recommendations", "Caché de recomendaciones por usuario", {
+        "cache": recommendation_metrics()
+    }, "component"),
+    lambda: gauge_lines("reminders", "Entrega de notificaciones programadas", {
+        "scheduler": reminder_scheduler.metrics()
+    }, "component"),
+    lambda: gauge_lines("similarity", "Actualización incremental del índice item-item", {
+        "updater": similarity_updater.metrics()
+    }, "component"),
+]
+
 # Rutas base
 @app.get("/")
 def root():
     return {"message": "🧘‍♀️ Bienvenido a la API de meditación"}
 
+
+@app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 # Para crear tablas para bd si no existen 
 @app.on_event("startup")
 async def startup():
     async with engine.begin() as conn:
+        # Los índices de búsqueda usan gin_trgm_ops
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
+    # Procesos para los cálculos de pandas (fuera del event loop)
+    start_stats_pool()
+    # Lag del event loop y detección de llamadas bloqueantes
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    # Refresco de stats en segundo plano
+    if STATS_REFRESH_ENABLED:
+        stats_scheduler.start()
+    # Recordatorios diarios y entrega de notificaciones a su hora
+    if REMINDER_SCHEDULER_ENABLED:
+        reminder_scheduler.start()
+    # Sesiones nuevas al índice item-item, fuera de las peticiones
+    if SIMILARITY_UPDATES_ENABLED:
+        similarity_updater.start()
+    # Envíos masivos interrumpidos por un reinicio
+    await resume_fanouts(reminder_scheduler.notify_scheduled)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stats_scheduler.stop()
+    await reminder_scheduler.stop()
+    await similarity_updater.stop()
+    await loop_monitor.stop()
+    shutdown_stats_pool()
 
 # Montar routers acá
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -40,4 +121,7 @@ app.include_router(meditations.router)
 app.include_router(sessions.router)
 app.include_router(preferences.router)
 app.include_router(stats.router)
+app.include_router(profiles.router)
+app.include_router(recommendations.router)
+app.include_router(notifications.router)
 
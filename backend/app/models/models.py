@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float, ARRAY
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, ForeignKey, Float, LargeBinary, JSON, Index, false
+from sqlalchemy.dialects.postgresql import ARRAY  # && y @> para filtrar por tags
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
@@ -14,6 +15,7 @@ class User(Base):
     sessions = relationship("MeditationSession", back_populates="user")
     stats = relationship("UserStats", back_populates="user", uselist=False)
     preferences = relationship("UserPreferences", back_populates="user", uselist=False)
+    activity = relationship("UserActivity", back_populates="user", uselist=False)
 
 
 class MeditationType(Base):
@@ -25,6 +27,33 @@ class MeditationType(Base):
     tags = Column(ARRAY(String)) #[estrés, sueño, enfoque]
     meditations = relationship("Meditation", back_populates="meditation_type")
 
+    __table_args__ = (
+        # Filtros por tags (&& y @>)
+        Index("ix_meditation_types_tags", "tags", postgresql_using="gin"),
+        # Búsqueda por similitud (pg_trgm)
+        Index("ix_meditation_types_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_meditation_types_description_trgm", "description", postgresql_using="gin",
+              postgresql_ops={"description": "gin_trgm_ops"}),
+    )
+
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_version"
+    id = Column(Integer, primary_key=True) # una sola fila (id = 1)
+    version = Column(Integer, nullable=False, default=1) # sube con cada cambio del catálogo
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MeditationSimilarity(Base):
+    __tablename__ = "meditation_similarities"
+    # Sin FK: borrar una meditación no debe depender del índice (se limpia en el próximo rebuild)
+    meditation_id = Column(Integer, primary_key=True)
+    user_count = Column(Integer, nullable=False, default=0) # usuarios distintos que la hicieron
+    neighbor_ids = Column(ARRAY(Integer), nullable=False, default=list) # top-K, de mayor a menor score
+    co_counts = Column(ARRAY(Integer), nullable=False, default=list) # usuarios en común con cada vecino
+    scores = Column(ARRAY(Float), nullable=False, default=list)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
 
 class Meditation(Base):
     __tablename__ = "meditations"
@@ -36,6 +65,13 @@ class Meditation(Base):
     meditation_type = relationship("MeditationType", back_populates="meditations")
     sessions = relationship("MeditationSession", back_populates="meditation")
 
+    __table_args__ = (
+        Index("ix_meditations_duration", "duration"),
+        Index("ix_meditations_difficulty", "difficulty"),
+        Index("ix_meditations_type_id", "type_id"),
+        Index("ix_meditations_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
 
 class MeditationSession(Base):
     __tablename__ = "sessions"
@@ -62,6 +98,24 @@ class UserStats(Base):
     user = relationship("User", back_populates="stats")
 
 
+class UserActivity(Base):
+    __tablename__ = "user_activity"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    start_date = Column(Date, nullable=False) # Día que representa el bit 0
+    days_bitmap = Column(LargeBinary, nullable=False, default=b"") # 1 bit por día, little-endian
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    user = relationship("User", back_populates="activity")
+
+
+class StatsPeriodCache(Base):
+    __tablename__ = "stats_period_cache"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    period_type = Column(String, primary_key=True) # "week" o "month"
+    period_start = Column(Date, primary_key=True)
+    payload = Column(JSON, nullable=True) # WeeklyStatsOut/MonthlyStatsOut, null = sin sesiones
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+
 class UserPreferences(Base):
     __tablename__ = "user_preferences"
     id = Column(Integer, primary_key=True)
@@ -71,6 +125,10 @@ class UserPreferences(Base):
     goals = Column(ARRAY(String)) #["reduce_anxiety", "better_sleep"]
     user = relationship("User", back_populates="preferences")
 
+    __table_args__ = (
+        Index("ix_user_preferences_user_id", "user_id"),
+    )
+
 
 class Notification(Base):
     __tablename__ = "notifications"
@@ -78,4 +136,40 @@ class Notification(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     message = Column(String)
     is_read = Column(Boolean, default=False)
-    scheduled_time = Column(DateTime) #Para recordatorios 
\ No newline at end of file
+    scheduled_time = Column(DateTime) #Para recordatorios 
+    sent_at = Column(DateTime, nullable=True) # None: pendiente de entrega
+    kind = Column(String, nullable=True) # "daily_reminder" para los generados por el scheduler
+
+    __table_args__ = (
+        # Solo las pendientes, en el orden en que el scheduler las carga
+        Index("ix_notifications_pending", "scheduled_time", "id", postgresql_where=sent_at.is_(None)),
+        # Un recordatorio diario por usuario y horario (la generación es idempotente)
+        Index("uq_notifications_daily_reminder", "user_id", "scheduled_time", unique=True,
+              postgresql_where=kind == "daily_reminder"),
+        # Bandeja de cada usuario, de la más reciente a la más vieja
+        Index("ix_notifications_user_inbox", "user_id", "scheduled_time", "id"),
+        # Solo las no leídas: filtro de no leídas, marcar todo y recuento del contador
+        Index("ix_notifications_unread", "user_id", "scheduled_time", "id", postgresql_where=is_read == false()),
+    )
+
+
+class NotificationCounter(Base):
+    __tablename__ = "notification_counters"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0) # entregadas (sent_at) y no leídas
+
+
+class NotificationFanout(Base):
+    __tablename__ = "notification_fanouts"
+    id = Column(Integer, primary_key=True)
+    message = Column(String, nullable=False)
+    scheduled_time = Column(DateTime, nullable=False)
+    segment = Column(JSON, nullable=False) # filtros por preferencias: preferred_time, preferred_duration, goals
+    status = Column(String, nullable=False, default="running") # running, done, failed
+    inserted = Column(Integer, nullable=False, default=0)
+    last_user_id = Column(Integer, nullable=False, default=0) # posición del keyset: usuarios procesados hasta acá
+    max_user_id = Column(Integer, nullable=False, default=0) # último usuario al crear el envío
+    error = Column(String, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -9,6 +9,7 @@ from app.schemas.meditation_schemas import (
     MeditationTypeCreate, MeditationTypeUpdate, MeditationTypeOut
 )
 from app.utils.security import check_admin_role
+from app.services.catalog_service import get_catalog_snapshot, bump_catalog_version, catalog_response
 
 
 router = APIRouter(prefix="/meditation-type", tags=["Meditation Types"])
@@ -16,9 +17,9 @@ router = APIRouter(prefix="/meditation-type", tags=["Meditation Types"])
 
 
 @router.get("/", response_model=list[MeditationTypeOut])
-async def list_types(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(MeditationType))
-    return result.scalars().all()
+async def list_types(request: Request, db: AsyncSession = Depends(get_db)):
+    snapshot = await get_catalog_snapshot(db)
+    return catalog_response(request, snapshot.types_body)
 
 
 @router.post(
@@ -33,6 +34,7 @@ async def create_type(
 ):
     new = MeditationType(**type_in.dict())
     db.add(new)
+    await bump_catalog_version(db)
     await db.commit()
     await db.refresh(new)
     return new
@@ -54,6 +56,7 @@ async def update_type(
         raise HTTPException(status_code=404, detail="Tipo no encontrado")
     for field,val in type_in.dict(exclude_unset=True).items():
         setattr(obj, field, val)
+    await bump_catalog_version(db)
     await db.commit()
     await db.refresh(obj)
     return obj
@@ -73,4 +76,5 @@ async def delete_type(
     if not obj:
         raise HTTPException(status_code=404, detail="Tipo no encontrado")
     await db.delete(obj)
+    await bump_catalog_version(db)
     await db.commit()
\ No newline at end of file
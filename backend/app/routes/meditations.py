@@ -1,31 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
 
 
 from app.core.database import get_db
 from app.models.models import Meditation, MeditationType
-from app.schemas.meditation_schemas import MeditationCreate, MeditationUpdate, MeditationOut
+from app.schemas.meditation_schemas import MeditationCreate, MeditationUpdate, MeditationOut, MeditationSearchResult
 from app.utils.security import check_admin_role
+from app.services.catalog_service import (
+    get_catalog_snapshot, bump_catalog_version, catalog_response,
+    CatalogFilters, filter_meditations,
+)
+from app.services.search_service import search_meditations, autocomplete, SEARCH_MAX_RESULTS
 
 
 router = APIRouter(prefix="/meditations", tags=["Meditations"])
 
 
 @router.get("/", response_model=List[MeditationOut])
-async def list_meditations(db: AsyncSession = Depends(get_db)):
-    # Carga las meditaciones con sus relaciones
-    result = await db.execute(
-        select(Meditation).options(
-            selectinload(Meditation.meditation_type)
+async def list_meditations(
+    request: Request,
+    tags: Optional[str] = None,  # separados por comas: "estrés,sueño"
+    tag_mode: str = "any",  # any: alguno de los tags, all: todos
+    min_duration: Optional[int] = None,
+    max_duration: Optional[int] = None,
+    difficulty: Optional[str] = None,
+    type_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    if tag_mode not in ("any", "all"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="tag_mode debe ser 'any' o 'all'"
         )
+    filters = CatalogFilters(
+        tags=tuple(t.strip() for t in tags.split(",") if t.strip()) if tags else (),
+        match_all=tag_mode == "all",
+        min_duration=min_duration,
+        max_duration=max_duration,
+        difficulty=difficulty,
+        type_id=type_id,
     )
-    
-    # Usa directamente el modelo de respuesta Pydantic
-    meditations = result.scalars().all()
-    return meditations
+
+    if filters.empty:
+        # JSON ya serializado y comprimido del snapshot del catálogo (o 304)
+        snapshot = await get_catalog_snapshot(db)
+        return catalog_response(request, snapshot.meditations_body)
+
+    return await filter_meditations(filters, db)
+
+
+@router.get("/search", response_model=List[MeditationSearchResult])
+async def search(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_RESULTS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Buscar por título de la meditación y nombre o descripción de su tipo, ordenado por similitud"""
+    try:
+        return await search_meditations(q.strip(), limit, db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al buscar meditaciones: {str(e)}"
+        )
+
+
+@router.get("/autocomplete", response_model=List[str])
+async def autocomplete_titles(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=SEARCH_MAX_RESULTS),
+    db: AsyncSession = Depends(get_db),
+):
+    """Sugerencias de títulos y tipos que empiezan con el texto escrito"""
+    try:
+        return await autocomplete(prefix.strip(), limit, db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener sugerencias: {str(e)}"
+        )
 
 
 @router.post(
@@ -53,6 +109,7 @@ async def create_meditation(
         # Crear la meditación
         new = Meditation(**med_in.dict())
         db.add(new)
+        await bump_catalog_version(db)
         await db.commit()
         await db.refresh(new)
         
@@ -114,6 +171,7 @@ async def update_meditation(
             setattr(obj, field, val)
         
         # Guardar cambios
+        await bump_catalog_version(db)
         await db.commit()
         await db.refresh(obj)
         
@@ -146,6 +204,7 @@ async def delete_meditation(
                 detail=f"Meditación con ID {meditation_id} no encontrada"
             )
         await db.delete(obj)
+        await bump_catalog_version(db)
         await db.commit()
 
     except Exception as e:
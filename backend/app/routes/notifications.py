@@ -0,0 +1,125 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import List, Optional
+
+from app.core.database import get_db
+from app.models.models import NotificationFanout, User
+from app.schemas.notification_schemas import (
+    NotificationFanoutCreate, NotificationFanoutOut, NotificationPage, NotificationReadRequest, UnreadCountOut
+)
+from app.utils.security import get_current_user, check_admin_role
+from app.services.notification_service import (
+    create_fanout, start_fanout, list_inbox, decode_cursor, mark_read, unread_count
+)
+from app.services.reminder_scheduler import reminder_scheduler
+
+
+router = APIRouter(prefix="/notifications", tags=["Notifications"])
+
+
+@router.get("/", response_model=NotificationPage)
+async def list_notifications(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    unread_only: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Notificaciones entregadas al usuario, de la más reciente a la más vieja"""
+    position = None
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor inválido"
+            )
+    try:
+        items, next_cursor = await list_inbox(current_user.id, limit, position, unread_only, db)
+        return NotificationPage(items=items, next_cursor=next_cursor)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener notificaciones: {str(e)}"
+        )
+
+
+@router.post("/read", response_model=UnreadCountOut)
+async def mark_notifications_read(
+    payload: NotificationReadRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Marcar como leídas las notificaciones indicadas (o todas con `all`); devuelve las no leídas restantes"""
+    if not payload.all and not payload.ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Indica `ids` o `all`"
+        )
+    try:
+        await mark_read(current_user.id, payload.ids, payload.all, db)
+        return UnreadCountOut(unread=await unread_count(current_user.id, db))
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al marcar notificaciones: {str(e)}"
+        )
+
+
+@router.get("/unread-count", response_model=UnreadCountOut)
+async def get_unread_count(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Badge de no leídas: lee el contador del usuario, sin contar filas"""
+    return UnreadCountOut(unread=await unread_count(current_user.id, db))
+
+
+@router.post("/fanout", response_model=NotificationFanoutOut, status_code=status.HTTP_202_ACCEPTED)
+async def create_notification_fanout(
+    payload: NotificationFanoutCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(check_admin_role),  # Solo admins
+):
+    """Enviar una notificación a todos los usuarios de un segmento (en segundo plano) - Solo admins"""
+    try:
+        fanout = await create_fanout(payload, current_user.id, db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al crear el envío: {str(e)}"
+        )
+    # El scheduler relee su ventana si la notificación es para ya
+    start_fanout(fanout.id, reminder_scheduler.notify_scheduled)
+    return fanout
+
+
+@router.get("/fanout", response_model=List[NotificationFanoutOut])
+async def list_notification_fanouts(
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(check_admin_role),  # Solo admins
+):
+    """Envíos más recientes con su avance - Solo admins"""
+    res = await db.execute(
+        select(NotificationFanout).order_by(NotificationFanout.id.desc()).limit(limit)
+    )
+    return res.scalars().all()
+
+
+@router.get("/fanout/{fanout_id}", response_model=NotificationFanoutOut)
+async def get_notification_fanout(
+    fanout_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(check_admin_role),  # Solo admins
+):
+    """Avance de un envío: usuarios recorridos y notificaciones creadas - Solo admins"""
+    fanout = await db.get(NotificationFanout, fanout_id)
+    if not fanout:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Envío no encontrado"
+        )
+    return fanout
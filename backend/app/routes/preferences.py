@@ -7,7 +7,9 @@ from app.core.database import get_db
 from app.models.models import UserPreferences
 from app.schemas.preferences_schemas import PreferencesAllOut, PreferencesOut
 from app.utils.security import get_current_user, check_admin_role
+from app.core.admission import admission
 from app.services.preferences_service import update_user_preferences
+from app.services.recommendation_service import invalidate_recommendations
 
 
 router = APIRouter(prefix="/preferences", tags=["Preferences"])
@@ -28,7 +30,7 @@ async def get_preferences(
     return prefs
 
 
-@router.get("/all", response_model=list[PreferencesAllOut])
+@router.get("/all", response_model=list[PreferencesAllOut], dependencies=[Depends(admission("admin_bulk", check_admin_role))])
 async def get_all_preferences(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(check_admin_role)  # Solo para admins
@@ -50,6 +52,7 @@ async def generate_preferences(
 
     try:
         await update_user_preferences(current_user.id, db)
+        invalidate_recommendations(current_user.id)
         
         res = await db.execute(
             select(UserPreferences)
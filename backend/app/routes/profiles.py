@@ -0,0 +1,55 @@
+import os
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from app.core.profiling import profile_path, list_profiles, profile_summary
+from app.models.models import User
+from app.utils.security import check_admin_role
+
+
+router = APIRouter(prefix="/profiles", tags=["Profiling"])
+
+
+def _existing_path(profile_id: str) -> str:
+    path = profile_path(profile_id)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil no encontrado"
+        )
+    return path
+
+
+@router.get("/", response_model=List[str])
+async def get_profiles(current_user: User = Depends(check_admin_role)):
+    """Ids de los perfiles guardados, del más reciente al más antiguo - Solo admins"""
+    return list_profiles()
+
+
+@router.get("/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    current_user: User = Depends(check_admin_role),
+):
+    """Descargar el archivo pstats (abrir con `python -m pstats` o snakeviz) - Solo admins"""
+    path = _existing_path(profile_id)
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.pstats")
+
+
+@router.get("/{profile_id}/summary", response_class=PlainTextResponse)
+async def get_profile_summary(
+    profile_id: str,
+    sort: str = "cumulative",  # cumulative, tottime, calls
+    limit: int = 50,
+    current_user: User = Depends(check_admin_role),
+):
+    """Funciones más costosas del perfil en texto - Solo admins"""
+    path = _existing_path(profile_id)
+    if sort not in ("cumulative", "tottime", "calls"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Orden no válido"
+        )
+    return profile_summary(path, sort, limit)
@@ -0,0 +1,53 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.models.models import User
+from app.schemas.meditation_schemas import MeditationRecommendation
+from app.utils.security import get_current_user
+from app.services.recommendation_service import get_recommendations, RECOMMENDATION_MAX_RESULTS
+from app.services.similarity_service import similar_meditations, SIMILARITY_TOP_K
+
+
+router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
+
+
+@router.get("/", response_model=List[MeditationRecommendation])
+async def list_recommendations(
+    limit: int = Query(10, ge=1, le=RECOMMENDATION_MAX_RESULTS),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Meditaciones recomendadas según objetivos, duración preferida, franja horaria e historial"""
+    try:
+        return await get_recommendations(current_user.id, limit, db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar recomendaciones: {str(e)}"
+        )
+
+
+@router.get("/similar/{meditation_id}", response_model=List[MeditationRecommendation])
+async def list_similar(
+    meditation_id: int,
+    limit: int = Query(10, ge=1, le=SIMILARITY_TOP_K),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Quienes hicieron esta meditación también hicieron... (índice precalculado)"""
+    try:
+        results = await similar_meditations(meditation_id, limit, db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener meditaciones similares: {str(e)}"
+        )
+    if results is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Meditación no encontrada"
+        )
+    return results
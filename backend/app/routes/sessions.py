@@ -1,19 +1,55 @@
+import logging
+from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from typing import List
 
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_db
 from app.models.models import MeditationSession, Meditation, User
 from app.schemas.session_schemas import SessionCreate, SessionOut, SessionAllOut
 from app.utils.security import get_current_user, check_admin_role
+from app.core.admission import admission
 from app.services.preferences_service import update_user_preferences
+from app.services.activity_service import set_activity_day, sync_activity_day
+from app.services.period_cache_service import invalidate_stats_periods
+from app.services.stats_scheduler import stats_scheduler
+from app.services.recommendation_service import invalidate_recommendations
+from app.services.similarity_service import similarity_updater
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/sessions", tags=["Sessions"])
 
 
+async def refresh_derived_data(user_id: int, synced_days: List[date], active_days: List[date]) -> None:
+    """Actualizar lo que se deriva de las sesiones del usuario, con la sesión ya guardada.
+
+    Todos los pasos comparten una sesión de bd pero cada uno confirma lo suyo:
+    si uno falla se registra, se hace rollback y se sigue con los demás, en
+    lugar de responder 500 por una escritura que ya se confirmó.
+    """
+    steps = [
+        ("las preferencias", lambda db: update_user_preferences(user_id, db)),
+        # Días que pueden haber quedado sin sesiones y días que seguro tienen
+        *[("la actividad", lambda db, d=d: sync_activity_day(user_id, d, db)) for d in synced_days],
+        *[("la actividad", lambda db, d=d: set_activity_day(user_id, d, True, db)) for d in active_days],
+        ("la caché de periodos", lambda db: invalidate_stats_periods(user_id, synced_days + active_days, db)),
+    ]
+    async with AsyncSessionLocal() as db:
+        for name, step in steps:
+            try:
+                await step(db)
+            except Exception:
+                logger.exception("Error al actualizar %s del usuario %s tras guardar una sesión", name, user_id)
+                await db.rollback()
+
+    stats_scheduler.request_refresh(user_id)
+    invalidate_recommendations(user_id)
+
+
 @router.post("/", response_model=SessionOut, status_code=status.HTTP_201_CREATED)
 async def create_session(
     payload: SessionCreate,
@@ -48,10 +84,12 @@ async def create_session(
         # Importante: asignamos el objeto meditation que ya tiene meditation_type cargado
         new_sess.meditation = meditation
 
-        #Actualizamos preferencias
-        await update_user_preferences(current_user.id, db)
+        # Preferencias, día activo, caché de periodos, stats y recomendaciones
+        await refresh_derived_data(current_user.id, [], [new_sess.date.date()])
+
+        # Índice item-item: la sesión cuenta como "el usuario eligió esta meditación"
+        similarity_updater.enqueue(new_sess.id)
 
-        
         return new_sess
     
     except Exception as e:
@@ -100,7 +138,7 @@ async def list_sessions(
         )
 
 
-@router.get("/all", response_model=List[SessionAllOut])
+@router.get("/all", response_model=List[SessionAllOut], dependencies=[Depends(admission("admin_bulk", check_admin_role))])
 async def list_all_sessions(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_admin_role), #Solo admins
@@ -266,6 +304,8 @@ async def update_session(
                 detail="Solo puedes actualizar tus propias sesiones"
             )
     
+        previous_day = session.date.date()
+
         # Actualizar solo los campos permitidos
         session.duration_completed = payload.duration_completed
         #Para develop luego elimnar o comentar
@@ -274,8 +314,11 @@ async def update_session(
         await db.commit()
         await db.refresh(session)
 
-        # Actualizar preferencias después de modificar la sesión
-        await update_user_preferences(session.user_id, db)
+        # Actualizar el día anterior y el nuevo en el bitmap de actividad
+        new_day = session.date.date()
+        await refresh_derived_data(
+            session.user_id, [previous_day], [new_day] if new_day != previous_day else []
+        )
 
         # Asegura que las relaciones sean accesibles antes de la serialización
         _ = session.meditation
@@ -317,15 +360,16 @@ async def delete_session(
                 detail="Sesión no encontrada"
             )
         
-        # Guardar el user_id antes de eliminar la sesión
+        # Guardar el user_id y el día antes de eliminar la sesión
         user_id = session.user_id
+        day = session.date.date()
         
         # Eliminar la sesión
         await db.delete(session)
         await db.commit()
         
-        # Actualizar las preferencias del usuario después de la eliminación
-        await update_user_preferences(user_id, db)
+        # Desmarcar el día si ya no quedan sesiones en él
+        await refresh_derived_data(user_id, [day], [])
         
     except HTTPException:
         # Re-lanzar excepciones HTTP que ya definí
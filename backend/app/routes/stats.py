@@ -3,19 +3,43 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import Awaitable, Callable, List, Dict, TypeVar
 
 from app.core.database import get_db
-from app.models.models import UserStats, MeditationSession, User, Meditation, MeditationType
+from app.models.models import UserStats, User
 from app.schemas.stats_schemas import (
     UserStatsOut, StatsAnalysisOut, WeeklyStatsOut, 
-    MonthlyStatsOut, ProgressStatsOut, ChartOut
+    MonthlyStatsOut, ProgressStatsOut, ChartOut, DashboardOut, ActivityStatsOut
 )
-from app.utils.security import get_current_user, check_admin_role
+from app.utils.security import get_current_user, get_current_user_detached, check_admin_role
+from app.core.singleflight import get_singleflight, singleflight_metrics
+from app.core.admission import admission, analytics_session
 from app.services.stats_service import (
     calculate_user_stats, get_user_analytics, 
-    generate_stats_charts, refresh_all_user_stats
+    generate_stats_charts, generate_stats_charts_batch, refresh_all_user_stats,
+    get_user_dashboard, empty_user_stats, DASHBOARD_SECTIONS,
+    load_session_columns, analyze_user_progress
 )
+from app.services.activity_service import get_activity_stats
+from app.services.period_cache_service import get_weekly_stats_cached, get_monthly_stats_cached
+from app.services.stats_scheduler import stats_scheduler, stats_are_stale
+
+CHART_TYPES = ["progress", "types", "weekly", "monthly"]
+
+# Peticiones idénticas simultáneas (varios dispositivos, reintentos) comparten el cálculo
+stats_flight = get_singleflight("stats")
+
+T = TypeVar("T")
+
+
+async def _own_session(compute: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    # El cálculo compartido no usa una sesión de la petición que lo lanzó:
+    # esa se cierra cuando su petición termina o se cancela, aunque otras
+    # sigan esperando el resultado. Estas rutas autentican con
+    # get_current_user_detached, así que mientras esperan no retienen
+    # ninguna conexión: solo el cálculo en curso tiene una.
+    async with analytics_session() as db:
+        return await compute(db)
 
 router = APIRouter(prefix="/stats", tags=["Stats"])
 
@@ -33,21 +57,16 @@ async def get_user_stats(
         )
         user_stats = result.scalar_one_or_none()
         
-        # Si no existen stats, calcularlas
+        # Si no existen stats se calculan ahora (consulta agregada + bitmap de actividad)
         if not user_stats:
             user_stats = await calculate_user_stats(current_user.id, db)
             if not user_stats:
                 # Usuario sin sesiones se crean stats vacías
-                return UserStatsOut(
-                    id=0,
-                    user_id=current_user.id,
-                    total_minutes=0,
-                    current_streak=0,
-                    longest_streak=0,
-                    total_sessions=0, 
-                    average_session_duration=0.0,
-                    last_updated=datetime.utcnow()
-                )
+                return empty_user_stats(current_user.id)
+
+        # Racha calculada antes de medianoche: pedir recálculo
+        elif stats_are_stale(user_stats):
+            stats_scheduler.request_refresh(current_user.id)
         
         return user_stats
         
@@ -58,14 +77,46 @@ async def get_user_stats(
         )
 
 
-@router.get("/analysis", response_model=StatsAnalysisOut)
+@router.get("/dashboard", response_model=DashboardOut, dependencies=[Depends(admission("analytics", get_current_user_detached))])
+async def get_user_dashboard_stats(
+    exclude: str = "",  # Secciones a omitir separadas por comas
+    weeks: int = 4,
+    months: int = 6,
+    days: int = 30,
+    current_user: User = Depends(get_current_user_detached)
+):
+    """Stats, análisis, semanas, meses y progreso en una sola llamada"""
+    try:
+        excluded = {s.strip() for s in exclude.split(",") if s.strip()}
+        sections = [s for s in DASHBOARD_SECTIONS if s not in excluded]
+        user_id = current_user.id
+
+        dashboard = await stats_flight.do(
+            ("dashboard", user_id, tuple(sections), weeks, months, days),
+            lambda: _own_session(lambda db: get_user_dashboard(
+                user_id, db, sections, weeks=weeks, months=months, days=days
+            )),
+        )
+        return dashboard
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar el dashboard: {str(e)}"
+        )
+
+
+@router.get("/analysis", response_model=StatsAnalysisOut, dependencies=[Depends(admission("analytics", get_current_user_detached))])
 async def get_user_analysis(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_detached)
 ):
     """Obtener análisis detallado con pandas de las sesiones del usuario"""
     try:
-        analysis = await get_user_analytics(current_user.id, db)
+        user_id = current_user.id
+        analysis = await stats_flight.do(
+            ("analysis", user_id),
+            lambda: _own_session(lambda db: get_user_analytics(user_id, db)),
+        )
         return analysis
         
     except Exception as e:
@@ -75,15 +126,18 @@ async def get_user_analysis(
         )
 
 
-@router.get("/charts", response_model=ChartOut) 
+@router.get("/charts", response_model=ChartOut, dependencies=[Depends(admission("analytics", get_current_user_detached))]) 
 async def get_user_charts(
     chart_type: str = "progress",  # progress, weekly, monthly, types
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_detached)
 ):
     """Generar gráficos de estadísticas del usuario"""
     try:
-        chart_data = await generate_stats_charts(current_user.id, chart_type, db)
+        user_id = current_user.id
+        chart_data = await stats_flight.do(
+            ("chart", user_id, chart_type),
+            lambda: _own_session(lambda db: generate_stats_charts(user_id, chart_type, db)),
+        )
         return chart_data
         
     except Exception as e:
@@ -93,6 +147,32 @@ async def get_user_charts(
         )
 
 
+@router.get("/charts/batch", response_model=Dict[str, ChartOut], dependencies=[Depends(admission("analytics", get_current_user_detached))])
+async def get_user_charts_batch(
+    types: str = ",".join(CHART_TYPES),  # Lista separada por comas
+    current_user: User = Depends(get_current_user_detached)
+):
+    """Generar varios gráficos del usuario con una sola consulta"""
+    try:
+        # Quitar vacíos y duplicados manteniendo el orden pedido
+        chart_types = list(dict.fromkeys(t.strip() for t in types.split(",") if t.strip()))
+        if not chart_types:
+            chart_types = CHART_TYPES
+
+        user_id = current_user.id
+        charts = await stats_flight.do(
+            ("charts", user_id, tuple(chart_types)),
+            lambda: _own_session(lambda db: generate_stats_charts_batch(user_id, chart_types, db)),
+        )
+        return charts
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar gráficos: {str(e)}"
+        )
+
+
 @router.get("/weekly", response_model=List[WeeklyStatsOut])
 async def get_weekly_stats(
     weeks: int = 4,  # Últimas 4 semanas por defecto
@@ -101,30 +181,8 @@ async def get_weekly_stats(
 ):
     """Obtener estadísticas semanales del usuario"""
     try:
-        # Calcular fechas
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(weeks=weeks)
-        
-        # Obtener sesiones del período
-        result = await db.execute(
-            select(MeditationSession)
-            .options(
-                selectinload(MeditationSession.meditation)
-                .selectinload(Meditation.meditation_type)
-            )
-            .where(
-                MeditationSession.user_id == current_user.id,
-                MeditationSession.date >= start_date,
-                MeditationSession.date <= end_date
-            )
-            .order_by(MeditationSession.date)
-        )
-        
-        sessions = result.scalars().all()
-        
-        # Agrupar por semanas usando pandas
-        from app.services.stats_service import group_sessions_by_week
-        weekly_stats = await group_sessions_by_week(sessions)
+        # Semanas cerradas desde la caché, la semana en curso en vivo
+        weekly_stats = await get_weekly_stats_cached(current_user.id, weeks, db)
         
         return weekly_stats
         
@@ -143,30 +201,8 @@ async def get_monthly_stats(
 ):
     """Obtener estadísticas mensuales del usuario"""
     try:
-        # Calcular fechas
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=months * 30)
-        
-        # Obtener sesiones del período
-        result = await db.execute(
-            select(MeditationSession)
-            .options(
-                selectinload(MeditationSession.meditation)
-                .selectinload(Meditation.meditation_type)
-            )
-            .where(
-                MeditationSession.user_id == current_user.id,
-                MeditationSession.date >= start_date,
-                MeditationSession.date <= end_date
-            )
-            .order_by(MeditationSession.date)
-        )
-        
-        sessions = result.scalars().all()
-        
-        # Agrupar por meses usando pandas
-        from app.services.stats_service import group_sessions_by_month
-        monthly_stats = await group_sessions_by_month(sessions)
+        # Meses cerrados desde la caché, el mes en curso en vivo
+        monthly_stats = await get_monthly_stats_cached(current_user.id, months, db)
         
         return monthly_stats
         
@@ -189,26 +225,11 @@ async def get_progress_stats(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Obtener sesiones del período
-        result = await db.execute(
-            select(MeditationSession)
-            .options(
-                selectinload(MeditationSession.meditation)
-                .selectinload(Meditation.meditation_type)
-            )
-            .where(
-                MeditationSession.user_id == current_user.id,
-                MeditationSession.date >= start_date,
-                MeditationSession.date <= end_date
-            )
-            .order_by(MeditationSession.date)
-        )
-        
-        sessions = result.scalars().all()
+        # Obtener sesiones del período (solo las columnas necesarias)
+        cols = await load_session_columns(current_user.id, db, start_date, end_date)
         
         # Analizar progreso usando pandas
-        from app.services.stats_service import analyze_user_progress
-        progress_stats = await analyze_user_progress(sessions, days)
+        progress_stats = await analyze_user_progress(cols, days)
         
         return progress_stats
         
@@ -219,6 +240,24 @@ async def get_progress_stats(
         )
 
 
+@router.get("/activity", response_model=ActivityStatsOut)
+async def get_activity(
+    days: int = 30,  # Ventana de consistencia
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Rachas y consistencia desde el bitmap de días activos (sin recorrer sesiones)"""
+    try:
+        activity = await get_activity_stats(current_user.id, db, days)
+        return activity
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener la actividad: {str(e)}"
+        )
+
+
 @router.post("/refresh", status_code=200)
 async def refresh_user_stats(
     db: AsyncSession = Depends(get_db),
@@ -272,7 +311,7 @@ async def refresh_user_stats(
         )
 
 
-@router.post("/refresh-all", status_code=200)
+@router.post("/refresh-all", status_code=200, dependencies=[Depends(admission("admin_bulk", check_admin_role))])
 async def refresh_all_stats(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_admin_role)  # Solo admins
@@ -294,7 +333,7 @@ async def refresh_all_stats(
         )
 
 
-@router.get("/all", response_model=List[UserStatsOut])
+@router.get("/all", response_model=List[UserStatsOut], dependencies=[Depends(admission("admin_bulk", check_admin_role))])
 async def get_all_stats(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(check_admin_role)  # Solo admins
@@ -314,4 +353,12 @@ async def get_all_stats(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener todas las estadísticas: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/singleflight", status_code=200)
+async def get_singleflight_metrics(
+    current_user: User = Depends(check_admin_role)  # Solo admins
+):
+    """Métricas de cálculos compartidos entre peticiones simultáneas (Solo admins)"""
+    return singleflight_metrics()
@@ -54,4 +54,10 @@ class MeditationOut(MeditationBase):
 
     class Config:
         orm_mode = True
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class MeditationSearchResult(MeditationOut):
+    score: float = Field(..., description="Similitud con la búsqueda (0 a 1)")
+
+class MeditationRecommendation(MeditationOut):
+    score: float = Field(..., description="Afinidad con las preferencias del usuario")
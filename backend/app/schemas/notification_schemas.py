@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, computed_field
 from datetime import datetime
+from typing import List, Literal, Optional
 
 
 class NotificationOut(BaseModel):
@@ -10,4 +11,56 @@ class NotificationOut(BaseModel):
 
     class Config:
         orm_mode = True
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class NotificationPage(BaseModel):
+    items: List[NotificationOut]
+    next_cursor: Optional[str] = Field(None, description="Pasar como `cursor` para la página siguiente")
+
+
+class NotificationReadRequest(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=500, example=[12, 15])
+    all: bool = Field(False, description="Marcar todas las entregadas como leídas")
+
+
+class UnreadCountOut(BaseModel):
+    unread: int
+
+
+class FanoutSegment(BaseModel):
+    """Usuarios destino según sus preferencias (sin filtros: todos los usuarios activos)"""
+    preferred_time: Optional[Literal["morning", "afternoon", "evening"]] = None
+    preferred_duration: Optional[Literal["short", "medium", "long"]] = None
+    goals: Optional[List[str]] = Field(None, example=["sueño"], description="Alguno de estos objetivos")
+
+
+class NotificationFanoutCreate(BaseModel):
+    message: str = Field(..., min_length=1, max_length=500)
+    scheduled_time: Optional[datetime] = Field(None, description="UTC; por defecto, ahora")
+    segment: FanoutSegment = FanoutSegment()
+
+
+class NotificationFanoutOut(BaseModel):
+    id: int
+    message: str
+    scheduled_time: datetime
+    segment: FanoutSegment
+    status: str
+    inserted: int
+    last_user_id: int
+    max_user_id: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    @computed_field
+    @property
+    def progress(self) -> float:
+        """Fracción de usuarios recorridos (por rango de id)"""
+        if self.status == "done" or not self.max_user_id:
+            return 1.0 if self.status == "done" else 0.0
+        return round(min(self.last_user_id / self.max_user_id, 1.0), 4)
+
+    class Config:
+        from_attributes = True
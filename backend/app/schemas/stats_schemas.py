@@ -100,6 +100,26 @@ class ChartOut(BaseModel):
     colors: Optional[List[str]] = Field(description="Colores para el gráfico")
     metadata: Optional[Dict[str, Any]] = Field(description="Metadatos adicinoales")
 
+class ActivityStatsOut(BaseModel):
+    user_id: int
+    period_days: int = Field(description="Días de la ventana de consistencia")
+    current_streak: int = Field(description="Racha actual de días consecutivos")
+    longest_streak: int = Field(description="Racha más larga de días consecutivos")
+    longest_gap_days: int = Field(description="Mayor brecha sin meditar (días)")
+    total_active_days: int = Field(description="Días con al menos una sesión")
+    active_days_in_period: int = Field(description="Días activos en la ventana")
+    consistency_percentage: float = Field(description="Porcentaje de días activos en la ventana")
+
+
+class DashboardOut(BaseModel):
+    user_id: int
+    generated_at: datetime
+    stats: Optional[UserStatsOut] = Field(default=None, description="Estadísticas básicas")
+    analysis: Optional[StatsAnalysisOut] = Field(default=None, description="Análisis detallado")
+    weekly: Optional[List[WeeklyStatsOut]] = Field(default=None, description="Estadísticas semanales")
+    monthly: Optional[List[MonthlyStatsOut]] = Field(default=None, description="Estadísticas mensuales")
+    progress: Optional[ProgressStatsOut] = Field(default=None, description="Progreso del periodo")
+
 # Para respuestas de endpoints específicos
 class StatsRefreshResponse(BaseModel):
     message: str
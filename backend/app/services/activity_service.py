@@ -0,0 +1,225 @@
+"""Bitmap de días activos por usuario (bit i = start_date + i días).
+
+Rachas, rachas del mes, mayor brecha, días activos y consistencia se
+responden con operaciones de bits sobre una sola fila, sin recorrer
+`sessions`. Toda escritura toma la fila con FOR UPDATE (creándola con
+INSERT ... ON CONFLICT si falta), así dos escrituras simultáneas del mismo
+usuario no se pisan el bitmap. "Hoy" es siempre la fecha UTC.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import Date, cast
+from sqlalchemy.dialects.postgresql import insert
+from datetime import date, datetime, timedelta
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from app.models.models import MeditationSession, User, UserActivity
+from app.schemas.stats_schemas import ActivityStatsOut
+
+
+# Operaciones sobre el bitmap (int de Python: bit i = start_date + i días)
+
+def _bits(activity: UserActivity) -> int:
+    return int.from_bytes(activity.days_bitmap or b"", "little")
+
+
+def _store(activity: UserActivity, bits: int) -> None:
+    activity.days_bitmap = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    activity.updated_at = datetime.utcnow()
+
+
+def _mask(length: int) -> int:
+    return (1 << length) - 1 if length > 0 else 0
+
+
+def longest_run(bits: int) -> int:
+    """Mayor cantidad de bits 1 consecutivos"""
+    run = 0
+    while bits:
+        bits &= bits << 1
+        run += 1
+    return run
+
+
+def current_run(bits: int, today_index: int) -> int:
+    """Bits 1 consecutivos que terminan exactamente en today_index"""
+    if today_index < 0:
+        return 0
+    zeros = ~bits & _mask(today_index + 1)
+    if zeros == 0:
+        return today_index + 1
+    return today_index - (zeros.bit_length() - 1)
+
+
+def longest_gap(bits: int) -> int:
+    """Mayor cantidad de días sin meditar entre el primer y el último día activo"""
+    if bits == 0:
+        return 0
+    first = (bits & -bits).bit_length() - 1
+    span = bits.bit_length() - first
+    return longest_run(~(bits >> first) & _mask(span))
+
+
+def active_days(bits: int, today_index: int, days: int) -> int:
+    """Días activos en la ventana de `days` días que termina hoy"""
+    lo = max(today_index - days + 1, 0)
+    length = today_index - lo + 1
+    if length <= 0:
+        return 0
+    return ((bits >> lo) & _mask(length)).bit_count()
+
+
+def consistency(active: int, days: int) -> float:
+    """Porcentaje de días activos en una ventana"""
+    return round(active / days * 100, 2) if days > 0 else 0.0
+
+
+def days_to_bits(days: Iterable[date], start: date) -> int:
+    bits = 0
+    for d in days:
+        bits |= 1 << (d - start).days
+    return bits
+
+
+class Activity(NamedTuple):
+    """Bitmap listo para consultar, sin los días posteriores a hoy"""
+    bits: int
+    start_date: date
+    today_index: int
+
+
+def activity_from_bits(bits: int, start_date: date, today: date) -> Activity:
+    today_index = (today - start_date).days
+    # Los días futuros (sesiones con fecha adelantada) no cuentan
+    return Activity(bits & _mask(today_index + 1), start_date, today_index)
+
+
+def activity_streaks(activity: Activity) -> Tuple[int, int]:
+    """(racha actual, racha más larga)"""
+    return current_run(activity.bits, activity.today_index), longest_run(activity.bits)
+
+
+def month_streak(activity: Activity, year: int, month: int) -> int:
+    """Racha más larga dentro de un mes"""
+    first = date(year, month, 1)
+    following = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    lo = max((first - activity.start_date).days, 0)
+    length = (following - activity.start_date).days - lo
+    if length <= 0:
+        return 0
+    return longest_run((activity.bits >> lo) & _mask(length))
+
+
+# Persistencia
+
+async def _get_activity(user_id: int, db: AsyncSession) -> Optional[UserActivity]:
+    res = await db.execute(select(UserActivity).where(UserActivity.user_id == user_id))
+    return res.scalar_one_or_none()
+
+
+async def _lock_activity(user_id: int, db: AsyncSession) -> Tuple[UserActivity, bool]:
+    """Fila del usuario bloqueada hasta el commit; True si se acaba de crear (vacía)"""
+    now = datetime.utcnow()
+    res = await db.execute(
+        insert(UserActivity)
+        .values(user_id=user_id, start_date=now.date(), days_bitmap=b"", updated_at=now)
+        .on_conflict_do_nothing(index_elements=[UserActivity.user_id])
+        .returning(UserActivity.user_id)
+    )
+    created = res.first() is not None
+    res = await db.execute(
+        select(UserActivity)
+        .where(UserActivity.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return res.scalar_one(), created
+
+
+async def _fill_from_sessions(activity: UserActivity, db: AsyncSession) -> None:
+    # Construir el bitmap desde cero a partir de los días con sesiones
+    res = await db.execute(
+        select(cast(MeditationSession.date, Date))
+        .where(MeditationSession.user_id == activity.user_id)
+        .distinct()
+    )
+    days = [d for d in res.scalars().all() if d is not None]
+
+    res = await db.execute(select(User.created_at).where(User.id == activity.user_id))
+    created_at = res.scalar_one_or_none()
+
+    # Desde el registro, o antes si hay sesiones con fecha anterior
+    candidates = days + ([created_at.date()] if created_at else [])
+    activity.start_date = min(candidates) if candidates else datetime.utcnow().date()
+    _store(activity, days_to_bits(days, activity.start_date))
+
+
+async def rebuild_user_activity(user_id: int, db: AsyncSession) -> UserActivity:
+    """Construir el bitmap desde cero a partir de los días con sesiones"""
+    activity, _ = await _lock_activity(user_id, db)
+    await _fill_from_sessions(activity, db)
+    await db.commit()
+    return activity
+
+
+def _ensure_covers(activity: UserActivity, day: date) -> int:
+    # Si llega un día anterior al inicio, se desplaza el bitmap
+    bits = _bits(activity)
+    if day < activity.start_date:
+        bits <<= (activity.start_date - day).days
+        activity.start_date = day
+    return bits
+
+
+async def set_activity_day(user_id: int, day: date, active: bool, db: AsyncSession) -> None:
+    """Marcar o desmarcar un día en el bitmap del usuario"""
+    activity, created = await _lock_activity(user_id, db)
+    if created:
+        # Primera escritura: se construye completo (ya incluye `day`)
+        await _fill_from_sessions(activity, db)
+    else:
+        bits = _ensure_covers(activity, day)
+        bit = 1 << (day - activity.start_date).days
+        _store(activity, bits | bit if active else bits & ~bit)
+    await db.commit()
+
+
+async def sync_activity_day(user_id: int, day: date, db: AsyncSession) -> None:
+    """Recalcular un día tras editar o eliminar una sesión (sin recorrer el historial)"""
+    start = datetime.combine(day, datetime.min.time())
+    res = await db.execute(
+        select(MeditationSession.id)
+        .where(
+            MeditationSession.user_id == user_id,
+            MeditationSession.date >= start,
+            MeditationSession.date < start + timedelta(days=1),
+        )
+        .limit(1)
+    )
+    await set_activity_day(user_id, day, res.first() is not None, db)
+
+
+async def load_activity(user_id: int, db: AsyncSession) -> Activity:
+    """Bitmap del usuario (se construye la primera vez)"""
+    row = await _get_activity(user_id, db)
+    if not row:
+        row = await rebuild_user_activity(user_id, db)
+    return activity_from_bits(_bits(row), row.start_date, datetime.utcnow().date())
+
+
+async def get_activity_stats(user_id: int, db: AsyncSession, days: int = 30) -> ActivityStatsOut:
+    """Rachas, brechas y consistencia a partir del bitmap de días activos"""
+    activity = await load_activity(user_id, db)
+    current_streak, longest_streak = activity_streaks(activity)
+    active_in_window = active_days(activity.bits, activity.today_index, days)
+
+    return ActivityStatsOut(
+        user_id=user_id,
+        period_days=days,
+        current_streak=current_streak,
+        longest_streak=longest_streak,
+        longest_gap_days=longest_gap(activity.bits),
+        total_active_days=activity.bits.bit_count(),
+        active_days_in_period=active_in_window,
+        consistency_percentage=consistency(active_in_window, days),
+    )
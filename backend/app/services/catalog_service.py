@@ -0,0 +1,275 @@
+"""Snapshot en memoria del catálogo (meditaciones y tipos).
+
+El catálogo cambia solo por las rutas de admin, así que se serializa una vez
+por versión: JSON crudo, gzip y brotli (si está instalado), con un ETag
+derivado de la versión y del contenido. Las rutas de lectura devuelven esos
+bytes tal cual o un 304 si el cliente ya tiene la versión.
+
+La versión vive en la tabla `catalog_version` (una fila) para que todos los
+procesos se enteren de un cambio: cada proceso la consulta como mucho cada
+CATALOG_VERSION_TTL segundos. Las escrituras la incrementan dentro de su
+propia transacción con `bump_catalog_version`.
+"""
+import asyncio
+import bisect
+import gzip
+import hashlib
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.models.models import CatalogVersion, Meditation, MeditationType
+from app.schemas.meditation_schemas import MeditationOut, MeditationTypeOut
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se sirve gzip
+    brotli = None
+
+load_dotenv()
+
+CATALOG_VERSION_TTL = float(os.getenv("CATALOG_VERSION_TTL", "5"))  # segundos
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "3600"))
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE}, stale-while-revalidate=86400"
+
+_meditations_adapter = TypeAdapter(List[MeditationOut])
+_types_adapter = TypeAdapter(List[MeditationTypeOut])
+
+
+class EncodedBody(NamedTuple):
+    etag: str
+    raw: bytes
+    gzip: bytes
+    brotli: Optional[bytes]
+
+
+class CatalogSnapshot(NamedTuple):
+    version: int
+    meditations: List[MeditationOut]
+    types: List[MeditationTypeOut]
+    meditations_body: EncodedBody
+    types_body: EncodedBody
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_checked_at = 0.0
+_lock = asyncio.Lock()
+
+
+def _encode(name: str, version: int, raw: bytes) -> EncodedBody:
+    digest = hashlib.sha1(raw).hexdigest()[:12]
+    return EncodedBody(
+        etag=f'"{name}-{version}-{digest}"',
+        raw=raw,
+        gzip=gzip.compress(raw, compresslevel=6, mtime=0),
+        brotli=brotli.compress(raw, quality=9) if brotli is not None else None,
+    )
+
+
+async def _current_version(db: AsyncSession) -> int:
+    res = await db.execute(select(CatalogVersion.version).where(CatalogVersion.id == 1))
+    return res.scalar_one_or_none() or 0
+
+
+async def _build_snapshot(version: int, db: AsyncSession) -> CatalogSnapshot:
+    res = await db.execute(
+        select(Meditation)
+        .options(selectinload(Meditation.meditation_type))
+        .order_by(Meditation.id)
+    )
+    meditations = _meditations_adapter.validate_python(res.scalars().all(), from_attributes=True)
+    res = await db.execute(select(MeditationType).order_by(MeditationType.id))
+    types = _types_adapter.validate_python(res.scalars().all(), from_attributes=True)
+
+    # Serializar y comprimir fuera del event loop (el catálogo puede ser grande)
+    meditations_body, types_body = await asyncio.gather(
+        asyncio.to_thread(_encode, "meditations", version, _meditations_adapter.dump_json(meditations)),
+        asyncio.to_thread(_encode, "types", version, _types_adapter.dump_json(types)),
+    )
+    return CatalogSnapshot(version, meditations, types, meditations_body, types_body)
+
+
+def cached_snapshot() -> Optional[CatalogSnapshot]:
+    """El snapshot en memoria, si ya se construyó (sin consultar la bd)"""
+    return _snapshot
+
+
+async def get_catalog_snapshot(db: AsyncSession) -> CatalogSnapshot:
+    global _snapshot, _checked_at
+    if _snapshot is not None and time.monotonic() - _checked_at < CATALOG_VERSION_TTL:
+        return _snapshot
+
+    async with _lock:
+        # Otra petición pudo reconstruirlo mientras se esperaba el lock
+        if _snapshot is not None and time.monotonic() - _checked_at < CATALOG_VERSION_TTL:
+            return _snapshot
+        version = await _current_version(db)
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = await _build_snapshot(version, db)
+        _checked_at = time.monotonic()
+        return _snapshot
+
+
+async def bump_catalog_version(db: AsyncSession) -> None:
+    """Marcar el catálogo como modificado (se confirma con el commit de la ruta)"""
+    await db.execute(
+        insert(CatalogVersion)
+        .values(id=1, version=1, updated_at=datetime.utcnow())
+        .on_conflict_do_update(
+            index_elements=[CatalogVersion.id],
+            set_={"version": CatalogVersion.version + 1, "updated_at": datetime.utcnow()},
+        )
+    )
+
+    # Tras el commit, este proceso vuelve a leer la versión en la próxima petición
+    @event.listens_for(db.sync_session, "after_commit", once=True)
+    def _invalidate(session):
+        global _checked_at
+        _checked_at = 0.0
+
+
+# Filtros del catálogo
+
+class CatalogFilters(NamedTuple):
+    tags: Tuple[str, ...] = ()
+    match_all: bool = False  # todos los tags (True) o alguno (False)
+    min_duration: Optional[int] = None
+    max_duration: Optional[int] = None
+    difficulty: Optional[str] = None
+    type_id: Optional[int] = None
+
+    @property
+    def empty(self) -> bool:
+        return not self.tags and self.min_duration is None and self.max_duration is None \
+            and self.difficulty is None and self.type_id is None
+
+
+class CatalogIndex:
+    """Índices invertidos sobre las meditaciones de un snapshot (posiciones en la lista)"""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.version = snapshot.version
+        self.meditations = snapshot.meditations
+        self.by_tag: Dict[str, Set[int]] = {}
+        self.by_difficulty: Dict[str, Set[int]] = {}
+        self.by_type: Dict[int, Set[int]] = {}
+        for i, med in enumerate(self.meditations):
+            for tag in med.meditation_type.tags or []:
+                self.by_tag.setdefault(tag, set()).add(i)
+            self.by_difficulty.setdefault(med.difficulty, set()).add(i)
+            self.by_type.setdefault(med.type_id, set()).add(i)
+        # Duraciones ordenadas para rangos con bisect
+        order = sorted(range(len(self.meditations)), key=lambda i: self.meditations[i].duration)
+        self.duration_order = order
+        self.durations = [self.meditations[i].duration for i in order]
+
+    def _duration_range(self, lo: Optional[int], hi: Optional[int]) -> Set[int]:
+        start = bisect.bisect_left(self.durations, lo) if lo is not None else 0
+        end = bisect.bisect_right(self.durations, hi) if hi is not None else len(self.durations)
+        return set(self.duration_order[start:end])
+
+    def filter(self, filters: CatalogFilters) -> List[MeditationOut]:
+        candidates: List[Set[int]] = []
+        if filters.tags:
+            sets = [self.by_tag.get(tag, set()) for tag in filters.tags]
+            candidates.append(set.intersection(*sets) if filters.match_all else set().union(*sets))
+        if filters.difficulty is not None:
+            candidates.append(self.by_difficulty.get(filters.difficulty, set()))
+        if filters.type_id is not None:
+            candidates.append(self.by_type.get(filters.type_id, set()))
+        if filters.min_duration is not None or filters.max_duration is not None:
+            candidates.append(self._duration_range(filters.min_duration, filters.max_duration))
+
+        if not candidates:
+            return list(self.meditations)
+        # Intersectar empezando por el conjunto más chico
+        candidates.sort(key=len)
+        result = candidates[0].intersection(*candidates[1:])
+        return [self.meditations[i] for i in sorted(result)]
+
+
+_index: Optional[CatalogIndex] = None
+
+
+def catalog_index(snapshot: CatalogSnapshot) -> CatalogIndex:
+    global _index
+    if _index is None or _index.version != snapshot.version:
+        _index = CatalogIndex(snapshot)
+    return _index
+
+
+async def query_meditations(filters: CatalogFilters, db: AsyncSession) -> List[Meditation]:
+    """Filtrar en la bd (índices GIN en tags y btree en duración, dificultad y tipo)"""
+    query = (
+        select(Meditation)
+        .options(selectinload(Meditation.meditation_type))
+        .order_by(Meditation.id)
+    )
+    if filters.tags:
+        tags = list(filters.tags)
+        tag_filter = MeditationType.tags.contains(tags) if filters.match_all else MeditationType.tags.overlap(tags)
+        query = query.join(Meditation.meditation_type).where(tag_filter)
+    if filters.min_duration is not None:
+        query = query.where(Meditation.duration >= filters.min_duration)
+    if filters.max_duration is not None:
+        query = query.where(Meditation.duration <= filters.max_duration)
+    if filters.difficulty is not None:
+        query = query.where(Meditation.difficulty == filters.difficulty)
+    if filters.type_id is not None:
+        query = query.where(Meditation.type_id == filters.type_id)
+
+    res = await db.execute(query)
+    return list(res.scalars().all())
+
+
+async def filter_meditations(filters: CatalogFilters, db: AsyncSession):
+    """Con el snapshot en memoria se filtra con los índices invertidos; si no, en la bd"""
+    if cached_snapshot() is None:
+        return await query_meditations(filters, db)
+    snapshot = await get_catalog_snapshot(db)
+    return catalog_index(snapshot).filter(filters)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def catalog_response(request: Request, body: EncodedBody) -> Response:
+    """Bytes ya serializados, comprimidos según Accept-Encoding, o 304"""
+    headers = {
+        "ETag": body.etag,
+        "Cache-Control": CATALOG_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, body.etag):
+        return Response(status_code=304, headers=headers)
+
+    accept_encoding = request.headers.get("accept-encoding", "").lower()
+    if body.brotli is not None and "br" in accept_encoding:
+        content = body.brotli
+        headers["Content-Encoding"] = "br"
+    elif "gzip" in accept_encoding:
+        content = body.gzip
+        headers["Content-Encoding"] = "gzip"
+    else:
+        content = body.raw
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,295 @@
+"""Creación masiva de notificaciones (anuncios y recordatorios para muchos usuarios).
+
+En lugar de un `add` por notificación, cada envío recorre `users` por
+rangos de id (keyset) y escribe cada rango con un solo
+`INSERT ... SELECT`, filtrando por el segmento de preferencias. Cada rango
+va en su propia transacción corta: la FK de `notifications` toma locks
+KEY SHARE sobre las filas de `users` insertadas, y así se sueltan en cada
+commit en lugar de sostenerse durante todo el envío.
+
+El avance (último user_id procesado y filas insertadas) se guarda en
+`notification_fanouts` en la misma transacción que cada rango, con la fila
+del envío bloqueada: un envío interrumpido se retoma desde donde quedó y
+dos procesos no procesan el mismo rango.
+
+La bandeja de cada usuario muestra solo lo ya entregado (`sent_at`). El
+badge de no leídas sale de `notification_counters`, que el scheduler suma
+al entregar y las rutas restan al marcar como leídas, en la misma
+transacción que el cambio de las notificaciones: nunca hace falta un
+COUNT(*) por consulta.
+"""
+import asyncio
+import base64
+import logging
+import os
+from datetime import datetime
+from typing import Callable, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import false, func, insert, literal, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.models import Notification, NotificationCounter, NotificationFanout, User, UserPreferences
+from app.schemas.notification_schemas import FanoutSegment, NotificationFanoutCreate
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+FANOUT_CHUNK_USERS = int(os.getenv("FANOUT_CHUNK_USERS", "5000"))
+FANOUT_CHUNK_PAUSE = float(os.getenv("FANOUT_CHUNK_PAUSE", "0.05"))  # segundos entre rangos
+ANNOUNCEMENT = "announcement"
+
+NOTIFICATION_COLUMNS = ["user_id", "message", "is_read", "scheduled_time", "kind"]
+
+# Referencias a las tareas en curso (asyncio solo guarda referencias débiles)
+_tasks: Set[asyncio.Task] = set()
+
+
+async def next_user_chunk(
+    after: int, size: int, db: AsyncSession, upper_bound: Optional[int] = None
+) -> Optional[int]:
+    """Último user_id del próximo rango de `size` usuarios después de `after`,
+    sin pasar de `upper_bound` si se da (None: no quedan)"""
+    in_range = [User.id > after]
+    if upper_bound is not None:
+        in_range.append(User.id <= upper_bound)
+    res = await db.execute(
+        select(User.id).where(*in_range).order_by(User.id).offset(size - 1).limit(1)
+    )
+    upper = res.scalar_one_or_none()
+    if upper is None:
+        # Último rango, más chico que `size`
+        res = await db.execute(select(func.max(User.id)).where(*in_range))
+        upper = res.scalar_one_or_none()
+    return upper
+
+
+def segment_users(segment: FanoutSegment, after: int, upper: int):
+    """SELECT de los user_id activos del segmento en el rango (after, upper]"""
+    query = select(User.id).where(User.id > after, User.id <= upper, User.is_active.isnot(False))
+    if segment.preferred_time or segment.preferred_duration or segment.goals:
+        query = query.join(UserPreferences, UserPreferences.user_id == User.id)
+        if segment.preferred_time:
+            query = query.where(UserPreferences.preferred_time == segment.preferred_time)
+        if segment.preferred_duration:
+            query = query.where(UserPreferences.preferred_duration == segment.preferred_duration)
+        if segment.goals:
+            query = query.where(UserPreferences.goals.overlap(segment.goals))
+    return query
+
+
+async def create_fanout(payload: NotificationFanoutCreate, created_by: int, db: AsyncSession) -> NotificationFanout:
+    res = await db.execute(select(func.max(User.id)))
+    fanout = NotificationFanout(
+        message=payload.message,
+        scheduled_time=payload.scheduled_time or datetime.utcnow(),
+        segment=payload.segment.model_dump(),
+        status="running",
+        inserted=0,
+        last_user_id=0,
+        max_user_id=res.scalar_one_or_none() or 0,
+        created_by=created_by,
+    )
+    db.add(fanout)
+    await db.commit()
+    await db.refresh(fanout)
+    return fanout
+
+
+async def process_fanout_chunk(fanout_id: int, db: AsyncSession, chunk_size: int = FANOUT_CHUNK_USERS) -> bool:
+    """Procesar el próximo rango de usuarios de un envío; False cuando ya no quedan"""
+    res = await db.execute(
+        select(NotificationFanout).where(NotificationFanout.id == fanout_id).with_for_update()
+    )
+    fanout = res.scalar_one_or_none()
+    if fanout is None or fanout.status != "running":
+        await db.rollback()
+        return False
+
+    # Solo los usuarios que existían al crear el envío: los que se registran
+    # durante el envío no lo reciben y el progreso (last/max) no pasa de 1
+    upper = await next_user_chunk(fanout.last_user_id, chunk_size, db, upper_bound=fanout.max_user_id)
+    if upper is None:
+        fanout.status = "done"
+        fanout.finished_at = datetime.utcnow()
+        await db.commit()
+        return False
+
+    users = segment_users(FanoutSegment(**fanout.segment), fanout.last_user_id, upper).subquery()
+    res = await db.execute(
+        insert(Notification).from_select(
+            NOTIFICATION_COLUMNS,
+            select(
+                users.c.id,
+                literal(fanout.message),
+                literal(False),
+                literal(fanout.scheduled_time),
+                literal(ANNOUNCEMENT),
+            ),
+        )
+    )
+    fanout.inserted += res.rowcount
+    fanout.last_user_id = upper
+    await db.commit()
+    return True
+
+
+async def run_fanout(fanout_id: int, on_chunk: Optional[Callable[[datetime], None]] = None) -> None:
+    """Procesar un envío completo, rango por rango"""
+    try:
+        async with AsyncSessionLocal() as db:
+            fanout = await db.get(NotificationFanout, fanout_id)
+            if fanout is None:
+                return
+            scheduled_time = fanout.scheduled_time
+        while True:
+            async with AsyncSessionLocal() as db:
+                more = await process_fanout_chunk(fanout_id, db)
+            if on_chunk is not None:
+                on_chunk(scheduled_time)
+            if not more:
+                break
+            await asyncio.sleep(FANOUT_CHUNK_PAUSE)
+    except Exception as e:
+        logger.exception("Notification fan-out %s failed", fanout_id)
+        async with AsyncSessionLocal() as db:
+            fanout = await db.get(NotificationFanout, fanout_id)
+            if fanout is not None:
+                fanout.status = "failed"
+                fanout.error = str(e)
+                fanout.finished_at = datetime.utcnow()
+                await db.commit()
+
+
+def start_fanout(fanout_id: int, on_chunk: Optional[Callable[[datetime], None]] = None) -> None:
+    """Correr el envío en segundo plano dentro de este proceso"""
+    task = asyncio.create_task(run_fanout(fanout_id, on_chunk), name=f"notification-fanout-{fanout_id}")
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def resume_fanouts(on_chunk: Optional[Callable[[datetime], None]] = None) -> List[int]:
+    """Retomar los envíos que quedaron a medias (p. ej. por un reinicio).
+
+    Corre al arrancar en cada worker, así que con varios workers el mismo
+    envío se retoma en todos. Es correcto: process_fanout_chunk toma la fila
+    del envío con FOR UPDATE y lee `last_user_id` ya bloqueada, de modo que
+    cada rango lo inserta un solo worker; los demás esperan el lock y siguen
+    con el rango siguiente (o ven el envío terminado).
+    """
+    async with AsyncSessionLocal() as db:
+        res = await db.execute(select(NotificationFanout.id).where(NotificationFanout.status == "running"))
+        ids = list(res.scalars().all())
+    if ids:
+        logger.info(
+            "Resuming notification fan-outs %s (every worker resumes them; the row lock serializes chunks)", ids
+        )
+    for fanout_id in ids:
+        start_fanout(fanout_id, on_chunk)
+    return ids
+
+
+# Bandeja de entrada
+
+def encode_cursor(scheduled_time: datetime, notification_id: int) -> str:
+    raw = f"{scheduled_time.isoformat()}|{notification_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        scheduled_time, notification_id = raw.split("|")
+        return datetime.fromisoformat(scheduled_time), int(notification_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+async def list_inbox(
+    user_id: int,
+    limit: int,
+    cursor: Optional[Tuple[datetime, int]],
+    unread_only: bool,
+    db: AsyncSession,
+) -> Tuple[List[Notification], Optional[str]]:
+    """Notificaciones entregadas, de la más reciente a la más vieja (keyset sobre (scheduled_time, id))"""
+    query = (
+        select(Notification)
+        .where(Notification.user_id == user_id, Notification.sent_at.isnot(None))
+        .order_by(Notification.scheduled_time.desc(), Notification.id.desc())
+        .limit(limit + 1)
+    )
+    if unread_only:
+        query = query.where(Notification.is_read == false())
+    if cursor is not None:
+        query = query.where(tuple_(Notification.scheduled_time, Notification.id) < tuple_(*cursor))
+
+    res = await db.execute(query)
+    rows = list(res.scalars().all())
+    # Una fila de más dice si hay otra página
+    next_cursor = encode_cursor(rows[limit - 1].scheduled_time, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def _unread_by_user(ids: List[int]):
+    return (
+        select(Notification.user_id, func.count().label("unread"))
+        .where(Notification.id.in_(ids), Notification.is_read == false(), Notification.user_id.isnot(None))
+        .group_by(Notification.user_id)
+        .order_by(Notification.user_id)  # mismo orden de locks en todas las transacciones
+    )
+
+
+async def add_unread(ids: List[int], db: AsyncSession) -> None:
+    """Sumar al contador de cada usuario sus notificaciones no leídas de `ids` (al entregarlas)"""
+    if not ids:
+        return
+    stmt = pg_insert(NotificationCounter).from_select(["user_id", "unread"], _unread_by_user(ids))
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[NotificationCounter.user_id],
+            set_={"unread": NotificationCounter.unread + stmt.excluded.unread},
+        )
+    )
+
+
+async def remove_unread(ids: List[int], db: AsyncSession) -> None:
+    """Restar del contador las no leídas de `ids` (entregas que se deshacen)"""
+    if not ids:
+        return
+    counts = _unread_by_user(ids).subquery()
+    await db.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == counts.c.user_id)
+        .values(unread=func.greatest(NotificationCounter.unread - counts.c.unread, 0))
+    )
+
+
+async def mark_read(user_id: int, ids: Optional[List[int]], all_: bool, db: AsyncSession) -> int:
+    """Marcar como leídas (las indicadas o todas las entregadas); devuelve cuántas cambiaron"""
+    stmt = update(Notification).where(
+        Notification.user_id == user_id,
+        Notification.is_read == false(),
+        Notification.sent_at.isnot(None),
+    )
+    if not all_:
+        stmt = stmt.where(Notification.id.in_(ids or []))
+    res = await db.execute(stmt.values(is_read=True).returning(Notification.id))
+    changed = len(res.all())
+    if changed:
+        await db.execute(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id == user_id)
+            .values(unread=func.greatest(NotificationCounter.unread - changed, 0))
+        )
+    await db.commit()
+    return changed
+
+
+async def unread_count(user_id: int, db: AsyncSession) -> int:
+    res = await db.execute(select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id))
+    return res.scalar_one_or_none() or 0
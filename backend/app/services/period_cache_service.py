@@ -0,0 +1,190 @@
+"""Caché de semanas y meses cerrados.
+
+Una semana o un mes que ya terminó solo cambia si se crea, edita o borra
+una sesión con fecha dentro de él, así que se guarda una vez y se reutiliza.
+Solo el periodo en curso (y el primer periodo parcial de la ventana) se
+calculan en cada petición.
+
+Leer la caché y guardar lo calculado se hace con un advisory lock
+compartido del usuario, e invalidar con el mismo lock exclusivo: una
+invalidación espera a que terminen los cálculos en curso y borra lo que
+guardaron, así que una fila calculada con sesiones viejas no puede quedar
+después de la invalidación.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete, func, or_, and_
+from sqlalchemy.dialects.postgresql import insert
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Type
+
+from pydantic import BaseModel
+
+from app.models.models import StatsPeriodCache
+from app.schemas.stats_schemas import WeeklyStatsOut, MonthlyStatsOut
+from app.services.stats_engine import run_stats
+from app.services.activity_service import load_activity
+from app.services.stats_service import load_session_columns, with_month_streaks
+
+
+class PeriodKind(NamedTuple):
+    name: str                         # valor de period_type
+    stats_kind: str                   # cálculo en stats_engine
+    schema: Type[BaseModel]
+    start_of: Callable[[date], date]  # inicio del periodo que contiene el día
+    next_start: Callable[[date], date]
+    start_of_output: Callable[[BaseModel], date]
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+WEEK = PeriodKind(
+    "week", "weekly", WeeklyStatsOut,
+    _week_start, lambda d: d + timedelta(days=7),
+    lambda out: out.week_start.date(),
+)
+MONTH = PeriodKind(
+    "month", "monthly", MonthlyStatsOut,
+    _month_start, _next_month,
+    lambda out: date(out.year, out.month, 1),
+)
+
+
+# Primera clave de pg_advisory_xact_lock(clave, user_id) para la caché de periodos
+PERIOD_CACHE_LOCK = 3201
+
+
+async def _lock_user_periods(user_id: int, db: AsyncSession, shared: bool) -> None:
+    # Se suelta solo con el commit o rollback de la transacción
+    lock = func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+    await db.execute(select(lock(PERIOD_CACHE_LOCK, user_id)))
+
+
+def _as_datetime(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+async def _compute_range(kind: PeriodKind, user_id: int, start: datetime, end: datetime, db: AsyncSession) -> List[BaseModel]:
+    cols = await load_session_columns(user_id, db, start, end)
+    if len(cols.dates) == 0:
+        return []
+    return await run_stats(kind.stats_kind, cols)
+
+
+async def _closed_periods(
+    kind: PeriodKind, user_id: int, periods: List[date], db: AsyncSession
+) -> List[BaseModel]:
+    """Periodos cerrados: de la caché, calculando y guardando los que falten"""
+    if not periods:
+        return []
+
+    await _lock_user_periods(user_id, db, shared=True)
+    res = await db.execute(
+        select(StatsPeriodCache.period_start, StatsPeriodCache.payload).where(
+            StatsPeriodCache.user_id == user_id,
+            StatsPeriodCache.period_type == kind.name,
+            StatsPeriodCache.period_start >= periods[0],
+            StatsPeriodCache.period_start <= periods[-1],
+        )
+    )
+    cached: Dict[date, dict] = {start: payload for start, payload in res.all()}
+    missing = [p for p in periods if p not in cached]
+
+    if missing:
+        # Una sola consulta para todo el rango que falta
+        computed = await _compute_range(
+            kind, user_id,
+            _as_datetime(missing[0]),
+            _as_datetime(kind.next_start(missing[-1])) - timedelta(microseconds=1),
+            db,
+        )
+        by_start = {kind.start_of_output(out): out for out in computed}
+        rows = [
+            {
+                "user_id": user_id,
+                "period_type": kind.name,
+                "period_start": p,
+                "payload": by_start[p].model_dump(mode="json") if p in by_start else None,
+                "computed_at": datetime.utcnow(),
+            }
+            for p in missing
+        ]
+        await db.execute(insert(StatsPeriodCache).values(rows).on_conflict_do_nothing())
+        for p in missing:
+            cached[p] = by_start.get(p)
+    await db.commit()
+
+    results = []
+    for p in periods:
+        value = cached[p]
+        if value is None:
+            continue
+        results.append(value if isinstance(value, BaseModel) else kind.schema.model_validate(value))
+    return results
+
+
+async def get_period_stats(
+    kind: PeriodKind, user_id: int, start_date: datetime, end_date: datetime, db: AsyncSession
+) -> List[BaseModel]:
+    """Estadísticas por periodo en [start_date, end_date] usando la caché de periodos cerrados"""
+    first = kind.start_of(start_date.date())
+    current = kind.start_of(end_date.date())
+
+    # Periodos completos dentro de la ventana y ya terminados
+    closed = []
+    p = first if _as_datetime(first) >= start_date else kind.next_start(first)
+    while p < current:
+        closed.append(p)
+        p = kind.next_start(p)
+
+    results = await _closed_periods(kind, user_id, closed, db)
+
+    # Periodo inicial parcial (si la ventana empieza a mitad de periodo)
+    if _as_datetime(first) < start_date and first != current:
+        results = await _compute_range(
+            kind, user_id, start_date, _as_datetime(kind.next_start(first)) - timedelta(microseconds=1), db
+        ) + results
+
+    # Periodo en curso, siempre en vivo
+    results += await _compute_range(kind, user_id, max(start_date, _as_datetime(current)), end_date, db)
+    return results
+
+
+async def get_weekly_stats_cached(user_id: int, weeks: int, db: AsyncSession) -> List[WeeklyStatsOut]:
+    end_date = datetime.utcnow()
+    return await get_period_stats(WEEK, user_id, end_date - timedelta(weeks=weeks), end_date, db)
+
+
+async def get_monthly_stats_cached(user_id: int, months: int, db: AsyncSession) -> List[MonthlyStatsOut]:
+    end_date = datetime.utcnow()
+    monthly = await get_period_stats(MONTH, user_id, end_date - timedelta(days=months * 30), end_date, db)
+    # Las rachas salen del bitmap de días activos
+    return with_month_streaks(monthly, await load_activity(user_id, db)) if monthly else monthly
+
+
+async def invalidate_stats_periods(user_id: int, days: Iterable[date], db: AsyncSession) -> None:
+    """Borrar de la caché las semanas y meses que contienen los días modificados"""
+    conditions = []
+    for day in set(days):
+        conditions.append(and_(StatsPeriodCache.period_type == WEEK.name,
+                               StatsPeriodCache.period_start == WEEK.start_of(day)))
+        conditions.append(and_(StatsPeriodCache.period_type == MONTH.name,
+                               StatsPeriodCache.period_start == MONTH.start_of(day)))
+    if not conditions:
+        return
+
+    await _lock_user_periods(user_id, db, shared=False)
+    await db.execute(
+        delete(StatsPeriodCache).where(StatsPeriodCache.user_id == user_id, or_(*conditions))
+    )
+    await db.commit()
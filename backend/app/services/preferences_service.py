@@ -2,12 +2,63 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
 
 
 
 from app.models.models import MeditationSession, Meditation, UserPreferences
 
 
+def duration_bucket(minutes: float) -> str:
+    """Categoría de duración: short (<= 10 min), medium (<= 15) o long"""
+    if minutes <= 10: return "short"
+    if minutes <= 15: return "medium"
+    return "long"
+
+
+def time_slot(hour: int) -> str:
+    """Franja horaria de una hora del día"""
+    if 5 <= hour < 12: return "morning"
+    if 12 <= hour < 18: return "afternoon"
+    return "evening"
+
+
+class PreferencesResult(NamedTuple):
+    preferred_duration: str
+    preferred_time: str
+    goals: List[str]
+
+
+def compute_preferences(
+    sessions: Iterable[Tuple[int, datetime, Optional[List[str]]]]
+) -> Optional[PreferencesResult]:
+    """Preferencias a partir de (duración, fecha, tags) de cada sesión (sin bd)"""
+    sessions = list(sessions)
+    if not sessions:
+        return None
+
+    # Duración promedio
+    total = sum(duration for duration, _, _ in sessions)
+    avg = total / len(sessions)
+    pref_duration = duration_bucket(avg)
+    
+
+    # Franja horaria más frecuente
+    hours = [date.hour for _, date, _ in sessions]
+    slots = [time_slot(h) for h in hours]
+    pref_time = Counter(slots).most_common(1)[0][0]
+
+
+    # Tags más comunes
+    tags = []
+    for _, _, session_tags in sessions:
+        tags += (session_tags or [])
+    top_goals = [t for t, _ in Counter(tags).most_common(3)]
+
+    return PreferencesResult(pref_duration, pref_time, top_goals)
+
+
 async def update_user_preferences(user_id: int, db: AsyncSession):
     # Trae las sessions con su meditación y tags
     stmt = (
@@ -34,32 +85,11 @@ async def update_user_preferences(user_id: int, db: AsyncSession):
         return 
     
 
-    # Duración promedio
-    total = sum(s.duration_completed for s in sessions)
-    avg = total / len(sessions)
-    if avg <= 10:
-        pref_duration = "short"
-    elif avg <= 15:
-        pref_duration = "medium"
-    else:
-        pref_duration = "long"
-    
-
-    # Franja horaria más frecuente
-    hours = [s.date.hour for s in sessions]
-    def slot(h):
-        if 5 <= h < 12: return "morning"
-        if 12 <= h < 18: return "afternoon"
-        return "evening"
-    slots = [slot(h) for h in hours]
-    pref_time = Counter(slots).most_common(1)[0][0]
-
-
-    # Tags más comunes
-    tags = []
-    for s in sessions:
-        tags += (s.meditation.meditation_type.tags or [])
-    top_goals = [t for t, _ in Counter(tags).most_common(3)]
+    # Duración, franja horaria y tags más comunes
+    pref_duration, pref_time, top_goals = compute_preferences(
+        (s.duration_completed, s.date, s.meditation.meditation_type.tags if s.meditation and s.meditation.meditation_type else None)
+        for s in sessions
+    )
 
 
     # Upsert en UserPreferences
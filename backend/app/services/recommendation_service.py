@@ -0,0 +1,248 @@
+"""Recomendaciones de meditaciones por contenido.
+
+Cada meditación del catálogo es una fila de una matriz de features (tags de
+su tipo, categoría de duración y dificultad) que se arma una vez por versión
+del snapshot. El perfil del usuario es un vector en el mismo espacio:
+
+- goals de UserPreferences,
+- duración preferida,
+- promedio de features de lo que ya meditó (historial),
+- promedio de lo que suele meditar en la franja horaria actual.
+
+El puntaje de todo el catálogo es un solo producto matriz-vector. Los
+resultados se guardan por usuario en memoria y se descartan cuando cambia el
+catálogo o la franja horaria, cuando el usuario escribe una sesión en este
+proceso (`invalidate_recommendations`) o tras RECOMMENDATION_CACHE_TTL.
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import extract, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.models import MeditationSession, UserPreferences
+from app.schemas.meditation_schemas import MeditationRecommendation
+from app.services.catalog_service import CatalogSnapshot, get_catalog_snapshot
+from app.services.preferences_service import duration_bucket, time_slot
+
+load_dotenv()
+
+RECOMMENDATION_CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "3600"))  # segundos
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "10000"))  # usuarios
+RECOMMENDATION_MAX_RESULTS = 50
+
+DURATION_BUCKETS = ("short", "medium", "long")
+DEFAULT_DURATION = "short"  # usuarios sin preferencias ni historial
+
+# Peso de cada parte del perfil
+GOAL_WEIGHT = 1.0
+DURATION_WEIGHT = 0.5
+HISTORY_WEIGHT = 0.6
+SLOT_HISTORY_WEIGHT = 0.4
+# Lo meditado hace poco baja para que la lista no se repita
+RECENT_DAYS = 3
+RECENT_PENALTY = 0.5
+
+SLOT_HOURS = {"morning": (5, 12), "afternoon": (12, 18)}  # evening: el resto
+
+
+class CatalogFeatures:
+    """Matriz de features (meditaciones x [tags | duración | dificultad]) de un snapshot"""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.version = snapshot.version
+        self.meditations = snapshot.meditations
+        self.ids = np.array([m.id for m in self.meditations], dtype=np.int64)
+        self.position = {m.id: i for i, m in enumerate(self.meditations)}
+
+        tags = sorted({t for m in self.meditations for t in m.meditation_type.tags or []})
+        difficulties = sorted({m.difficulty for m in self.meditations})
+        self.tag_column = {t: i for i, t in enumerate(tags)}
+        self.duration_column = {b: len(tags) + i for i, b in enumerate(DURATION_BUCKETS)}
+        self.difficulty_column = {d: len(tags) + len(DURATION_BUCKETS) + i for i, d in enumerate(difficulties)}
+
+        matrix = np.zeros((len(self.meditations), len(tags) + len(DURATION_BUCKETS) + len(difficulties)), dtype=np.float32)
+        for i, med in enumerate(self.meditations):
+            med_tags = med.meditation_type.tags or []
+            if med_tags:
+                # Normalizado: un tipo con muchos tags no gana solo por tener más
+                matrix[i, [self.tag_column[t] for t in med_tags]] = 1 / np.sqrt(len(med_tags))
+            matrix[i, self.duration_column[duration_bucket(med.duration)]] = 1
+            matrix[i, self.difficulty_column[med.difficulty]] = 1
+        self.matrix = matrix
+
+
+_features: Optional[CatalogFeatures] = None
+
+
+def catalog_features(snapshot: CatalogSnapshot) -> CatalogFeatures:
+    global _features
+    if _features is None or _features.version != snapshot.version:
+        _features = CatalogFeatures(snapshot)
+    return _features
+
+
+class UserProfile(NamedTuple):
+    goals: List[str]
+    preferred_duration: Optional[str]
+    history: Dict[int, int]       # meditation_id -> sesiones
+    slot_history: Dict[int, int]  # meditation_id -> sesiones en la franja actual
+    recent: List[int]             # meditation_id meditados en los últimos RECENT_DAYS días
+
+
+def _slot_condition(slot: str, hour):
+    if slot in SLOT_HOURS:
+        start, end = SLOT_HOURS[slot]
+        return (hour >= start) & (hour < end)
+    return or_(hour >= SLOT_HOURS["afternoon"][1], hour < SLOT_HOURS["morning"][0])
+
+
+async def load_user_profile(user_id: int, slot: str, now: datetime, db: AsyncSession) -> UserProfile:
+    res = await db.execute(
+        select(UserPreferences.goals, UserPreferences.preferred_duration)
+        .where(UserPreferences.user_id == user_id)
+    )
+    prefs = res.first()
+
+    # Historial agregado por meditación en la bd (una fila por meditación, no por sesión)
+    hour = extract("hour", MeditationSession.date)
+    res = await db.execute(
+        select(
+            MeditationSession.meditation_id,
+            func.count(),
+            func.count().filter(_slot_condition(slot, hour)),
+            func.max(MeditationSession.date),
+        )
+        .where(MeditationSession.user_id == user_id, MeditationSession.meditation_id.isnot(None))
+        .group_by(MeditationSession.meditation_id)
+    )
+    recent_since = now - timedelta(days=RECENT_DAYS)
+    history, slot_history, recent = {}, {}, []
+    for meditation_id, count, slot_count, last in res.all():
+        history[meditation_id] = count
+        if slot_count:
+            slot_history[meditation_id] = slot_count
+        if last is not None and last >= recent_since:
+            recent.append(meditation_id)
+
+    return UserProfile(
+        goals=list(prefs.goals or []) if prefs else [],
+        preferred_duration=prefs.preferred_duration if prefs else None,
+        history=history,
+        slot_history=slot_history,
+        recent=recent,
+    )
+
+
+def _history_vector(features: CatalogFeatures, counts: Dict[int, int]) -> Optional[np.ndarray]:
+    # Promedio de las filas de lo meditado, ponderado por cantidad de sesiones
+    known = [(features.position[m], c) for m, c in counts.items() if m in features.position]
+    if not known:
+        return None
+    rows, weights = map(np.array, zip(*known))
+    return weights.astype(np.float32) @ features.matrix[rows] / weights.sum()
+
+
+def profile_vector(features: CatalogFeatures, profile: UserProfile) -> np.ndarray:
+    vector = np.zeros(features.matrix.shape[1], dtype=np.float32)
+    for goal in profile.goals:
+        if goal in features.tag_column:
+            vector[features.tag_column[goal]] += GOAL_WEIGHT
+
+    duration = profile.preferred_duration
+    if duration not in features.duration_column and not profile.history:
+        duration = DEFAULT_DURATION
+    if duration in features.duration_column:
+        vector[features.duration_column[duration]] += DURATION_WEIGHT
+
+    history = _history_vector(features, profile.history)
+    if history is not None:
+        vector += HISTORY_WEIGHT * history
+    slot_history = _history_vector(features, profile.slot_history)
+    if slot_history is not None:
+        vector += SLOT_HISTORY_WEIGHT * slot_history
+    return vector
+
+
+def recommend(features: CatalogFeatures, profile: UserProfile, limit: int) -> List[MeditationRecommendation]:
+    """Las `limit` meditaciones con mayor puntaje para el perfil (sin bd)"""
+    if not features.meditations or limit <= 0:
+        return []
+    scores = features.matrix @ profile_vector(features, profile)
+    recent = [features.position[m] for m in profile.recent if m in features.position]
+    if recent:
+        scores[recent] -= RECENT_PENALTY
+
+    # Top-k sin ordenar todo el catálogo; empates por id
+    k = min(limit, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.lexsort((features.ids[top], -scores[top]))]
+    return [
+        MeditationRecommendation(
+            **features.meditations[i].model_dump(),
+            score=round(float(scores[i]), 4),
+        )
+        for i in top.tolist()
+    ]
+
+
+# Caché de resultados por usuario
+
+class _CachedRecommendations(NamedTuple):
+    version: int
+    slot: str
+    expires_at: float
+    items: List[MeditationRecommendation]
+
+
+_cache: "OrderedDict[int, _CachedRecommendations]" = OrderedDict()
+# Cuenta invalidaciones: un cálculo que se cruzó con una escritura no se guarda
+_invalidations = 0
+_hits = 0
+_misses = 0
+
+
+def invalidate_recommendations(user_id: int) -> None:
+    """Descartar las recomendaciones en caché del usuario (tras escribir sus sesiones)"""
+    global _invalidations
+    _invalidations += 1
+    _cache.pop(user_id, None)
+
+
+def recommendation_metrics() -> Dict[str, Any]:
+    return {"cached_users": len(_cache), "hits": _hits, "misses": _misses}
+
+
+async def get_recommendations(user_id: int, limit: int, db: AsyncSession) -> List[MeditationRecommendation]:
+    global _hits, _misses
+    limit = min(limit, RECOMMENDATION_MAX_RESULTS)
+    snapshot = await get_catalog_snapshot(db)
+    now = datetime.utcnow()
+    slot = time_slot(now.hour)
+
+    cached = _cache.get(user_id)
+    if cached is not None and cached.version == snapshot.version and cached.slot == slot \
+            and cached.expires_at > time.monotonic():
+        _cache.move_to_end(user_id)
+        _hits += 1
+        return cached.items[:limit]
+
+    _misses += 1
+    invalidations = _invalidations
+    profile = await load_user_profile(user_id, slot, now, db)
+    items = recommend(catalog_features(snapshot), profile, RECOMMENDATION_MAX_RESULTS)
+
+    if invalidations == _invalidations:
+        _cache[user_id] = _CachedRecommendations(
+            snapshot.version, slot, time.monotonic() + RECOMMENDATION_CACHE_TTL, items
+        )
+        _cache.move_to_end(user_id)
+        while len(_cache) > RECOMMENDATION_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return items[:limit]
@@ -0,0 +1,364 @@
+"""Entrega de notificaciones a su hora (recordatorios diarios y las demás).
+
+Un loop de asyncio dentro del proceso mantiene en un heap, ordenadas por
+`scheduled_time`, solo las notificaciones pendientes de los próximos
+REMINDER_WINDOW segundos. Se cargan por ventanas con el índice parcial
+`ix_notifications_pending` (keyset sobre (scheduled_time, id)), así que
+nunca se recorre la tabla completa. Cuando llega la hora de la primera del
+heap se entregan las vencidas en lotes:
+
+1. se reclaman con `UPDATE ... SET sent_at WHERE sent_at IS NULL` (si hay
+   varios procesos, cada notificación la envía uno solo) y en la misma
+   transacción se suman a los contadores de no leídas,
+2. se pasan al `NotificationSender` configurado,
+3. las que el sender no pudo entregar vuelven a quedar pendientes.
+
+Las que vencieron hace más de REMINDER_MAX_LATENESS se marcan como
+entregadas y leídas sin enviarlas.
+Cada REMINDER_RESCAN_INTERVAL se vuelve a leer la ventana desde el
+principio para ver notificaciones creadas por otros procesos.
+
+Además, una vez por día se generan los recordatorios de hoy y mañana según
+`UserPreferences.preferred_time` (INSERT ... SELECT idempotente por rangos
+de usuarios, como los envíos de notification_service).
+"""
+import asyncio
+import heapq
+from abc import ABC, abstractmethod
+import logging
+import os
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import Interval, case, func, literal, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.models import Notification, User, UserPreferences
+from app.services.notification_service import (
+    FANOUT_CHUNK_USERS, NOTIFICATION_COLUMNS, add_unread, next_user_chunk, remove_unread,
+)
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REMINDER_SCHEDULER_ENABLED = os.getenv("REMINDER_SCHEDULER_ENABLED", "true").lower() == "true"
+REMINDER_WINDOW = float(os.getenv("REMINDER_WINDOW", "300"))  # segundos hacia adelante en el heap
+REMINDER_LOAD_LIMIT = int(os.getenv("REMINDER_LOAD_LIMIT", "20000"))  # filas por carga
+REMINDER_BATCH = int(os.getenv("REMINDER_BATCH", "500"))  # notificaciones por envío
+REMINDER_MAX_LATENESS = float(os.getenv("REMINDER_MAX_LATENESS", "21600"))  # segundos
+REMINDER_RESCAN_INTERVAL = float(os.getenv("REMINDER_RESCAN_INTERVAL", "60"))  # segundos
+REMINDER_SENDER = os.getenv("REMINDER_SENDER", "log")
+
+DAILY_REMINDER = "daily_reminder"
+# Hora (UTC) del recordatorio por franja; cada usuario se corre user_id % 60
+# minutos para repartir la carga dentro de la hora
+REMINDER_HOURS = {"morning": 8, "afternoon": 13, "evening": 21}
+REMINDER_MESSAGES = {
+    "morning": "Buenos días 🌅 Unos minutos de meditación para empezar el día",
+    "afternoon": "Una pausa consciente 🧘 ¿Meditamos unos minutos?",
+    "evening": "Antes de dormir 🌙 Un momento para relajarte y meditar",
+}
+
+
+class Reminder(NamedTuple):
+    # El orden de los campos es el orden del heap
+    scheduled_time: datetime
+    id: int
+    user_id: int
+    message: str
+
+
+# Canales de entrega
+
+class NotificationSender(ABC):
+    """Canal de entrega (push, email, ...). `send` devuelve los ids entregados"""
+
+    @abstractmethod
+    async def send(self, reminders: List[Reminder]) -> Set[int]:
+        ...
+
+
+class LogSender(NotificationSender):
+    """Sin canal externo: la notificación queda en la bandeja de la app"""
+
+    async def send(self, reminders: List[Reminder]) -> Set[int]:
+        logger.info("Delivered %d notifications", len(reminders))
+        return {r.id for r in reminders}
+
+
+class InMemorySender(NotificationSender):
+    """Sustituto local que guarda lo enviado (pruebas y desarrollo)"""
+
+    def __init__(self):
+        self.sent: List[Reminder] = []
+
+    async def send(self, reminders: List[Reminder]) -> Set[int]:
+        self.sent.extend(reminders)
+        return {r.id for r in reminders}
+
+
+SENDERS = {"log": LogSender, "memory": InMemorySender}
+
+
+# Generación de recordatorios diarios
+
+async def generate_daily_reminders(day: date, db: AsyncSession, now: Optional[datetime] = None) -> int:
+    """Crear los recordatorios de `day` que todavía no pasaron (idempotente, por rangos de usuarios)"""
+    now = now or datetime.utcnow()
+    slot = UserPreferences.preferred_time
+    hour = case({s: h for s, h in REMINDER_HOURS.items()}, value=slot, else_=REMINDER_HOURS["morning"])
+    message = case({s: m for s, m in REMINDER_MESSAGES.items()}, value=slot, else_=REMINDER_MESSAGES["morning"])
+    scheduled = literal(datetime.combine(day, dt_time())) + func.make_interval(
+        0, 0, 0, 0, hour, UserPreferences.user_id % 60, type_=Interval
+    )
+
+    created = 0
+    after = 0
+    while True:
+        upper = await next_user_chunk(after, FANOUT_CHUNK_USERS, db)
+        if upper is None:
+            return created
+        res = await db.execute(
+            insert(Notification)
+            .from_select(
+                NOTIFICATION_COLUMNS,
+                select(UserPreferences.user_id, message, literal(False), scheduled, literal(DAILY_REMINDER))
+                .join(User, User.id == UserPreferences.user_id)
+                .where(
+                    UserPreferences.user_id > after,
+                    UserPreferences.user_id <= upper,
+                    User.is_active.isnot(False),
+                    scheduled > now,
+                ),
+            )
+            .on_conflict_do_nothing(
+                index_elements=[Notification.user_id, Notification.scheduled_time],
+                index_where=Notification.kind == DAILY_REMINDER,
+            )
+        )
+        await db.commit()
+        created += res.rowcount
+        after = upper
+
+
+# Scheduler
+
+class ReminderScheduler:
+    def __init__(
+        self,
+        sender: Optional[NotificationSender] = None,
+        window: float = REMINDER_WINDOW,
+        load_limit: int = REMINDER_LOAD_LIMIT,
+        batch_size: int = REMINDER_BATCH,
+    ):
+        self.sender = sender or SENDERS[REMINDER_SENDER]()
+        self.window = window
+        self.load_limit = load_limit
+        self.batch_size = batch_size
+        self._heap: List[Reminder] = []
+        self._queued: Set[int] = set()
+        self._cursor: Optional[Tuple[datetime, int]] = None  # última fila cargada
+        self._loaded_until: Optional[datetime] = None  # todo lo pendiente hasta acá está en el heap
+        self._rescan_at = 0.0
+        self._generated_through: Optional[date] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.failed = 0
+        self.expired = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "running": int(self.running),
+            "queued": len(self._heap),
+            "sent": self.sent,
+            "failed": self.failed,
+            "expired": self.expired,
+        }
+
+    def notify_scheduled(self, scheduled_time: datetime) -> None:
+        """Avisar que se crearon notificaciones: si caen en la ventana ya cargada, releerla"""
+        if self._loaded_until is not None and scheduled_time <= self._loaded_until:
+            self._rescan_at = 0.0
+            self._wake.set()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="reminder-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # Acceso a la bd (separado para poder probar el heap sin bd)
+
+    async def _fetch_pending(self, horizon: datetime, after: Optional[Tuple[datetime, int]]) -> List[Reminder]:
+        query = (
+            select(Notification.scheduled_time, Notification.id, Notification.user_id, Notification.message)
+            .where(Notification.sent_at.is_(None), Notification.scheduled_time <= horizon)
+            .order_by(Notification.scheduled_time, Notification.id)
+            .limit(self.load_limit)
+        )
+        if after is not None:
+            query = query.where(tuple_(Notification.scheduled_time, Notification.id) > tuple_(*after))
+        async with AsyncSessionLocal() as db:
+            res = await db.execute(query)
+            return [Reminder(*row) for row in res.all()]
+
+    async def _claim(self, ids: List[int], now: datetime, expired_before: datetime) -> Set[int]:
+        async with AsyncSessionLocal() as db:
+            res = await db.execute(
+                update(Notification)
+                .where(Notification.id.in_(ids), Notification.sent_at.is_(None))
+                .values(
+                    sent_at=now,
+                    # Las vencidas quedan leídas: no suman al badge
+                    is_read=case((Notification.scheduled_time < expired_before, True), else_=Notification.is_read),
+                )
+                .returning(Notification.id)
+            )
+            claimed = set(res.scalars().all())
+            await add_unread(list(claimed), db)
+            await db.commit()
+            return claimed
+
+    async def _release(self, ids: List[int]) -> None:
+        """Deshacer `_claim`: las notificaciones vuelven a quedar pendientes y no leídas"""
+        async with AsyncSessionLocal() as db:
+            # Antes de tocar is_read: solo se restan las que siguen sin leer
+            await remove_unread(ids, db)
+            # Una pendiente siempre es no leída (mark_read solo toca entregadas),
+            # así que se deshace también el is_read que `_claim` pone a las vencidas
+            await db.execute(
+                update(Notification)
+                .where(Notification.id.in_(ids))
+                .values(sent_at=None, is_read=False)
+            )
+            await db.commit()
+
+    async def _generate(self, day: date) -> int:
+        async with AsyncSessionLocal() as db:
+            return await generate_daily_reminders(day, db)
+
+    # Ciclo
+
+    async def _ensure_daily_reminders(self, today: date) -> None:
+        tomorrow = today + timedelta(days=1)
+        if self._generated_through is not None and self._generated_through >= tomorrow:
+            return
+        created = await self._generate(today) + await self._generate(tomorrow)
+        self._generated_through = tomorrow
+        if created:
+            logger.info("Generated %d daily reminders", created)
+            self._rescan_at = 0.0
+
+    async def _load(self, now: datetime) -> None:
+        if time.monotonic() >= self._rescan_at:
+            self._cursor = None
+            self._rescan_at = time.monotonic() + REMINDER_RESCAN_INTERVAL
+
+        horizon = now + timedelta(seconds=self.window)
+        rows = await self._fetch_pending(horizon, self._cursor)
+        for reminder in rows:
+            if reminder.id not in self._queued:
+                self._queued.add(reminder.id)
+                heapq.heappush(self._heap, reminder)
+
+        if len(rows) == self.load_limit:
+            # Ventana más grande que una carga: seguir desde la última fila
+            self._cursor = (rows[-1].scheduled_time, rows[-1].id)
+            self._loaded_until = rows[-1].scheduled_time
+        else:
+            if rows:
+                self._cursor = (rows[-1].scheduled_time, rows[-1].id)
+            self._loaded_until = horizon
+
+    def _needs_load(self, now: datetime) -> bool:
+        return (
+            self._loaded_until is None
+            or time.monotonic() >= self._rescan_at
+            or (self._loaded_until - now).total_seconds() < self.window / 2
+        )
+
+    async def _deliver(self, batch: List[Reminder], now: datetime) -> None:
+        oldest = now - timedelta(seconds=REMINDER_MAX_LATENESS)
+        claimed = await self._claim([r.id for r in batch], now, oldest)
+        expired = [r for r in batch if r.id in claimed and r.scheduled_time < oldest]
+        due = [r for r in batch if r.id in claimed and r.scheduled_time >= oldest]
+        self.expired += len(expired)
+
+        delivered: Set[int] = set()
+        if due:
+            try:
+                delivered = await self.sender.send(due)
+            except Exception:
+                logger.exception("Sender failed for %d notifications", len(due))
+        failed = [r.id for r in due if r.id not in delivered]
+        if failed:
+            # Vuelven a quedar pendientes; se reintentan en el próximo rescan
+            await self._release(failed)
+        self.sent += len(due) - len(failed)
+        self.failed += len(failed)
+
+    async def _dispatch_due(self, now: datetime) -> int:
+        processed = 0
+        while self._heap and self._heap[0].scheduled_time <= now:
+            batch = []
+            while self._heap and self._heap[0].scheduled_time <= now and len(batch) < self.batch_size:
+                batch.append(heapq.heappop(self._heap))
+            try:
+                await self._deliver(batch, now)
+            finally:
+                self._queued.difference_update(r.id for r in batch)
+            processed += len(batch)
+        return processed
+
+    async def run_once(self) -> float:
+        """Un ciclo: genera, carga y entrega lo vencido; devuelve los segundos hasta el próximo"""
+        now = datetime.utcnow()
+        await self._ensure_daily_reminders(now.date())
+        if self._needs_load(now):
+            await self._load(now)
+        await self._dispatch_due(now)
+
+        now = datetime.utcnow()
+        waits = [self._rescan_at - time.monotonic()]
+        if self._heap:
+            waits.append((self._heap[0].scheduled_time - now).total_seconds())
+        if self._loaded_until is not None:
+            waits.append((self._loaded_until - now).total_seconds() - self.window / 2)
+        return max(0.0, min(waits))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                wait = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Reminder scheduler cycle failed")
+                wait = REMINDER_RESCAN_INTERVAL
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+
+reminder_scheduler = ReminderScheduler()
@@ -0,0 +1,89 @@
+"""Búsqueda en el catálogo con pg_trgm.
+
+Los candidatos salen de los índices GIN trigram (`q <% columna`: alguna
+palabra de la columna se parece a la búsqueda) sobre el título de la
+meditación y el nombre y la descripción de su tipo; se ordenan por la mayor
+similitud, con menos peso para el tipo que para el título.
+"""
+import os
+from typing import List
+
+from dotenv import load_dotenv
+from sqlalchemy import func, literal, or_, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+
+from app.models.models import Meditation, MeditationType
+from app.schemas.meditation_schemas import MeditationOut, MeditationSearchResult
+
+load_dotenv()
+
+# Umbral de word_similarity para considerar una coincidencia (pg_trgm usa 0.6 por defecto)
+SEARCH_SIMILARITY_THRESHOLD = float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", "0.4"))
+SEARCH_MAX_RESULTS = 50
+
+TYPE_NAME_WEIGHT = 0.9
+TYPE_DESCRIPTION_WEIGHT = 0.6
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def _set_threshold(db: AsyncSession) -> None:
+    # Solo para la transacción en curso
+    await db.execute(
+        select(func.set_config("pg_trgm.word_similarity_threshold", str(SEARCH_SIMILARITY_THRESHOLD), True))
+    )
+
+
+async def search_meditations(q: str, limit: int, db: AsyncSession) -> List[MeditationSearchResult]:
+    """Meditaciones más parecidas a `q`, de mayor a menor similitud"""
+    await _set_threshold(db)
+    term = literal(q)
+
+    # Cada rama usa el índice trigram de su tabla
+    candidates = union(
+        select(Meditation.id).where(term.op("<%")(Meditation.title)),
+        select(Meditation.id)
+        .join(Meditation.meditation_type)
+        .where(or_(term.op("<%")(MeditationType.name), term.op("<%")(MeditationType.description))),
+    ).subquery()
+
+    score = func.greatest(
+        func.word_similarity(term, Meditation.title),
+        func.word_similarity(term, MeditationType.name) * TYPE_NAME_WEIGHT,
+        func.word_similarity(term, func.coalesce(MeditationType.description, "")) * TYPE_DESCRIPTION_WEIGHT,
+    ).label("score")
+
+    res = await db.execute(
+        select(Meditation, score)
+        .join(Meditation.meditation_type)
+        .options(contains_eager(Meditation.meditation_type))
+        .where(Meditation.id.in_(select(candidates.c.id)))
+        .order_by(score.desc(), Meditation.id)
+        .limit(min(limit, SEARCH_MAX_RESULTS))
+    )
+    return [
+        MeditationSearchResult(
+            **MeditationOut.model_validate(meditation).model_dump(),
+            score=round(float(value), 4),
+        )
+        for meditation, value in res.all()
+    ]
+
+
+async def autocomplete(prefix: str, limit: int, db: AsyncSession) -> List[str]:
+    """Títulos y nombres de tipo que empiezan con `prefix` (ILIKE con índice trigram)"""
+    pattern = _escape_like(prefix) + "%"
+    titles = select(Meditation.title.label("text")).where(Meditation.title.ilike(pattern))
+    names = select(MeditationType.name.label("text")).where(MeditationType.name.ilike(pattern))
+    options = union(titles, names).subquery()
+
+    # Los más cortos primero: son los más cercanos a lo que se escribió
+    res = await db.execute(
+        select(options.c.text)
+        .order_by(func.length(options.c.text), options.c.text)
+        .limit(min(limit, SEARCH_MAX_RESULTS))
+    )
+    return list(res.scalars().all())
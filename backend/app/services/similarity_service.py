@@ -0,0 +1,240 @@
+"""Índice item-item de "quienes hicieron X también hicieron Y".
+
+Las sesiones son feedback implícito: un usuario "eligió" una meditación si
+tiene al menos una sesión con ella. La similitud entre dos meditaciones es
+el coseno sobre esos conjuntos de usuarios, con shrinkage para que pares
+con pocos usuarios en común no queden arriba:
+
+    score = co / sqrt(n_i * n_j) * co / (co + SIMILARITY_SHRINKAGE)
+
+Cada meditación guarda en `meditation_similarities` una sola fila con sus
+SIMILARITY_TOP_K vecinos, así que servir vecinos es leer una fila por PK.
+
+El índice completo lo arma `python -m scripts.build_similarity_index`
+(matriz dispersa usuario x meditación). Entre corridas se actualiza con
+cada sesión nueva (`record_session_similarity`), fuera de la petición: las
+rutas solo encolan el id de la sesión y `similarity_updater` las aplica de
+a una en segundo plano. Los conteos de pares que quedaron fuera del top-K
+no se conocen y se toman como 0, y borrar o editar sesiones no resta nada;
+el próximo rebuild corrige ambas cosas. Si la cola se llena, las sesiones
+que no entran esperan al rebuild.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.models import MeditationSession, MeditationSimilarity
+from app.schemas.meditation_schemas import MeditationRecommendation
+from app.services.catalog_service import get_catalog_snapshot
+from app.services.recommendation_service import catalog_features
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_UPDATES_ENABLED = os.getenv("SIMILARITY_UPDATES_ENABLED", "true").lower() == "true"
+SIMILARITY_QUEUE_SIZE = int(os.getenv("SIMILARITY_QUEUE_SIZE", "10000"))  # sesiones pendientes
+SIMILARITY_TOP_K = int(os.getenv("SIMILARITY_TOP_K", "20"))
+SIMILARITY_SHRINKAGE = float(os.getenv("SIMILARITY_SHRINKAGE", "5"))
+# Meditaciones del historial (las más recientes) que se emparejan con una nueva
+SIMILARITY_HISTORY_LIMIT = int(os.getenv("SIMILARITY_HISTORY_LIMIT", "200"))
+
+
+def similarity_scores(co, n_i, n_j):
+    """Coseno con shrinkage; acepta escalares o arrays de numpy"""
+    co = np.asarray(co, dtype=np.float64)
+    return co / np.sqrt(np.asarray(n_i, dtype=np.float64) * n_j) * co / (co + SIMILARITY_SHRINKAGE)
+
+
+def _set_neighbor(row: MeditationSimilarity, neighbor_id: int, co: int, score: float) -> None:
+    neighbors: Dict[int, Tuple[int, float]] = dict(zip(row.neighbor_ids, zip(row.co_counts, row.scores)))
+    neighbors[neighbor_id] = (co, score)
+    top = sorted(neighbors.items(), key=lambda item: (-item[1][1], item[0]))[:SIMILARITY_TOP_K]
+    # Listas nuevas: SQLAlchemy no detecta cambios dentro de un ARRAY
+    row.neighbor_ids = [n for n, _ in top]
+    row.co_counts = [c for _, (c, _) in top]
+    row.scores = [s for _, (_, s) in top]
+
+
+def _co_count(row: MeditationSimilarity, neighbor_id: int) -> int:
+    try:
+        return row.co_counts[row.neighbor_ids.index(neighbor_id)]
+    except ValueError:
+        return 0
+
+
+async def record_session_similarity(session_id: int, db: AsyncSession) -> None:
+    """Sumar al índice una sesión ya guardada.
+
+    Cada usuario cuenta una vez por meditación y una vez por par: solo suma
+    la primera sesión (menor id) del usuario con esa meditación, emparejada
+    con las meditaciones que el usuario ya tenía antes de ella. Así el
+    resultado no depende del orden ni del momento en que se procesan las
+    sesiones.
+    """
+    res = await db.execute(
+        select(MeditationSession.user_id, MeditationSession.meditation_id)
+        .where(MeditationSession.id == session_id)
+    )
+    sess = res.first()
+    if sess is None or sess.user_id is None or sess.meditation_id is None:
+        return
+    user_id, meditation_id = sess
+
+    res = await db.execute(
+        select(MeditationSession.id)
+        .where(
+            MeditationSession.user_id == user_id,
+            MeditationSession.meditation_id == meditation_id,
+            MeditationSession.id < session_id,
+        )
+        .limit(1)
+    )
+    if res.first() is not None:
+        return
+
+    res = await db.execute(
+        select(MeditationSession.meditation_id)
+        .where(
+            MeditationSession.user_id == user_id,
+            MeditationSession.meditation_id.isnot(None),
+            MeditationSession.meditation_id != meditation_id,
+        )
+        .group_by(MeditationSession.meditation_id)
+        .having(func.min(MeditationSession.id) < session_id)
+        .order_by(func.max(MeditationSession.date).desc())
+        .limit(SIMILARITY_HISTORY_LIMIT)
+    )
+    history = list(res.scalars().all())
+    ids = sorted({meditation_id, *history})
+
+    now = datetime.utcnow()
+    await db.execute(
+        insert(MeditationSimilarity)
+        .values([
+            {"meditation_id": i, "user_count": 0, "neighbor_ids": [], "co_counts": [], "scores": [], "updated_at": now}
+            for i in ids
+        ])
+        .on_conflict_do_nothing(index_elements=[MeditationSimilarity.meditation_id])
+    )
+    # Bloquear en orden de id para no cruzarse con otra actualización
+    res = await db.execute(
+        select(MeditationSimilarity)
+        .where(MeditationSimilarity.meditation_id.in_(ids))
+        .order_by(MeditationSimilarity.meditation_id)
+        .with_for_update()
+    )
+    rows = {row.meditation_id: row for row in res.scalars().all()}
+
+    row = rows[meditation_id]
+    row.user_count += 1
+    row.updated_at = now
+    for other_id in history:
+        other = rows[other_id]
+        co = max(_co_count(row, other_id), _co_count(other, meditation_id)) + 1
+        score = float(similarity_scores(co, row.user_count, max(other.user_count, co)))
+        _set_neighbor(row, other_id, co, score)
+        _set_neighbor(other, meditation_id, co, score)
+        other.updated_at = now
+    await db.commit()
+
+
+class SimilarityUpdater:
+    """Aplica al índice las sesiones nuevas en segundo plano, de a una.
+
+    Las actualizaciones bloquean filas muy leídas de `meditation_similarities`
+    (FOR UPDATE), así que no corren dentro de la petición que creó la sesión
+    y, en este proceso, nunca dos a la vez.
+    """
+
+    def __init__(self, max_queue: int = SIMILARITY_QUEUE_SIZE):
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.applied = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def enqueue(self, session_id: int) -> None:
+        """Encolar una sesión recién guardada (si no hay cola, la cubre el próximo rebuild)"""
+        if not self.running:
+            return
+        try:
+            self._queue.put_nowait(session_id)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="similarity-updates")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            session_id = await self._queue.get()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await record_session_similarity(session_id, db)
+                self.applied += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed += 1
+                logger.exception("Similarity update failed for session %s", session_id)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "running": int(self.running),
+            "queued": self._queue.qsize(),
+            "applied": self.applied,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+similarity_updater = SimilarityUpdater()
+
+
+async def similar_meditations(
+    meditation_id: int, limit: int, db: AsyncSession
+) -> Optional[List[MeditationRecommendation]]:
+    """Vecinos precalculados de una meditación, de mayor a menor score (None si no existe)"""
+    features = catalog_features(await get_catalog_snapshot(db))
+    if meditation_id not in features.position:
+        return None
+    row = await db.get(MeditationSimilarity, meditation_id)
+    if row is None:
+        return []
+
+    results = []
+    # Los vecinos borrados del catálogo se saltan
+    for neighbor_id, score in zip(row.neighbor_ids, row.scores):
+        position = features.position.get(neighbor_id)
+        if position is not None:
+            results.append(MeditationRecommendation(
+                **features.meditations[position].model_dump(), score=round(score, 4)
+            ))
+            if len(results) == limit:
+                break
+    return results
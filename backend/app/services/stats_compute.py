@@ -0,0 +1,477 @@
+"""Cálculos puros (sin base de datos) de estadísticas con pandas.
+
+Todo lo de este módulo recibe las sesiones como columnas compactas
+(`SessionColumns`) para poder ejecutarse en el pool de procesos sin
+bloquear el event loop.
+"""
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.schemas.stats_schemas import (
+    StatsAnalysisOut, WeeklyStatsOut,
+    MonthlyStatsOut, ProgressStatsOut, ChartOut, ChartDataPoint,
+)
+
+
+UNKNOWN_TYPE = "Unknown"
+
+
+class SessionColumns(NamedTuple):
+    """Sesiones de un usuario en columnas, ordenadas por fecha"""
+    dates: np.ndarray       # datetime64[us]
+    durations: np.ndarray   # int16/int32 (minutos)
+    type_codes: np.ndarray  # int16, índice en type_names
+    type_names: Tuple[str, ...]
+
+
+def _duration_dtype(durations: np.ndarray):
+    # El entero más pequeño que cabe (minutos por sesión)
+    if len(durations) == 0 or (durations.min() >= np.iinfo(np.int16).min and durations.max() <= np.iinfo(np.int16).max):
+        return np.int16
+    return np.int32
+
+
+def session_columns(rows: Sequence[Tuple[datetime, int, Optional[str]]]) -> SessionColumns:
+    """Construir columnas tipadas a partir de tuplas (fecha, duración, tipo)"""
+    if not rows:
+        return SessionColumns(
+            dates=np.array([], dtype="datetime64[us]"),
+            durations=np.array([], dtype=np.int16),
+            type_codes=np.array([], dtype=np.int16),
+            type_names=(),
+        )
+
+    dates, durations, names = zip(*rows)
+    durations = np.fromiter(durations, dtype=np.int64, count=len(durations))
+    codes, uniques = pd.factorize(
+        pd.Series(names, dtype=object).fillna(UNKNOWN_TYPE), sort=False
+    )
+
+    return SessionColumns(
+        dates=np.array(dates, dtype="datetime64[us]"),
+        durations=durations.astype(_duration_dtype(durations)),
+        type_codes=codes.astype(np.int16),
+        type_names=tuple(str(name) for name in uniques),
+    )
+
+
+def columns_in_window(cols: SessionColumns, start_date: datetime, end_date: datetime) -> SessionColumns:
+    """Filtrar columnas ya ordenadas por fecha a [start_date, end_date]"""
+    lo = np.searchsorted(cols.dates, np.datetime64(start_date, "us"), side="left")
+    hi = np.searchsorted(cols.dates, np.datetime64(end_date, "us"), side="right")
+    return SessionColumns(
+        dates=cols.dates[lo:hi],
+        durations=cols.durations[lo:hi],
+        type_codes=cols.type_codes[lo:hi],
+        type_names=cols.type_names,
+    )
+
+
+def top_key(totals: pd.Series):
+    """Clave con el mayor total; los empates se resuelven por la clave más chica.
+
+    Es la regla de desempate de los dos motores (ver `stats_fast`), en lugar
+    de la de idxmax/value_counts, que depende del orden interno de pandas.
+    """
+    best = totals[totals == totals.max()]
+    return min(best.index)
+
+
+def columns_to_frame(cols: SessionColumns) -> pd.DataFrame:
+    """DataFrame base con columnas date, duration y meditation_type (categórica)"""
+    types = pd.Categorical.from_codes(cols.type_codes, categories=list(cols.type_names))
+    return pd.DataFrame({
+        'date': pd.to_datetime(cols.dates),
+        'duration': cols.durations,
+        # Tras filtrar por ventana pueden quedar categorías sin filas
+        'meditation_type': types.remove_unused_categories(),
+    })
+
+
+def compute_user_analytics(cols: SessionColumns, user_id: int, now: datetime) -> StatsAnalysisOut:
+    """Análisis detallado del usuario con pandas"""
+
+    if len(cols.dates) == 0:
+        # Retornar análisis vacío
+        return StatsAnalysisOut(
+            user_id=user_id,
+            analysis_date=datetime.utcnow(),
+            daily_average=0,
+            weekly_average=0,
+            monthly_average=0,
+            most_active_day="N/A",
+            most_active_hour=0,
+            preferred_duration="N/A",
+            meditation_type_distribution={},
+            most_used_type="N/A",
+            last_7_days_minutes=0,
+            last_30_days_minutes=0,
+            growth_rate_7d=0.0,
+            growth_rate_30d=0.0,
+            consistency_score=0.0,
+            active_days_last_month=0,
+            longest_gap_days=0
+        )
+
+    df = columns_to_frame(cols)
+    df['day_of_week'] = df['date'].dt.day_name()
+    df['hour'] = df['date'].dt.hour
+
+    # Análisis temporal básico
+    total_days = (df['date'].max() - df['date'].min()).days + 1
+    daily_average = df['duration'].sum() / total_days if total_days > 0 else 0
+    weekly_average = daily_average * 7
+    monthly_average = daily_average * 30
+
+    # Patrones de comportamiento
+    day_analysis = df.groupby('day_of_week')['duration'].sum()
+    most_active_day = top_key(day_analysis) if not day_analysis.empty else "N/A"
+
+    hour_analysis = df.groupby('hour')['duration'].sum()
+    most_active_hour = top_key(hour_analysis) if not hour_analysis.empty else 0
+
+    # Duración preferida
+    duration_bins = pd.cut(df['duration'], bins=[0, 10, 20, 30, float('inf')],
+                           labels=['short', 'medium', 'long', 'extended'])
+    preferred_duration = top_key(duration_bins.value_counts()) if not duration_bins.isna().all() else "N/A"
+
+    # Análisis de tipos de meditación
+    type_counts = df['meditation_type'].value_counts()
+    type_distribution = {str(k): int(v) for k, v in type_counts.items() if v > 0}
+    most_used_type = top_key(type_counts) if not df.empty else "N/A"
+
+    # Tendencias temporales
+    last_7_days = df[df['date'] >= (now - timedelta(days=7))]
+    last_30_days = df[df['date'] >= (now - timedelta(days=30))]
+
+    last_7_days_minutes = last_7_days['duration'].sum()
+    last_30_days_minutes = last_30_days['duration'].sum()
+
+    # Calcular tasas de crecimiento (comparar con periodos anteriores)
+    prev_7_days = df[(df['date'] >= (now - timedelta(days=14))) &
+                     (df['date'] < (now - timedelta(days=7)))]
+    prev_30_days = df[(df['date'] >= (now - timedelta(days=60))) &
+                      (df['date'] < (now - timedelta(days=30)))]
+
+    prev_7_minutes = prev_7_days['duration'].sum()
+    prev_30_minutes = prev_30_days['duration'].sum()
+
+    growth_rate_7d = ((last_7_days_minutes - prev_7_minutes) / prev_7_minutes * 100) if prev_7_minutes > 0 else 0
+    growth_rate_30d = ((last_30_days_minutes - prev_30_minutes) / prev_30_minutes * 100) if prev_30_minutes > 0 else 0
+
+    return StatsAnalysisOut(
+        user_id=user_id,
+        analysis_date=datetime.utcnow(),
+        daily_average=round(float(daily_average), 2),
+        weekly_average=round(float(weekly_average), 2),
+        monthly_average=round(float(monthly_average), 2),
+        most_active_day=most_active_day,
+        most_active_hour=int(most_active_hour),
+        preferred_duration=str(preferred_duration),
+        meditation_type_distribution=type_distribution,
+        most_used_type=str(most_used_type),
+        last_7_days_minutes=int(last_7_days_minutes),
+        last_30_days_minutes=int(last_30_days_minutes),
+        growth_rate_7d=round(float(growth_rate_7d), 2),
+        growth_rate_30d=round(float(growth_rate_30d), 2),
+        # Los rellena with_activity desde el bitmap de días activos
+        consistency_score=0.0,
+        active_days_last_month=0,
+        longest_gap_days=0
+    )
+
+
+def compute_weekly_stats(cols: SessionColumns) -> List[WeeklyStatsOut]:
+    """Agrupar sesiones por semana usando pandas"""
+    if len(cols.dates) == 0:
+        return []
+
+    df = columns_to_frame(cols)
+    df['week'] = df['date'].dt.to_period('W')
+
+    # Agrupar por semana
+    weekly_groups = df.groupby('week')
+
+    weekly_stats = []
+    for week, group in weekly_groups:
+        week_start = week.start_time.to_pydatetime()
+        week_end = week.end_time.to_pydatetime()
+
+        total_minutes = group['duration'].sum()
+        total_sessions = len(group)
+        average_duration = group['duration'].mean()
+        days_practiced = group['date'].dt.date.nunique()
+
+        # Tipo más usado
+        type_counts = group['meditation_type'].value_counts()
+        most_used_type = str(top_key(type_counts)) if not type_counts.empty else None
+
+        weekly_stats.append(WeeklyStatsOut(
+            week_start=week_start,
+            week_end=week_end,
+            total_minutes=int(total_minutes),
+            total_sessions=total_sessions,
+            average_duration=float(average_duration),
+            days_practiced=days_practiced,
+            most_used_type=most_used_type
+        ))
+
+    return weekly_stats
+
+
+def compute_monthly_stats(cols: SessionColumns) -> List[MonthlyStatsOut]:
+    """Agrupar sesiones por mes usando pandas"""
+    if len(cols.dates) == 0:
+        return []
+
+    df = columns_to_frame(cols)
+    df['month'] = df['date'].dt.to_period('M')
+
+    # Agrupar por mes
+    monthly_groups = df.groupby('month')
+
+    monthly_stats = []
+    for month, group in monthly_groups:
+        month_start = month.start_time.to_pydatetime()
+
+        total_minutes = group['duration'].sum()
+        total_sessions = len(group)
+        average_duration = group['duration'].mean()
+        days_practiced = group['date'].dt.date.nunique()
+
+        # Tipo más usado
+        type_counts = group['meditation_type'].value_counts()
+        most_used_type = str(top_key(type_counts)) if not type_counts.empty else None
+
+        monthly_stats.append(MonthlyStatsOut(
+            month=month_start.month,
+            year=month_start.year,
+            month_name=month_start.strftime('%B'),
+            total_minutes=int(total_minutes),
+            total_sessions=total_sessions,
+            average_duration=float(average_duration),
+            days_practiced=days_practiced,
+            most_used_type=most_used_type,
+            # La racha la rellena with_month_streaks desde el bitmap
+            streak_days=0
+        ))
+
+    return monthly_stats
+
+
+def compute_user_progress(cols: SessionColumns, days: int) -> ProgressStatsOut:
+    """Analizar progreso del usuario"""
+    if len(cols.dates) == 0:
+        return ProgressStatsOut(
+            period_days=days,
+            total_minutes=0,
+            total_sessions=0,
+            average_daily_minutes=0.0,
+            consistency_percentage=0.0,
+            improvement_trend="stable",
+            best_day=None,
+            best_day_minutes=0,
+            meditation_types_used=[],
+            favorite_time_slot="N/A"
+        )
+
+    df = columns_to_frame(cols)
+    df['hour'] = df['date'].dt.hour
+
+    # Estadísticas básicas
+    total_minutes = df['duration'].sum()
+    total_sessions = len(df)
+    average_daily_minutes = total_minutes / days
+
+    # Consistencia
+    unique_days = df['date'].dt.date.nunique()
+    consistency_percentage = (unique_days / days) * 100
+
+    # Mejor día
+    daily_totals = df.groupby(df['date'].dt.date)['duration'].sum()
+    best_day = top_key(daily_totals) if not daily_totals.empty else None
+    best_day_minutes = daily_totals.max() if not daily_totals.empty else None
+
+    # Tipos de meditación usados
+    meditation_types_used = [str(t) for t in df['meditation_type'].unique()]
+
+    # Franja horaria favorita
+    hour_bins = pd.cut(df['hour'], bins=[0, 5, 11, 17, 24],
+                       labels=['Evening', 'Morning', 'Afternoon', 'Evening'],
+                       ordered=False)
+    favorite_time_slot = top_key(hour_bins.value_counts()) if not hour_bins.isna().all() else "N/A"
+
+    # Tendencia de mejora (comparar primera y segunda mitad)
+    mid_point = len(df) // 2
+    if mid_point > 0:
+        first_half = df.iloc[:mid_point]['duration'].mean()
+        second_half = df.iloc[mid_point:]['duration'].mean()
+
+        if second_half > first_half * 1.1:
+            improvement_trend = "improving"
+        elif second_half < first_half * 0.9:
+            improvement_trend = "declining"
+        else:
+            improvement_trend = "stable"
+
+    else:
+        improvement_trend = "stable"
+
+    return ProgressStatsOut(
+        period_days=days,
+        total_minutes=int(total_minutes),
+        total_sessions=total_sessions,
+        average_daily_minutes=round(float(average_daily_minutes), 2),
+        consistency_percentage=round(consistency_percentage, 2),
+        improvement_trend=improvement_trend,
+        best_day=datetime.combine(best_day, datetime.min.time()) if best_day else None,
+        best_day_minutes=int(best_day_minutes),
+        meditation_types_used=meditation_types_used,
+        favorite_time_slot=str(favorite_time_slot)
+    )
+
+
+def _empty_chart() -> ChartOut:
+    return ChartOut(
+        chart_type="empty",
+        title="Sin datos disponibles",
+        data=[],
+        labels=None,
+        colors=None,
+        metadata={"message": "No hay datos para generar gráficos"}
+    )
+
+
+def build_chart(df: pd.DataFrame, chart_type: str) -> ChartOut:
+    """Construir un gráfico a partir del DataFrame ya cargado (no lo modifica)"""
+
+    if chart_type == "progress":
+        # Gráfico de progreso temporal
+        daily_totals = df.groupby(df['date'].dt.date)['duration'].sum().reset_index()
+
+        data_points = [
+            ChartDataPoint(
+                x=row['date'].isoformat(),
+                y=float(row['duration']),
+                label=f"{int(row['duration'])} min"
+            )
+            for _, row in daily_totals.iterrows()
+        ]
+
+        return ChartOut(
+            chart_type="line",
+            title="Progreso de Meditación Diaria",
+            data=data_points,
+            labels=["Fecha", "Minutos"],
+            colors=["#4F46E5"],
+            metadata={
+                "total_days": int(len(daily_totals)),
+                "avg_minutes": float(daily_totals['duration'].mean())
+            }
+        )
+
+    elif chart_type == "types":
+        # Gráfico de distribución por tipos
+        type_totals = df.groupby('meditation_type', observed=True)['duration'].sum()
+
+        # Colores predefinidos para tipos
+        colors = ["#4F46E5", "#059669", "#DC2626", "#D97706", "#7C3AED"]
+
+        data_points = [
+            ChartDataPoint(
+                x=str(type_name),
+                y=float(minutes),
+                label=f"{type_name}: {int(minutes)} min"
+            )
+            for type_name, minutes in type_totals.items()
+        ]
+
+        return ChartOut(
+            chart_type="pie",
+            title="Distribución por Tipo de Meditación",
+            data=data_points,
+            labels=[str(label) for label in type_totals.index],
+            colors=colors[:len(type_totals)],
+            metadata={
+                "total_types": int(len(type_totals)),
+                "most_used": str(top_key(type_totals)),
+                "total_minutes": float(type_totals.sum())
+            }
+        )
+
+    elif chart_type == "weekly":
+        # Gráfico semanal (sin agregar columnas al DataFrame compartido)
+        weeks = df['date'].dt.to_period('W').rename('week')
+        weekly_totals = df.groupby(weeks)['duration'].sum().reset_index()
+        weekly_totals['week_str'] = weekly_totals['week'].astype(str)
+
+        data_points = [
+            ChartDataPoint(
+                x=str(row['week_str']),
+                y=float(row['duration']),
+                label=f"Semana {row['week_str']}: {int(row['duration'])} min"
+            )
+            for _, row in weekly_totals.iterrows()
+        ]
+
+        return ChartOut(
+            chart_type="bar",
+            title="Minutos por Semana",
+            data=data_points,
+            labels=["Semana", "Minutos"],
+            colors=["#059669"],
+            metadata={
+                "total_weeks": int(len(weekly_totals)),
+                "avg_weekly": float(weekly_totals['duration'].mean()),
+                "best_week": str(weekly_totals.loc[weekly_totals['duration'].idxmax(), 'week_str'])
+            }
+        )
+
+    elif chart_type == "monthly":
+        # Gráfico mensual (sin agregar columnas al DataFrame compartido)
+        months = df['date'].dt.to_period('M').rename('month')
+        monthly_totals = df.groupby(months)['duration'].sum().reset_index()
+        monthly_totals['month_str'] = monthly_totals['month'].dt.strftime('%Y-%m')
+
+        data_points = [
+            ChartDataPoint(
+                x=str(row['month_str']),
+                y=float(row['duration']),
+                label=f"{row['month_str']}: {int(row['duration'])} min"
+            )
+            for _, row in monthly_totals.iterrows()
+        ]
+
+        return ChartOut(
+            chart_type="bar",
+            title="Minutos por Mes",
+            data=data_points,
+            labels=["Mes", "Minutos"],
+            colors=["#DC2626"],
+            metadata={
+                "total_months": int(len(monthly_totals)),
+                "avg_monthly": float(monthly_totals['duration'].mean()),
+                "growth_trend": "improving" if float(monthly_totals['duration'].iloc[-1]) > float(monthly_totals['duration'].iloc[0]) else "stable"
+            }
+        )
+
+    else:
+        return ChartOut(
+            chart_type="error",
+            title="Tipo de gráfico no válido",
+            data=[],
+            labels=None,
+            colors=None,
+            metadata={"error": f"Tipo '{chart_type}' no soportado"}
+        )
+
+
+def compute_stats_charts(cols: SessionColumns, chart_types: List[str]) -> Dict[str, ChartOut]:
+    """Varios gráficos a partir de un solo DataFrame"""
+    if len(cols.dates) == 0:
+        return {chart_type: _empty_chart() for chart_type in chart_types}
+
+    df = columns_to_frame(cols)
+    return {chart_type: build_chart(df, chart_type) for chart_type in chart_types}
@@ -0,0 +1,87 @@
+"""Selección del motor de estadísticas según el tamaño del historial.
+
+Por debajo de STATS_PANDAS_MIN_ROWS sesiones se usa el motor en Python puro
+(`stats_fast`) directamente en el event loop; a partir de ahí, el motor
+vectorizado de pandas (`stats_compute`) en el pool de procesos.
+"""
+import os
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Callable
+
+from dotenv import load_dotenv
+
+from app.core.process_pool import run_in_stats_pool
+from app.schemas.stats_schemas import DashboardOut
+from app.services.stats_compute import (
+    SessionColumns, columns_in_window, compute_user_analytics,
+    compute_weekly_stats, compute_monthly_stats, compute_user_progress,
+)
+from app.services.stats_fast import (
+    fast_user_analytics, fast_weekly_stats, fast_monthly_stats, fast_user_progress,
+)
+
+load_dotenv()
+
+STATS_PANDAS_MIN_ROWS = int(os.getenv("STATS_PANDAS_MIN_ROWS", "50"))
+
+
+class StatsEngine(NamedTuple):
+    name: str
+    analytics: Callable[..., Any]
+    weekly: Callable[..., Any]
+    monthly: Callable[..., Any]
+    progress: Callable[..., Any]
+
+
+PANDAS_ENGINE = StatsEngine(
+    "pandas", compute_user_analytics, compute_weekly_stats, compute_monthly_stats, compute_user_progress
+)
+PYTHON_ENGINE = StatsEngine(
+    "python", fast_user_analytics, fast_weekly_stats, fast_monthly_stats, fast_user_progress
+)
+
+
+def select_engine(rows: int) -> StatsEngine:
+    return PYTHON_ENGINE if rows < STATS_PANDAS_MIN_ROWS else PANDAS_ENGINE
+
+
+async def run_stats(kind: str, cols: SessionColumns, *args: Any) -> Any:
+    """Ejecutar un cálculo (analytics, weekly, monthly, progress) con el motor adecuado"""
+    engine = select_engine(len(cols.dates))
+    func = getattr(engine, kind)
+    if engine is PYTHON_ENGINE:
+        # Historial pequeño: más barato que enviarlo a otro proceso
+        return func(cols, *args)
+    return await run_in_stats_pool(func, cols, *args)
+
+
+def compute_dashboard(
+    dashboard: DashboardOut,
+    cols: SessionColumns,
+    sections: List[str],
+    windows: Dict[str, datetime],
+    days: int,
+    now: datetime,
+) -> DashboardOut:
+    """Completar las secciones del dashboard que dependen de las sesiones"""
+    end_date = dashboard.generated_at
+
+    def run(kind: str, section_cols: SessionColumns, *args: Any) -> Any:
+        return getattr(select_engine(len(section_cols.dates)), kind)(section_cols, *args)
+
+    if "analysis" in sections:
+        dashboard.analysis = run("analytics", cols, dashboard.user_id, now)
+    if "weekly" in sections:
+        dashboard.weekly = run("weekly", columns_in_window(cols, windows["weekly"], end_date))
+    if "monthly" in sections:
+        dashboard.monthly = run("monthly", columns_in_window(cols, windows["monthly"], end_date))
+    if "progress" in sections:
+        dashboard.progress = run("progress", columns_in_window(cols, windows["progress"], end_date), days)
+
+    return dashboard
+
+
+async def run_dashboard(dashboard: DashboardOut, cols: SessionColumns, *args: Any) -> DashboardOut:
+    if select_engine(len(cols.dates)) is PYTHON_ENGINE:
+        return compute_dashboard(dashboard, cols, *args)
+    return await run_in_stats_pool(compute_dashboard, dashboard, cols, *args)
@@ -0,0 +1,241 @@
+"""Motor de estadísticas en Python puro para historiales pequeños.
+
+Con pocas sesiones el costo fijo de pandas (DataFrame, groupby, cut,
+to_period) domina. Estas funciones devuelven exactamente lo mismo que sus
+equivalentes de `stats_compute` y reciben los mismos argumentos. En los
+empates ("el día/la hora/el tipo más usado") los dos motores aplican la
+misma regla: mayor total y, entre iguales, la clave más chica (`top_key`).
+`benchmarks.check_engine_parity` y `tests/test_engine_parity.py` lo
+verifican.
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.schemas.stats_schemas import (
+    StatsAnalysisOut, WeeklyStatsOut, MonthlyStatsOut, ProgressStatsOut,
+)
+from app.services.stats_compute import SessionColumns, compute_user_analytics, compute_user_progress
+
+
+def _rows(cols: SessionColumns) -> Tuple[List[datetime], List[int], List[int]]:
+    return cols.dates.tolist(), cols.durations.tolist(), cols.type_codes.tolist()
+
+
+def _top_key(totals: Dict) -> object:
+    # Misma regla que stats_compute.top_key: mayor total, empates por la clave más chica
+    return min(totals, key=lambda key: (-totals[key], key))
+
+
+def _most_used_type(cols: SessionColumns, codes: Sequence[int]) -> str:
+    # Se desempata por nombre, no por código (el orden de aparición)
+    counts = Counter(codes)
+    return _top_key({cols.type_names[c]: n for c, n in counts.items()})
+
+
+def _duration_bin(duration: int) -> Optional[str]:
+    # pd.cut(bins=[0, 10, 20, 30, inf]) con intervalos cerrados a la derecha
+    if duration <= 0:
+        return None
+    if duration <= 10:
+        return 'short'
+    if duration <= 20:
+        return 'medium'
+    if duration <= 30:
+        return 'long'
+    return 'extended'
+
+
+def _time_slot(hour: int) -> Optional[str]:
+    # pd.cut(bins=[0, 5, 11, 17, 24]); la hora 0 queda fuera
+    if hour <= 0:
+        return None
+    if hour <= 5:
+        return 'Evening'
+    if hour <= 11:
+        return 'Morning'
+    if hour <= 17:
+        return 'Afternoon'
+    return 'Evening'
+
+
+def fast_user_analytics(cols: SessionColumns, user_id: int, now: datetime) -> StatsAnalysisOut:
+    """Análisis detallado sin pandas"""
+    if len(cols.dates) == 0:
+        return compute_user_analytics(cols, user_id, now)
+
+    dates, durations, codes = _rows(cols)
+    total = sum(durations)
+
+    # Análisis temporal básico
+    total_days = (dates[-1] - dates[0]).days + 1
+    daily_average = total / total_days if total_days > 0 else 0
+    weekly_average = daily_average * 7
+    monthly_average = daily_average * 30
+
+    # Patrones de comportamiento
+    by_day: Dict[str, int] = defaultdict(int)
+    by_hour: Dict[int, int] = defaultdict(int)
+    bins: Dict[str, int] = defaultdict(int)
+    for d, minutes in zip(dates, durations):
+        by_day[d.strftime('%A')] += minutes
+        by_hour[d.hour] += minutes
+        label = _duration_bin(minutes)
+        if label:
+            bins[label] += 1
+
+    most_active_day = _top_key(by_day)
+    most_active_hour = _top_key(by_hour)
+    preferred_duration = _top_key(bins) if bins else "N/A"
+
+    # Análisis de tipos de meditación
+    code_counts = Counter(codes)
+    type_distribution = {cols.type_names[c]: n for c, n in code_counts.items()}
+    most_used_type = _most_used_type(cols, codes)
+
+    # Tendencias temporales
+    def minutes_between(start, end=None):
+        return sum(m for d, m in zip(dates, durations) if d >= start and (end is None or d < end))
+
+    last_7_days_minutes = minutes_between(now - timedelta(days=7))
+    last_30_days_minutes = minutes_between(now - timedelta(days=30))
+    prev_7_minutes = minutes_between(now - timedelta(days=14), now - timedelta(days=7))
+    prev_30_minutes = minutes_between(now - timedelta(days=60), now - timedelta(days=30))
+
+    growth_rate_7d = ((last_7_days_minutes - prev_7_minutes) / prev_7_minutes * 100) if prev_7_minutes > 0 else 0
+    growth_rate_30d = ((last_30_days_minutes - prev_30_minutes) / prev_30_minutes * 100) if prev_30_minutes > 0 else 0
+
+    return StatsAnalysisOut(
+        user_id=user_id,
+        analysis_date=datetime.utcnow(),
+        daily_average=round(daily_average, 2),
+        weekly_average=round(weekly_average, 2),
+        monthly_average=round(monthly_average, 2),
+        most_active_day=most_active_day,
+        most_active_hour=int(most_active_hour),
+        preferred_duration=str(preferred_duration),
+        meditation_type_distribution=type_distribution,
+        most_used_type=most_used_type,
+        last_7_days_minutes=last_7_days_minutes,
+        last_30_days_minutes=last_30_days_minutes,
+        growth_rate_7d=round(growth_rate_7d, 2),
+        growth_rate_30d=round(growth_rate_30d, 2),
+        # Los rellena with_activity desde el bitmap de días activos
+        consistency_score=0.0,
+        active_days_last_month=0,
+        longest_gap_days=0
+    )
+
+
+def _group_rows(cols: SessionColumns, period_start) -> Dict[datetime, List[Tuple[datetime, int, int]]]:
+    groups: Dict[datetime, List[Tuple[datetime, int, int]]] = defaultdict(list)
+    for row in zip(*_rows(cols)):
+        groups[period_start(row[0])].append(row)
+    return groups
+
+
+def _week_start(d: datetime) -> datetime:
+    # Periodo 'W' de pandas: lunes a domingo
+    return datetime.combine(d.date() - timedelta(days=d.weekday()), datetime.min.time())
+
+
+def _month_start(d: datetime) -> datetime:
+    return datetime(d.year, d.month, 1)
+
+
+def fast_weekly_stats(cols: SessionColumns) -> List[WeeklyStatsOut]:
+    """Agrupar sesiones por semana sin pandas"""
+    weekly_stats = []
+    for week_start, rows in sorted(_group_rows(cols, _week_start).items()):
+        durations = [r[1] for r in rows]
+        weekly_stats.append(WeeklyStatsOut(
+            week_start=week_start,
+            week_end=week_start + timedelta(days=7) - timedelta(microseconds=1),
+            total_minutes=sum(durations),
+            total_sessions=len(rows),
+            average_duration=sum(durations) / len(rows),
+            days_practiced=len({r[0].date() for r in rows}),
+            most_used_type=_most_used_type(cols, [r[2] for r in rows])
+        ))
+    return weekly_stats
+
+
+def fast_monthly_stats(cols: SessionColumns) -> List[MonthlyStatsOut]:
+    """Agrupar sesiones por mes sin pandas"""
+    monthly_stats = []
+    for month_start, rows in sorted(_group_rows(cols, _month_start).items()):
+        durations = [r[1] for r in rows]
+        monthly_stats.append(MonthlyStatsOut(
+            month=month_start.month,
+            year=month_start.year,
+            month_name=month_start.strftime('%B'),
+            total_minutes=sum(durations),
+            total_sessions=len(rows),
+            average_duration=sum(durations) / len(rows),
+            days_practiced=len({r[0].date() for r in rows}),
+            most_used_type=_most_used_type(cols, [r[2] for r in rows]),
+            # La racha la rellena with_month_streaks desde el bitmap
+            streak_days=0
+        ))
+    return monthly_stats
+
+
+def fast_user_progress(cols: SessionColumns, days: int) -> ProgressStatsOut:
+    """Analizar progreso del usuario sin pandas"""
+    if len(cols.dates) == 0:
+        return compute_user_progress(cols, days)
+
+    dates, durations, codes = _rows(cols)
+
+    # Estadísticas básicas
+    total_minutes = sum(durations)
+    total_sessions = len(durations)
+    average_daily_minutes = total_minutes / days
+
+    # Consistencia y mejor día
+    daily_totals: Dict[date, int] = defaultdict(int)
+    slots: Dict[str, int] = defaultdict(int)
+    for d, minutes in zip(dates, durations):
+        daily_totals[d.date()] += minutes
+        slot = _time_slot(d.hour)
+        if slot:
+            slots[slot] += 1
+
+    consistency_percentage = (len(daily_totals) / days) * 100
+    best_day = _top_key(daily_totals)
+    best_day_minutes = daily_totals[best_day]
+
+    # Tipos de meditación usados (orden de aparición)
+    meditation_types_used = [cols.type_names[c] for c in dict.fromkeys(codes)]
+
+    # Franja horaria favorita
+    favorite_time_slot = _top_key(slots) if slots else "N/A"
+
+    # Tendencia de mejora (comparar primera y segunda mitad)
+    mid_point = total_sessions // 2
+    if mid_point > 0:
+        first_half = sum(durations[:mid_point]) / mid_point
+        second_half = sum(durations[mid_point:]) / (total_sessions - mid_point)
+
+        if second_half > first_half * 1.1:
+            improvement_trend = "improving"
+        elif second_half < first_half * 0.9:
+            improvement_trend = "declining"
+        else:
+            improvement_trend = "stable"
+
+    else:
+        improvement_trend = "stable"
+
+    return ProgressStatsOut(
+        period_days=days,
+        total_minutes=total_minutes,
+        total_sessions=total_sessions,
+        average_daily_minutes=round(average_daily_minutes, 2),
+        consistency_percentage=round(consistency_percentage, 2),
+        improvement_trend=improvement_trend,
+        best_day=datetime.combine(best_day, datetime.min.time()),
+        best_day_minutes=best_day_minutes,
+        meditation_types_used=meditation_types_used,
+        favorite_time_slot=favorite_time_slot
+    )
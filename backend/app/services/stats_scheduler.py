@@ -0,0 +1,214 @@
+"""Refresco de UserStats en segundo plano.
+
+En lugar de recalcular al leer, un loop de asyncio dentro del proceso
+recalcula las stats de:
+
+- usuarios pedidos explícitamente (escrituras de sesiones, stats faltantes),
+- usuarios con racha activa cuyo último cálculo es de un día anterior
+  (la racha puede haberse cortado a medianoche).
+
+Se procesan primero los pedidos explícitos y luego los más antiguos, con un
+máximo de usuarios por ciclo y por segundo para no saturar la bd. Cada
+recálculo es una consulta agregada más el bitmap de días activos
+(`calculate_user_stats`), sin pandas en el event loop.
+
+Los pedidos explícitos los atiende el proceso que los recibió. El barrido
+de rachas viejas lo hace un solo proceso: el que tiene el advisory lock
+STATS_REFRESH_LOCK, tomado en una conexión propia que se mantiene abierta.
+Si ese proceso muere, la conexión se cierra, el lock se suelta y otro lo
+toma en su próximo ciclo.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.future import select
+from sqlalchemy import func, update
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.models import UserStats
+from app.services.stats_service import calculate_user_stats
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+STATS_REFRESH_ENABLED = os.getenv("STATS_REFRESH_ENABLED", "true").lower() == "true"
+STATS_REFRESH_INTERVAL = float(os.getenv("STATS_REFRESH_INTERVAL", "60"))  # segundos entre ciclos
+STATS_REFRESH_BATCH = int(os.getenv("STATS_REFRESH_BATCH", "200"))  # usuarios por ciclo
+STATS_REFRESH_RATE = float(os.getenv("STATS_REFRESH_RATE", "20"))  # usuarios por segundo
+# Clave de pg_try_advisory_lock: un solo proceso barre las rachas viejas
+STATS_REFRESH_LOCK = 3301
+
+
+def stats_are_stale(user_stats: UserStats, now: Optional[datetime] = None) -> bool:
+    """Racha activa calculada antes de hoy: puede estar desactualizada"""
+    now = now or datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return bool(user_stats.current_streak) and (
+        user_stats.last_updated is None or user_stats.last_updated < today
+    )
+
+
+class StatsRefreshScheduler:
+    def __init__(
+        self,
+        interval: float = STATS_REFRESH_INTERVAL,
+        batch_size: int = STATS_REFRESH_BATCH,
+        rate: float = STATS_REFRESH_RATE,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.rate = rate
+        self._requested: Dict[int, float] = {}  # user_id -> momento del pedido
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock_conn: Optional[AsyncConnection] = None  # conexión que tiene el lock
+        self.refreshed = 0
+        self.failed = 0
+
+    @property
+    def leader(self) -> bool:
+        return self._lock_conn is not None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def request_refresh(self, user_id: int) -> None:
+        """Pedir el recálculo de un usuario en el próximo ciclo (sin scheduler no
+        se acumula nada: las stats viejas se vuelven a pedir en la próxima lectura)"""
+        if not self.running:
+            return
+        self._requested.setdefault(user_id, time.monotonic())
+        self._wake.set()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="stats-refresh")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._release_leadership()
+
+    async def _hold_leadership(self) -> bool:
+        """Tomar (o confirmar que se sigue teniendo) el lock del barrido"""
+        if self._lock_conn is not None:
+            try:
+                await self._lock_conn.execute(select(1))
+                await self._lock_conn.commit()
+                return True
+            except Exception:
+                # Conexión perdida: el lock ya no es nuestro
+                logger.warning("Stats refresh lost its advisory lock connection")
+                await self._release_leadership()
+
+        try:
+            conn = await engine.connect()
+        except Exception:
+            logger.exception("Stats refresh could not connect to take its advisory lock")
+            return False
+        try:
+            res = await conn.execute(select(func.pg_try_advisory_lock(STATS_REFRESH_LOCK)))
+            acquired = bool(res.scalar())
+            # El lock es de sesión: sobrevive al commit y no deja la conexión en transacción
+            await conn.commit()
+        except Exception:
+            logger.exception("Stats refresh could not take its advisory lock")
+            acquired = False
+        if not acquired:
+            await conn.close()
+            return False
+        self._lock_conn = conn
+        return True
+
+    async def _release_leadership(self) -> None:
+        conn, self._lock_conn = self._lock_conn, None
+        if conn is not None:
+            try:
+                await conn.close()  # cerrar la conexión suelta el lock
+            except Exception:
+                pass
+
+    async def _stale_users(self, limit: int) -> List[int]:
+        # Los más desactualizados primero
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        async with AsyncSessionLocal() as db:
+            res = await db.execute(
+                select(UserStats.user_id)
+                .where(UserStats.current_streak > 0, UserStats.last_updated < today)
+                .order_by(UserStats.last_updated)
+                .limit(limit)
+            )
+            return list(res.scalars().all())
+
+    async def _next_batch(self) -> List[int]:
+        requested = sorted(self._requested, key=self._requested.get)[:self.batch_size]
+        for user_id in requested:
+            del self._requested[user_id]
+
+        remaining = self.batch_size - len(requested)
+        if remaining > 0 and await self._hold_leadership():
+            stale = await self._stale_users(remaining)
+            requested += [u for u in stale if u not in requested]
+        return requested
+
+    async def refresh_user(self, user_id: int) -> None:
+        async with AsyncSessionLocal() as db:
+            user_stats = await calculate_user_stats(user_id, db)
+            if user_stats is None:
+                # Sin sesiones: reiniciar la racha para que deje de figurar como pendiente
+                await db.execute(
+                    update(UserStats)
+                    .where(UserStats.user_id == user_id)
+                    .values(current_streak=0, last_updated=datetime.utcnow())
+                )
+                await db.commit()
+
+    async def run_once(self) -> int:
+        """Un ciclo: procesa un lote respetando el límite de usuarios por segundo"""
+        batch = await self._next_batch()
+        delay = 1 / self.rate if self.rate > 0 else 0
+        for user_id in batch:
+            started = time.monotonic()
+            try:
+                await self.refresh_user(user_id)
+                self.refreshed += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Error refreshing stats for user %s", user_id)
+            await asyncio.sleep(max(0.0, delay - (time.monotonic() - started)))
+        return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Stats refresh cycle failed")
+                processed = 0
+
+            # Si el lote vino lleno o hay pedidos, seguir sin esperar el intervalo
+            if processed >= self.batch_size or self._requested:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+stats_scheduler = StatsRefreshScheduler()
@@ -8,7 +8,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.models import User
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_db
 
 # Carga variables de entorno desde .env
 load_dotenv()
@@ -87,6 +87,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme),
     return user
 
 
+# Igual que get_current_user, pero la sesión se cierra apenas se obtiene el usuario:
+# para rutas que no usan la bd de la petición y no deben retener una conexión
+async def get_current_user_detached(token: str = Depends(oauth2_scheme)):
+    async with AsyncSessionLocal() as db:
+        return await get_current_user(token, db)
+
+
 # Función para verificar si el usuario es activo
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
@@ -0,0 +1,79 @@
+"""Memoria y tiempo: DataFrame desde objetos ORM vs columnas tipadas.
+
+El camino anterior recorría sesiones ORM (con meditación y tipo cargados) y
+creaba un dict por fila antes de llamar a pd.DataFrame. El nuevo recibe
+tuplas (fecha, duración, tipo) y construye columnas tipadas directamente.
+Uso (desde backend/):
+
+    python -m benchmarks.bench_columnar_fetch --sizes 10000 100000 1000000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import pandas as pd
+
+from app.services.stats_compute import columns_to_frame, session_columns
+from benchmarks.synthetic import synthetic_rows
+
+
+def _orm_like(rows):
+    # Objetos con la misma forma que MeditationSession -> Meditation -> MeditationType
+    types = {}
+    sessions = []
+    for date, duration, type_name in rows:
+        meditation_type = types.setdefault(type_name, SimpleNamespace(name=type_name))
+        meditation = SimpleNamespace(meditation_type=meditation_type)
+        sessions.append(SimpleNamespace(date=date, duration_completed=duration, meditation=meditation))
+    return sessions
+
+
+def _old_path(rows):
+    sessions = _orm_like(rows)
+    df = pd.DataFrame([{
+        'date': s.date,
+        'duration': s.duration_completed,
+        'meditation_type': s.meditation.meditation_type.name if s.meditation and s.meditation.meditation_type else "Unknown"
+    } for s in sessions])
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def _new_path(rows):
+    return columns_to_frame(session_columns(rows))
+
+
+def _measure(func, rows):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    df = func(rows)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "time_ms": round(elapsed * 1000, 2),
+        "peak_mb": round(peak / 2**20, 2),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        # Las tuplas equivalen a lo que devuelve la bd; no se cuentan en ninguno de los dos
+        rows = synthetic_rows(n)
+        results.append({"rows": n, "orm_dicts": _measure(_old_path, rows), "columnar": _measure(_new_path, rows)})
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Latencia de peticiones ligeras mientras corren análisis pesados.
+
+Compara ejecutar los cálculos de pandas en el event loop (como antes) contra
+enviarlos al pool de procesos. Uso (desde backend/):
+
+    python -m benchmarks.bench_event_loop --rows 200000 --heavy 4 --workers 2
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+from app.services.stats_compute import compute_user_analytics
+from benchmarks.synthetic import synthetic_columns
+
+PROBE_INTERVAL = 0.005
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+async def _probe(latencies, stop: asyncio.Event):
+    # Simula una petición ligera: cuánto tarda en volver a ejecutarse
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        latencies.append((time.perf_counter() - t0 - PROBE_INTERVAL) * 1000)
+
+
+async def _scenario(cols, heavy: int, probes: int, pool):
+    loop = asyncio.get_running_loop()
+    latencies = []
+    stop = asyncio.Event()
+    probe_tasks = [asyncio.create_task(_probe(latencies, stop)) for _ in range(probes)]
+
+    async def heavy_call(i):
+        func = partial(compute_user_analytics, cols, i, datetime(2025, 6, 1))
+        if pool is None:
+            await asyncio.sleep(0)
+            return func()
+        return await loop.run_in_executor(pool, func)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(heavy_call(i) for i in range(heavy)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await asyncio.gather(*probe_tasks)
+
+    return {
+        "heavy_total_s": round(elapsed, 3),
+        "probe_samples": len(latencies),
+        "lag_ms_p50": round(statistics.median(latencies), 3),
+        "lag_ms_p95": round(_percentile(latencies, 95), 3),
+        "lag_ms_p99": round(_percentile(latencies, 99), 3),
+        "lag_ms_max": round(max(latencies), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--heavy", type=int, default=4)
+    parser.add_argument("--probes", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    cols = synthetic_columns(args.rows)
+    results = {"rows": args.rows, "heavy": args.heavy, "workers": args.workers}
+
+    results["inline"] = asyncio.run(_scenario(cols, args.heavy, args.probes, None))
+
+    with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Calentar los workers antes de medir
+        list(pool.map(partial(compute_user_analytics, synthetic_columns(10), 0), [datetime(2025, 6, 1)] * args.workers))
+        results["process_pool"] = asyncio.run(_scenario(cols, args.heavy, args.probes, pool))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
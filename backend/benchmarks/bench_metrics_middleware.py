@@ -0,0 +1,75 @@
+"""Costo por petición de MetricsMiddleware.
+
+Llama a una app ASGI mínima (que marca la ruta en el scope como hace el
+router de FastAPI) con y sin el middleware y reporta la diferencia en
+microsegundos por petición. Uso (desde backend/):
+
+    python -m benchmarks.bench_metrics_middleware --requests 200000 --routes 20
+"""
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from app.core.metrics import MetricsMiddleware, MetricsRegistry
+
+BODY = b'{"ok": true}'
+
+
+def _make_app(routes):
+    async def app(scope, receive, send):
+        scope["route"] = routes[scope["route_index"]]
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": BODY})
+    return app
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    pass
+
+
+async def _run(app, n: int, n_routes: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        scope = {"type": "http", "method": "GET", "path": "/x", "route_index": i % n_routes}
+        await app(scope, _receive, _send)
+    return time.perf_counter() - start
+
+
+async def main(n: int, n_routes: int):
+    routes = [SimpleNamespace(path=f"/bench/{i}/{{item_id}}") for i in range(n_routes)]
+    bare = _make_app(routes)
+    registry = MetricsRegistry()
+    instrumented = MetricsMiddleware(bare, registry)
+
+    # Calentamiento (crea los objetos por ruta)
+    await _run(instrumented, n_routes * 10, n_routes)
+
+    bare_time = await _run(bare, n, n_routes)
+    instrumented_time = await _run(instrumented, n, n_routes)
+    render_start = time.perf_counter()
+    rendered = registry.render()
+    render_time = time.perf_counter() - render_start
+
+    print(json.dumps({
+        "requests": n,
+        "routes": n_routes,
+        "bare_us_per_request": round(bare_time / n * 1e6, 3),
+        "instrumented_us_per_request": round(instrumented_time / n * 1e6, 3),
+        "overhead_us_per_request": round((instrumented_time - bare_time) / n * 1e6, 3),
+        "render_ms": round(render_time * 1000, 3),
+        "render_bytes": len(rendered),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--routes", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.routes))
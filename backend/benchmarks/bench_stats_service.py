@@ -0,0 +1,305 @@
+"""Tiempo, memoria y escalamiento de stats_service y preferences_service.
+
+Corre la parte de cálculo de cada función pública (lo que hacen después de
+leer de la bd) sobre historiales sintéticos de distintos tamaños y reporta:
+
+- tiempo (mejor de varias repeticiones),
+- pico de memoria con tracemalloc (corrida aparte, tracemalloc es lento),
+- exponente de escalamiento: pendiente log-log del tiempo entre tamaños
+  >= 1k (~1 lineal, ~2 cuadrático).
+
+Cada entrada de BENCHMARKS dice qué parte de su función mide (`covers`):
+las que son casi todo SQL solo miden el paso en Python.
+
+Con --compare compara contra una corrida guardada (por defecto la del repo,
+benchmarks/baseline.json) y sale con código 1 si algo escala peor (p. ej. un
+loop O(n·días) accidental). benchmarks/baseline.json guarda tiempos absolutos
+de UNA máquina (la de `_machine`): por defecto solo se comparan los
+exponentes, que no dependen del hardware; --timings compara también los
+tiempos y solo tiene sentido en la misma máquina. Al cambiar el cálculo se
+regenera con --save-baseline y se commitea. tests/test_bench_stats_service.py
+lo corre con tamaños chicos. Uso (desde backend/):
+
+    python -m benchmarks.bench_stats_service --compare
+    python -m benchmarks.bench_stats_service --compare otra_corrida.json --timings --tolerance 1
+    python -m benchmarks.bench_stats_service --save-baseline
+    python -m benchmarks.bench_stats_service --sizes 10,1000 --only group_sessions_by_week
+"""
+import os
+
+# Medir el cálculo en este proceso, no el envío al pool
+os.environ.setdefault("STATS_POOL_WORKERS", "0")
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from app.schemas.stats_schemas import DashboardOut
+from app.services.activity_service import activity_from_bits, activity_streaks, days_to_bits
+from app.services.preferences_service import compute_preferences
+from app.services.stats_compute import compute_stats_charts, compute_user_analytics, session_columns
+from app.services.stats_engine import compute_dashboard, select_engine
+from app.services.stats_service import (
+    DASHBOARD_SECTIONS, empty_user_stats, with_activity, with_month_streaks,
+    group_sessions_by_week, group_sessions_by_month, analyze_user_progress,
+)
+from benchmarks.synthetic import TYPE_NAMES, synthetic_columns
+
+NOW = datetime(2025, 6, 1)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = (10, 1_000, 100_000, 1_000_000)
+CHART_TYPES = ["progress", "types", "weekly", "monthly"]
+TYPE_TAGS = {
+    name: tags for name, tags in zip(TYPE_NAMES, (
+        ["estrés", "enfoque"], ["compasión"], ["sueño", "relajación"], ["ansiedad", "estrés"], ["enfoque"],
+    ))
+}
+
+_loop = asyncio.new_event_loop()
+
+
+def _run(coro):
+    return _loop.run_until_complete(coro)
+
+
+class Case:
+    """Datos de entrada de un tamaño, preparados fuera de la medición"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.cols = synthetic_columns(n)
+        # Filas como las devuelve la consulta de load_session_columns
+        dates = self.cols.dates.tolist()
+        names = [self.cols.type_names[c] for c in self.cols.type_codes.tolist()]
+        self.rows = list(zip(dates, self.cols.durations.tolist(), names))
+        self.preference_rows = [(d, date, TYPE_TAGS[name]) for date, d, name in self.rows]
+        # Bitmap de días activos como lo guarda user_activity
+        days = sorted({d.date() for d in dates})
+        self.activity_bits = days_to_bits(days, days[0]) if days else 0
+        self.activity_start = days[0] if days else NOW.date()
+        # Entradas de with_activity / with_month_streaks (su costo depende
+        # del bitmap y de la cantidad de meses, no del contenido)
+        self.analysis = compute_user_analytics(session_columns([]), 1, NOW)
+        self.monthly = select_engine(n).monthly(self.cols)
+
+
+def _activity(case: Case):
+    return activity_from_bits(case.activity_bits, case.activity_start, NOW.date())
+
+
+# Usuario típico de refresh_all_user_stats: un año de días activos
+_YEAR_START = NOW.date() - timedelta(days=364)
+_YEAR_BITS = days_to_bits([_YEAR_START + timedelta(days=i) for i in range(365)], _YEAR_START)
+
+
+def _refresh_all(case: Case):
+    # Un usuario cada 100 sesiones, todos con el mismo bitmap de un año
+    return [
+        activity_streaks(activity_from_bits(_YEAR_BITS, _YEAR_START, NOW.date()))
+        for _ in range(max(1, case.n // 100))
+    ]
+
+
+def _dashboard(case: Case):
+    end = NOW
+    windows = {
+        "weekly": end - timedelta(weeks=4),
+        "monthly": end - timedelta(days=180),
+        "progress": end - timedelta(days=30),
+    }
+    dashboard = DashboardOut(user_id=1, generated_at=end)
+    dashboard = compute_dashboard(dashboard, case.cols, list(DASHBOARD_SECTIONS), windows, 30, NOW)
+    activity = _activity(case)
+    dashboard.analysis = with_activity(dashboard.analysis, activity)
+    dashboard.monthly = with_month_streaks(dashboard.monthly, activity)
+    return dashboard
+
+
+class Benchmark(NamedTuple):
+    covers: str                      # qué parte de la función pública se mide
+    measure: Callable[[Case], Any]
+
+
+# nombre de la función pública -> cálculo a medir
+BENCHMARKS: Dict[str, Benchmark] = {
+    "load_session_columns": Benchmark(
+        "armado de columnas desde las filas (sin la consulta)", lambda c: session_columns(c.rows)),
+    "calculate_user_stats": Benchmark(
+        "solo activity_streaks sobre el bitmap (conteo y suma son SQL)",
+        lambda c: activity_streaks(_activity(c))),
+    "refresh_all_user_stats": Benchmark(
+        "activity_streaks de n/100 usuarios de un año (sin las consultas por usuario)", _refresh_all),
+    "empty_user_stats": Benchmark("todo", lambda c: empty_user_stats(1)),
+    "get_user_analytics": Benchmark(
+        "motor elegido + with_activity (sin la consulta)",
+        lambda c: with_activity(select_engine(c.n).analytics(c.cols, 1, NOW), _activity(c))),
+    "with_activity": Benchmark("todo (bitmap ya cargado)", lambda c: with_activity(c.analysis, _activity(c))),
+    "with_month_streaks": Benchmark(
+        "todo, sobre todos los meses del historial", lambda c: with_month_streaks(c.monthly, _activity(c))),
+    "group_sessions_by_week": Benchmark("todo", lambda c: _run(group_sessions_by_week(c.cols))),
+    "group_sessions_by_month": Benchmark(
+        "todo (las rachas las pone with_month_streaks)", lambda c: _run(group_sessions_by_month(c.cols))),
+    "analyze_user_progress": Benchmark("todo", lambda c: _run(analyze_user_progress(c.cols, 30))),
+    "generate_stats_charts": Benchmark(
+        "un gráfico 'progress' (sin la consulta); get_user_charts es un alias",
+        lambda c: compute_stats_charts(c.cols, ["progress"])),
+    "generate_stats_charts_batch": Benchmark(
+        "todos los gráficos (sin la consulta)", lambda c: compute_stats_charts(c.cols, CHART_TYPES)),
+    "get_user_dashboard": Benchmark(
+        "todas las secciones + bitmap (sin consultas ni UserStats)", _dashboard),
+    "update_user_preferences": Benchmark(
+        "compute_preferences (sin la consulta)", lambda c: compute_preferences(c.preference_rows)),
+}
+
+
+def _time(func: Callable[[], Any], min_time: float, max_repeats: int) -> float:
+    best = math.inf
+    spent = 0.0
+    repeats = 0
+    while repeats < max_repeats and (repeats < 3 or spent < min_time):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        repeats += 1
+    return best
+
+
+def _peak_memory(func: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _exponent(sizes: List[int], times: List[float]) -> float:
+    # Pendiente de mínimos cuadrados en log-log, ignorando tamaños chicos
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, times) if n >= 1_000 and t > 0]
+    if len(points) < 2:
+        return float("nan")
+    xs, ys = np.array(points).T
+    return float(np.polyfit(xs, ys, 1)[0])
+
+
+def run(sizes: List[int], names: List[str], min_time: float, max_repeats: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {name: {"covers": BENCHMARKS[name].covers, "sizes": {}} for name in names}
+    for n in sizes:
+        case = Case(n)
+        for name in names:
+            func = BENCHMARKS[name].measure
+            func(case)  # calentamiento (imports, cachés de pandas)
+            results[name]["sizes"][str(n)] = {
+                "seconds": _time(lambda: func(case), min_time, max_repeats),
+                "peak_bytes": _peak_memory(lambda: func(case)),
+            }
+            print(f"  {name:<28} n={n:<9} {results[name]['sizes'][str(n)]['seconds'] * 1000:10.3f} ms",
+                  file=sys.stderr, flush=True)
+
+    for name in names:
+        per_size = results[name]["sizes"]
+        results[name]["exponent"] = _exponent(sizes, [per_size[str(n)]["seconds"] for n in sizes])
+    return results
+
+
+def machine() -> Dict[str, str]:
+    """Dónde se midió: los tiempos absolutos solo se comparan en la misma"""
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "cpus": str(os.cpu_count()),
+    }
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    exponent_slack: float,
+    timings: bool = False,
+) -> List[str]:
+    problems = []
+    if timings and baseline.get("_machine") != machine():
+        print("el baseline es de otra máquina: los tiempos no son comparables", file=sys.stderr)
+    for name, current in results.items():
+        if name.startswith("_"):
+            continue
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name}: sin baseline, no se compara", file=sys.stderr)
+            continue
+        for size, values in current["sizes"].items() if timings else ():
+            before = base["sizes"].get(size)
+            # Los tiempos de microsegundos son ruido: solo se comparan desde 1 ms
+            if before and before["seconds"] >= 0.001 and values["seconds"] > before["seconds"] * (1 + tolerance):
+                problems.append(
+                    f"{name} n={size}: {values['seconds'] * 1000:.2f} ms vs {before['seconds'] * 1000:.2f} ms"
+                )
+        # Con menos de 1 ms en el tamaño más grande la pendiente también es ruido
+        largest = max(current["sizes"].values(), key=lambda v: v["seconds"])["seconds"]
+        if largest >= 0.001 and not math.isnan(current["exponent"]) and not math.isnan(base["exponent"]):
+            if current["exponent"] > base["exponent"] + exponent_slack:
+                problems.append(
+                    f"{name}: scaling exponent {current['exponent']:.2f} vs {base['exponent']:.2f}"
+                )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--only", help="nombres separados por comas (ver BENCHMARKS)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="segundos mínimos por medición")
+    parser.add_argument("--max-repeats", type=int, default=50)
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, metavar="BASELINE",
+                        help="comparar contra un JSON guardado (sin valor: benchmarks/baseline.json); "
+                             "sale con código 1 si hay regresiones")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help="guardar los resultados como baseline (sin valor: benchmarks/baseline.json)")
+    parser.add_argument("--timings", action="store_true",
+                        help="con --compare, comparar también los tiempos absolutos (misma máquina)")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="aumento de tiempo permitido (0.5 = 50%%)")
+    parser.add_argument("--exponent-slack", type=float, default=0.25)
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run(sizes, names, args.min_time, args.max_repeats)
+    results["_machine"] = machine()
+    print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            problems = compare(results, json.load(f), args.tolerance, args.exponent_slack, args.timings)
+        for problem in problems:
+            print(f"REGRESSION: {problem}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
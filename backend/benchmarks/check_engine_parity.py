@@ -0,0 +1,92 @@
+"""Comparar el motor pandas con el motor en Python puro.
+
+Genera historiales aleatorios (incluyendo empates, sesiones a medianoche y
+duraciones en los bordes de los intervalos) y verifica que ambos motores
+devuelven lo mismo para analytics, weekly, monthly y progress. Sale con
+código 1 si encuentra diferencias; `tests/test_engine_parity.py` corre lo
+mismo con pytest. Uso (desde backend/):
+
+    python -m benchmarks.check_engine_parity --cases 500
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Any, List, NamedTuple
+
+from app.services.stats_compute import session_columns
+from app.services.stats_engine import PANDAS_ENGINE, PYTHON_ENGINE
+
+NOW = datetime(2025, 6, 1, 12, 0)
+TYPES = ["Mindfulness", "Metta", "Body Scan", None]
+EDGE_DURATIONS = [0, 1, 10, 11, 20, 21, 30, 31, 45]
+
+
+def _random_rows(rng: random.Random, n: int):
+    span_days = rng.choice([3, 20, 90, 400])
+    rows = []
+    for _ in range(n):
+        day = NOW - timedelta(days=rng.randrange(span_days))
+        hour = rng.choice([0, 5, 6, 11, 12, 17, 18, 23, rng.randrange(24)])
+        date = day.replace(hour=hour, minute=rng.randrange(60), second=0, microsecond=0)
+        duration = rng.choice(EDGE_DURATIONS) if rng.random() < 0.5 else rng.randrange(1, 60)
+        rows.append((date, duration, rng.choice(TYPES)))
+    rows.sort(key=lambda r: r[0])
+    return rows
+
+
+def _dump(result):
+    if isinstance(result, list):
+        return [item.model_dump() for item in result]
+    data = result.model_dump()
+    data.pop("analysis_date", None)
+    return data
+
+
+class Difference(NamedTuple):
+    case: int
+    kind: str
+    sessions: int
+    expected: Any
+    actual: Any
+
+
+def engine_differences(cases: int = 300, max_rows: int = 120, seed: int = 0) -> List[Difference]:
+    """Casos en que los dos motores no devuelven lo mismo"""
+    rng = random.Random(seed)
+    differences = []
+    for case in range(cases):
+        cols = session_columns(_random_rows(rng, rng.randrange(0, max_rows)))
+        calls = {
+            "analytics": (cols, 1, NOW),
+            "weekly": (cols,),
+            "monthly": (cols,),
+            "progress": (cols, 30),
+        }
+        for kind, call_args in calls.items():
+            expected = _dump(getattr(PANDAS_ENGINE, kind)(*call_args))
+            actual = _dump(getattr(PYTHON_ENGINE, kind)(*call_args))
+            if expected != actual:
+                differences.append(Difference(case, kind, len(cols.dates), expected, actual))
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=300)
+    parser.add_argument("--max-rows", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    differences = engine_differences(args.cases, args.max_rows, args.seed)
+    for diff in differences:
+        print(f"[caso {diff.case}] {diff.kind} difiere ({diff.sessions} sesiones)")
+        print(f"  pandas: {diff.expected}")
+        print(f"  python: {diff.actual}")
+
+    print(f"{args.cases} casos, {len(differences)} diferencias")
+    sys.exit(1 if differences else 0)
+
+
+if __name__ == "__main__":
+    main()
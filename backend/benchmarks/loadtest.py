@@ -0,0 +1,311 @@
+"""Generador de carga contra una instancia local (uvicorn + Postgres).
+
+Cada usuario virtual se registra, inicia sesión, crea algunas sesiones de
+meditación y genera sus preferencias; luego recorre en bucle una mezcla
+ponderada de rutas hasta que termina el tiempo. El cliente HTTP/1.1 es
+propio (asyncio, conexiones keep-alive) para no depender de paquetes extra.
+
+Imprime (o guarda con --output) un JSON con throughput, p50/p95/p99 y tasa
+de error por ruta, para comparar builds. Uso (desde backend/):
+
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --users 50 --duration 60
+    python -m benchmarks.loadtest --mix "GET /stats/=5,POST /sessions/=1" --label pr-123
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Mezcla por defecto (pesos relativos), parecida al tráfico de la app
+DEFAULT_MIX: Dict[str, float] = {
+    "GET /sessions/": 20,
+    "POST /sessions/": 10,
+    "GET /stats/": 15,
+    "GET /stats/dashboard": 8,
+    "GET /stats/analysis": 4,
+    "GET /stats/weekly": 5,
+    "GET /stats/monthly": 4,
+    "GET /stats/progress": 4,
+    "GET /stats/activity": 5,
+    "GET /stats/charts": 2,
+    "GET /preferences/": 8,
+    "GET /meditations/": 10,
+    "GET /meditation-type/": 5,
+}
+
+
+class HttpError(Exception):
+    pass
+
+
+class HttpConnection:
+    """Conexión HTTP/1.1 keep-alive mínima (Content-Length y chunked)"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self.writer = None
+
+    async def request(
+        self, method: str, path: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, bytes]:
+        for attempt in range(2):
+            if self.writer is None:
+                await self._connect()
+            try:
+                return await self._request(method, path, body, headers or {})
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # El servidor cerró la conexión keep-alive: reintentar una vez
+                await self.close()
+                if attempt:
+                    raise
+        raise HttpError("unreachable")
+
+    async def _request(self, method, path, body, headers) -> Tuple[int, bytes]:
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        parts = status_line.split(b" ", 2)
+        if len(parts) < 2:
+            raise HttpError(f"bad status line: {status_line!r}")
+        status = int(parts[1])
+
+        response_headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b"\r\n")
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            payload = b"".join(chunks)
+        else:
+            payload = await self.reader.readexactly(int(response_headers.get("content-length", "0")))
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, payload
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.recording = True
+
+    def add(self, route: str, seconds: float, status: Optional[int]) -> None:
+        if not self.recording:
+            return
+        self.latencies[route].append(seconds)
+        key = str(status) if status is not None else "exception"
+        self.statuses[route][key] += 1
+        if status is None or status >= 400:
+            self.errors[route] += 1
+
+
+class VirtualUser:
+    def __init__(self, conn: HttpConnection, recorder: Recorder, rng: random.Random, run_id: str, index: int):
+        self.conn = conn
+        self.recorder = recorder
+        self.rng = rng
+        self.email = f"loadtest-{run_id}-{index}@example.com"
+        self.token: Optional[str] = None
+        self.meditation_ids: List[int] = []
+
+    async def call(self, method: str, path: str, payload=None, route: Optional[str] = None) -> Tuple[Optional[int], bytes]:
+        headers = {"Accept": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            headers["Content-Type"] = "application/json"
+
+        start = time.perf_counter()
+        try:
+            status, data = await self.conn.request(method, path, body, headers)
+        except (OSError, asyncio.IncompleteReadError, HttpError, ValueError):
+            await self.conn.close()
+            status, data = None, b""
+        self.recorder.add(route or f"{method} {path}", time.perf_counter() - start, status)
+        return status, data
+
+    def _session_payload(self) -> dict:
+        days_ago = self.rng.expovariate(1 / 20)
+        hour = self.rng.choice([7, 7, 8, 12, 13, 19, 21, 22])
+        when = (datetime.utcnow() - timedelta(days=days_ago)).replace(hour=hour)
+        return {
+            "meditation_id": self.rng.choice(self.meditation_ids),
+            "duration_completed": self.rng.choice([5, 10, 10, 15, 20, 30]),
+            "date": when.isoformat(),
+        }
+
+    async def setup(self, seed_sessions: int) -> bool:
+        status, _ = await self.call("POST", "/auth/register", {"email": self.email, "password": "loadtest-pass"})
+        if status != 201:
+            return False
+        status, data = await self.call("POST", "/auth/login-json", {"email": self.email, "password": "loadtest-pass"})
+        if status != 200:
+            return False
+        self.token = json.loads(data)["access_token"]
+
+        status, data = await self.call("GET", "/meditations/")
+        if status == 200:
+            self.meditation_ids = [m["id"] for m in json.loads(data)]
+        if self.meditation_ids:
+            for _ in range(seed_sessions):
+                await self.call("POST", "/sessions/", self._session_payload())
+            await self.call("POST", "/preferences/generate")
+        return True
+
+    async def step(self, route: str) -> None:
+        method, path = route.split(" ", 1)
+        if method == "POST" and path == "/sessions/":
+            if self.meditation_ids:
+                await self.call(method, path, self._session_payload(), route=route)
+            return
+        await self.call(method, path, route=route)
+
+
+async def _user_loop(user: VirtualUser, routes: List[str], weights: List[float], deadline: float, think: float):
+    while time.monotonic() < deadline:
+        await user.step(user.rng.choices(routes, weights)[0])
+        if think:
+            await asyncio.sleep(user.rng.uniform(0, 2 * think))
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    k = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def _report(recorder: Recorder, elapsed: float, args, setup_failures: int) -> dict:
+    routes = {}
+    total = total_errors = 0
+    for route in sorted(recorder.latencies):
+        values = sorted(recorder.latencies[route])
+        count = len(values)
+        errors = recorder.errors[route]
+        total += count
+        total_errors += errors
+        routes[route] = {
+            "requests": count,
+            "throughput_rps": round(count / elapsed, 2),
+            "p50_ms": round(_percentile(values, 50) * 1000, 2),
+            "p95_ms": round(_percentile(values, 95) * 1000, 2),
+            "p99_ms": round(_percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+            "error_rate": round(errors / count, 4),
+            "statuses": dict(recorder.statuses[route]),
+        }
+    return {
+        "label": args.label,
+        "url": args.url,
+        "users": args.users,
+        "duration_s": round(elapsed, 2),
+        "seed": args.seed,
+        "setup_failures": setup_failures,
+        "total_requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(total_errors / total, 4) if total else 0.0,
+        "routes": routes,
+    }
+
+
+def parse_mix(text: Optional[str]) -> Dict[str, float]:
+    """"GET /stats/=5,POST /sessions/=1" o un archivo JSON {"GET /stats/": 5}"""
+    if not text:
+        return dict(DEFAULT_MIX)
+    if text.endswith(".json"):
+        with open(text) as f:
+            return {k: float(v) for k, v in json.load(f).items()}
+    mix = {}
+    for item in text.split(","):
+        route, _, weight = item.rpartition("=")
+        mix[route.strip()] = float(weight)
+    return mix
+
+
+async def main(args) -> dict:
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    mix = parse_mix(args.mix)
+    routes, weights = list(mix), list(mix.values())
+
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    master = random.Random(args.seed)
+    users = [
+        VirtualUser(HttpConnection(host, port), recorder, random.Random(master.random()), run_id, i)
+        for i in range(args.users)
+    ]
+
+    # Alta de usuarios (no cuenta en el reporte salvo que se pida)
+    recorder.recording = args.include_setup
+    ready = await asyncio.gather(*(u.setup(args.seed_sessions) for u in users))
+    active = [u for u, ok in zip(users, ready) if ok]
+    recorder.recording = True
+
+    start = time.monotonic()
+    deadline = start + args.duration
+    await asyncio.gather(*(_user_loop(u, routes, weights, deadline, args.think_ms / 1000) for u in active))
+    elapsed = time.monotonic() - start
+
+    await asyncio.gather(*(u.conn.close() for u in users))
+    return _report(recorder, elapsed, args, len(users) - len(active))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20, help="usuarios virtuales concurrentes")
+    parser.add_argument("--duration", type=float, default=30, help="segundos de carga")
+    parser.add_argument("--mix", help='"MÉTODO /ruta=peso,..." o archivo .json')
+    parser.add_argument("--seed-sessions", type=int, default=5, help="sesiones creadas por usuario al inicio")
+    parser.add_argument("--think-ms", type=float, default=0, help="pausa media entre peticiones de un usuario")
+    parser.add_argument("--include-setup", action="store_true", help="incluir registro/login en el reporte")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", default=None, help="nombre del build para comparar reportes")
+    parser.add_argument("--output", help="guardar el JSON en este archivo")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
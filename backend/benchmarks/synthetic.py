@@ -0,0 +1,38 @@
+"""Historias sintéticas de sesiones para los benchmarks."""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.services.stats_compute import SessionColumns
+
+TYPE_NAMES = ("Mindfulness", "Metta", "Body Scan", "Respiración", "Vipassana")
+
+
+def synthetic_rows(n: int, seed: int = 0, days: int = 3 * 365):
+    """Lista de tuplas (fecha, duración, tipo) ordenadas por fecha"""
+    rng = np.random.default_rng(seed)
+    end = datetime(2025, 6, 1)
+    start = end - timedelta(days=days)
+    offsets = np.sort(rng.integers(0, days * 24 * 3600, size=n))
+    durations = rng.integers(1, 60, size=n)
+    types = rng.integers(0, len(TYPE_NAMES), size=n)
+    return [
+        (start + timedelta(seconds=int(o)), int(d), TYPE_NAMES[t])
+        for o, d, t in zip(offsets, durations, types)
+    ]
+
+
+def synthetic_columns(n: int, seed: int = 0, days: int = 3 * 365) -> SessionColumns:
+    """Columnas equivalentes a synthetic_rows sin pasar por objetos Python"""
+    rng = np.random.default_rng(seed)
+    end = np.datetime64("2025-06-01T00:00:00", "us")
+    start = end - np.timedelta64(days, "D")
+    offsets = np.sort(rng.integers(0, days * 24 * 3600, size=n))
+    durations = rng.integers(1, 60, size=n)
+    types = rng.integers(0, len(TYPE_NAMES), size=n)
+    return SessionColumns(
+        dates=start + offsets.astype("timedelta64[s]"),
+        durations=durations.astype(np.int32),
+        type_codes=types.astype(np.int16),
+        type_names=TYPE_NAMES,
+    )
@@ -0,0 +1,33 @@
+"""add_user_activity_bitmap
+
+Revision ID: 8f2c4a1d9b37
+Revises: 535d811825b9
+Create Date: 2026-10-19 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c4a1d9b37'
+down_revision: Union[str, None] = '535d811825b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Los bitmaps se construyen la primera vez que se consultan
+    op.create_table(
+        'user_activity',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('days_bitmap', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_activity')
@@ -0,0 +1,35 @@
+"""add_meditation_similarities
+
+Revision ID: a8d4f2c6e391
+Revises: f3c6b2d8e147
+Create Date: 2026-10-19 18:05:31.604129
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d4f2c6e391'
+down_revision: Union[str, None] = 'f3c6b2d8e147'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'meditation_similarities',
+        sa.Column('meditation_id', sa.Integer(), primary_key=True),
+        sa.Column('user_count', sa.Integer(), nullable=False),
+        sa.Column('neighbor_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column('co_counts', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column('scores', postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('meditation_similarities')
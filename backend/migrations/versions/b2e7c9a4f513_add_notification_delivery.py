@@ -0,0 +1,36 @@
+"""add_notification_delivery
+
+Revision ID: b2e7c9a4f513
+Revises: a8d4f2c6e391
+Create Date: 2026-10-19 19:21:47.882310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e7c9a4f513'
+down_revision: Union[str, None] = 'a8d4f2c6e391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notifications', sa.Column('sent_at', sa.DateTime(), nullable=True))
+    op.add_column('notifications', sa.Column('kind', sa.String(), nullable=True))
+    # Las notificaciones ya vencidas no se vuelven a entregar
+    op.execute('UPDATE notifications SET sent_at = scheduled_time WHERE scheduled_time < now()')
+    op.create_index('ix_notifications_pending', 'notifications', ['scheduled_time', 'id'],
+                    postgresql_where=sa.text('sent_at IS NULL'))
+    op.create_index('uq_notifications_daily_reminder', 'notifications', ['user_id', 'scheduled_time'],
+                    unique=True, postgresql_where=sa.text("kind = 'daily_reminder'"))
+
+
+def downgrade() -> None:
+    op.drop_index('uq_notifications_daily_reminder', table_name='notifications')
+    op.drop_index('ix_notifications_pending', table_name='notifications')
+    op.drop_column('notifications', 'kind')
+    op.drop_column('notifications', 'sent_at')
@@ -0,0 +1,33 @@
+"""add_stats_period_cache
+
+Revision ID: c41e7b2f5a08
+Revises: 8f2c4a1d9b37
+Create Date: 2026-10-19 11:03:54.771502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7b2f5a08'
+down_revision: Union[str, None] = '8f2c4a1d9b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stats_period_cache',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('period_type', sa.String(), primary_key=True),
+        sa.Column('period_start', sa.Date(), primary_key=True),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stats_period_cache')
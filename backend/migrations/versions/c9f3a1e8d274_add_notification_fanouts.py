@@ -0,0 +1,43 @@
+"""add_notification_fanouts
+
+Revision ID: c9f3a1e8d274
+Revises: b2e7c9a4f513
+Create Date: 2026-10-19 20:36:12.510842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f3a1e8d274'
+down_revision: Union[str, None] = 'b2e7c9a4f513'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'notification_fanouts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('message', sa.String(), nullable=False),
+        sa.Column('scheduled_time', sa.DateTime(), nullable=False),
+        sa.Column('segment', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('inserted', sa.Integer(), nullable=False),
+        sa.Column('last_user_id', sa.Integer(), nullable=False),
+        sa.Column('max_user_id', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_by', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    # Los envíos por segmento unen user_preferences por rangos de user_id
+    op.create_index('ix_user_preferences_user_id', 'user_preferences', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_preferences_user_id', table_name='user_preferences')
+    op.drop_table('notification_fanouts')
@@ -0,0 +1,42 @@
+"""add_notification_counters
+
+Revision ID: d4a8e2b7c615
+Revises: c9f3a1e8d274
+Create Date: 2026-10-19 21:48:03.127456
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8e2b7c615'
+down_revision: Union[str, None] = 'c9f3a1e8d274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_notifications_user_inbox', 'notifications', ['user_id', 'scheduled_time', 'id'])
+    op.create_index('ix_notifications_unread', 'notifications', ['user_id', 'scheduled_time', 'id'],
+                    postgresql_where=sa.text('is_read = false'))
+    op.create_table(
+        'notification_counters',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('unread', sa.Integer(), nullable=False),
+    )
+    # Contadores iniciales a partir de lo ya entregado
+    op.execute(
+        'INSERT INTO notification_counters (user_id, unread) '
+        'SELECT user_id, count(*) FROM notifications '
+        'WHERE is_read = false AND sent_at IS NOT NULL AND user_id IS NOT NULL '
+        'GROUP BY user_id'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('notification_counters')
+    op.drop_index('ix_notifications_unread', table_name='notifications')
+    op.drop_index('ix_notifications_user_inbox', table_name='notifications')
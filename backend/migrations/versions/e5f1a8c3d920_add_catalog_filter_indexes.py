@@ -0,0 +1,32 @@
+"""add_catalog_filter_indexes
+
+Revision ID: e5f1a8c3d920
+Revises: d7a3e9c2b614
+Create Date: 2026-10-19 15:40:27.903114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f1a8c3d920'
+down_revision: Union[str, None] = 'd7a3e9c2b614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_meditation_types_tags', 'meditation_types', ['tags'], postgresql_using='gin')
+    op.create_index('ix_meditations_duration', 'meditations', ['duration'])
+    op.create_index('ix_meditations_difficulty', 'meditations', ['difficulty'])
+    op.create_index('ix_meditations_type_id', 'meditations', ['type_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_meditations_type_id', table_name='meditations')
+    op.drop_index('ix_meditations_difficulty', table_name='meditations')
+    op.drop_index('ix_meditations_duration', table_name='meditations')
+    op.drop_index('ix_meditation_types_tags', table_name='meditation_types')
@@ -0,0 +1,34 @@
+"""add_catalog_search_indexes
+
+Revision ID: f3c6b2d8e147
+Revises: e5f1a8c3d920
+Create Date: 2026-10-19 16:52:44.218675
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c6b2d8e147'
+down_revision: Union[str, None] = 'e5f1a8c3d920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_meditations_title_trgm', 'meditations', ['title'],
+                    postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_meditation_types_name_trgm', 'meditation_types', ['name'],
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_meditation_types_description_trgm', 'meditation_types', ['description'],
+                    postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_meditation_types_description_trgm', table_name='meditation_types')
+    op.drop_index('ix_meditation_types_name_trgm', table_name='meditation_types')
+    op.drop_index('ix_meditations_title_trgm', table_name='meditations')
@@ -0,0 +1 @@
+"""Scripts de mantenimiento y carga de datos (ejecutar con `python -m scripts.<nombre>` desde backend/)."""
@@ -0,0 +1,132 @@
+"""Reconstruir el índice item-item (`meditation_similarities`) desde las sesiones.
+
+Lee los pares distintos (usuario, meditación) con un cursor del lado del
+servidor, arma la matriz dispersa binaria usuario x meditación X y calcula
+las co-ocurrencias como X.T @ X (meditación x meditación). De cada fila se
+quedan los SIMILARITY_TOP_K vecinos con la misma fórmula que usa la
+actualización incremental (`similarity_scores`). La tabla se reemplaza en
+una sola transacción: las lecturas ven el índice viejo hasta el commit.
+
+Uso (desde backend/, con DATABASE_URL en .env; p. ej. una vez por noche):
+
+    python -m scripts.build_similarity_index
+    python -m scripts.build_similarity_index --top-k 30 --dry-run
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Iterator, List, Tuple
+
+import asyncpg
+import numpy as np
+from dotenv import load_dotenv
+from scipy import sparse
+
+from app.services.similarity_service import SIMILARITY_TOP_K, similarity_scores
+
+load_dotenv()
+
+FETCH_ROWS = 200_000
+
+COLUMNS = ("meditation_id", "user_count", "neighbor_ids", "co_counts", "scores", "updated_at")
+
+
+def _database_url(url: str) -> str:
+    # asyncpg no entiende el prefijo de dialecto de SQLAlchemy
+    return url.replace("postgresql+asyncpg", "postgresql")
+
+
+async def load_pairs(conn: asyncpg.Connection) -> Tuple[np.ndarray, np.ndarray]:
+    """(user_id, meditation_id) distintos, como dos arrays"""
+    users: List[np.ndarray] = []
+    meditations: List[np.ndarray] = []
+    async with conn.transaction():
+        cursor = await conn.cursor(
+            "SELECT DISTINCT user_id, meditation_id FROM sessions "
+            "WHERE user_id IS NOT NULL AND meditation_id IS NOT NULL"
+        )
+        while True:
+            rows = await cursor.fetch(FETCH_ROWS)
+            if not rows:
+                break
+            chunk = np.array([tuple(r) for r in rows], dtype=np.int64)
+            users.append(chunk[:, 0])
+            meditations.append(chunk[:, 1])
+    if not users:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(users), np.concatenate(meditations)
+
+
+def build_index(user_ids: np.ndarray, meditation_ids: np.ndarray, top_k: int) -> Iterator[tuple]:
+    """Filas de `meditation_similarities` (sin bd)"""
+    _, user_idx = np.unique(user_ids, return_inverse=True)
+    items, item_idx = np.unique(meditation_ids, return_inverse=True)
+    x = sparse.csr_matrix(
+        (np.ones(len(item_idx), dtype=np.int32), (user_idx, item_idx)),
+        shape=(int(user_idx.max(initial=-1)) + 1, len(items)),
+    )
+    counts = np.asarray(x.sum(axis=0)).ravel()
+
+    co = (x.T @ x).tocsr()
+    co.setdiag(0)
+    co.eliminate_zeros()
+
+    # Score de todos los pares no nulos de una vez
+    rows = np.repeat(np.arange(len(items)), np.diff(co.indptr))
+    scores = similarity_scores(co.data, counts[rows], counts[co.indices])
+
+    now = datetime.utcnow()
+    for i in range(len(items)):
+        start, end = co.indptr[i], co.indptr[i + 1]
+        row_scores = scores[start:end]
+        if end - start > top_k:
+            # Todos los que empatan con el k-ésimo, para desempatar por id abajo
+            kth = -np.partition(-row_scores, top_k - 1)[top_k - 1]
+            top = np.flatnonzero(row_scores >= kth)
+        else:
+            top = np.arange(end - start)
+        # Mayor score primero, empates por id
+        top = top[np.lexsort((items[co.indices[start:end][top]], -row_scores[top]))][:top_k]
+        yield (
+            int(items[i]),
+            int(counts[i]),
+            items[co.indices[start:end][top]].tolist(),
+            co.data[start:end][top].astype(np.int64).tolist(),
+            row_scores[top].tolist(),
+            now,
+        )
+
+
+async def main(args) -> None:
+    started = time.perf_counter()
+    conn = await asyncpg.connect(_database_url(args.database_url))
+    try:
+        user_ids, meditation_ids = await load_pairs(conn)
+        loaded = time.perf_counter()
+        records = list(build_index(user_ids, meditation_ids, args.top_k))
+        built = time.perf_counter()
+        print(f"{len(user_ids):,} user/meditation pairs loaded in {loaded - started:.1f}s, "
+              f"{len(records):,} rows built in {built - loaded:.1f}s", flush=True)
+
+        if args.dry_run:
+            return
+        async with conn.transaction():
+            await conn.execute("DELETE FROM meditation_similarities")
+            await conn.copy_records_to_table("meditation_similarities", records=records, columns=COLUMNS)
+        await conn.execute("ANALYZE meditation_similarities")
+    finally:
+        await conn.close()
+    print(f"Index written in {time.perf_counter() - started:.1f}s total")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--top-k", type=int, default=SIMILARITY_TOP_K)
+    parser.add_argument("--dry-run", action="store_true", help="calcular sin escribir la tabla")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("DATABASE_URL no configurada")
+    asyncio.run(main(args))
@@ -0,0 +1,479 @@
+"""Carga masiva de datos realistas para reproducir problemas de escala.
+
+Genera usuarios, catálogo, sesiones, UserStats, UserPreferences y
+notificaciones con numpy (semilla fija: mismos datos en cada corrida) y los
+carga con COPY (`copy_records_to_table` de asyncpg) desde varios procesos en
+paralelo, cada uno con su conexión y su rango de usuarios.
+
+Distribuciones:
+- hora del día con picos de mañana (~7h), mediodía (~13h) y noche (~21:30),
+  cada usuario con un pico preferido;
+- segmentos de usuarios: con racha (sesiones casi diarias hasta hoy),
+  regulares, ocasionales y abandonados (dejan de meditar en algún momento);
+- cantidad de sesiones por usuario con cola larga (lognormal);
+- popularidad de meditaciones tipo Zipf.
+
+Las UserStats y UserPreferences se derivan de las sesiones generadas con
+las mismas reglas que `calculate_user_stats` y `update_user_preferences`.
+`user_activity` y `stats_period_cache` no se cargan: se construyen solos al
+primer uso.
+
+Uso (desde backend/, con DATABASE_URL en .env):
+
+    python -m scripts.seed_data --users 200000 --sessions 10000000 --streams 8
+    python -m scripts.seed_data --truncate --users 1000 --sessions 50000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+import asyncpg
+import bcrypt
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SEED_PASSWORD = "seed-password"
+
+TAGS = [
+    "estrés", "sueño", "enfoque", "ansiedad", "gratitud",
+    "energía", "relajación", "compasión", "respiración", "autoestima",
+]
+TYPE_NAMES = [
+    "Mindfulness", "Metta", "Body Scan", "Respiración", "Visualización",
+    "Zen", "Vipassana", "Sueño profundo", "Gratitud", "Caminata consciente",
+]
+DURATIONS = np.array([5, 10, 15, 20, 30, 45])
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+
+# Segmentos: probabilidad y multiplicador de cantidad de sesiones
+SEGMENTS = ("streaky", "regular", "casual", "churned")
+SEGMENT_P = np.array([0.15, 0.40, 0.30, 0.15])
+SEGMENT_WEIGHT = np.array([3.0, 1.5, 0.4, 0.7])
+
+PEAK_HOURS = np.array([7.0, 13.0, 21.5])  # mañana, mediodía, noche
+SLOT_NAMES = ["morning", "afternoon", "evening"]
+
+REMINDER_MESSAGES = [
+    "Es un buen momento para meditar 🧘",
+    "Tu racha te espera, ¿unos minutos de calma?",
+    "Respira: 5 minutos bastan para hoy",
+]
+
+
+def _database_url(url: str) -> str:
+    # asyncpg no entiende el prefijo de dialecto de SQLAlchemy
+    return url.replace("postgresql+asyncpg", "postgresql")
+
+
+# Catálogo
+
+def build_catalog(rng: np.random.Generator, n_types: int, n_meditations: int) -> Dict[str, np.ndarray]:
+    type_names = [
+        TYPE_NAMES[i] if i < len(TYPE_NAMES) else f"{TYPE_NAMES[i % len(TYPE_NAMES)]} {i // len(TYPE_NAMES) + 1}"
+        for i in range(n_types)
+    ]
+    # Cada tipo tiene 2 o 3 tags
+    type_tags = np.zeros((n_types, len(TAGS)), dtype=np.int64)
+    for t in range(n_types):
+        type_tags[t, rng.choice(len(TAGS), size=rng.integers(2, 4), replace=False)] = 1
+
+    med_type = rng.integers(0, n_types, n_meditations)
+    med_duration = rng.choice(DURATIONS, n_meditations, p=[0.15, 0.3, 0.2, 0.18, 0.12, 0.05])
+    med_difficulty = rng.choice(len(DIFFICULTIES), n_meditations, p=[0.5, 0.35, 0.15])
+
+    # Popularidad tipo Zipf en un orden aleatorio
+    popularity = 1 / np.arange(1, n_meditations + 1) ** 1.1
+    popularity = popularity[rng.permutation(n_meditations)]
+    popularity /= popularity.sum()
+
+    return {
+        "type_names": np.array(type_names, dtype=object),
+        "type_tags": type_tags,
+        "med_type": med_type,
+        "med_duration": med_duration,
+        "med_difficulty": med_difficulty,
+        "popularity": popularity,
+    }
+
+
+async def load_catalog(conn, catalog, type_base: int, med_base: int) -> None:
+    type_records = []
+    for t, name in enumerate(catalog["type_names"]):
+        tags = [TAGS[i] for i in np.flatnonzero(catalog["type_tags"][t])]
+        type_records.append((type_base + t + 1, name, f"Prácticas de {name.lower()} para {', '.join(tags)}", "5-45 mins", tags))
+    await conn.copy_records_to_table(
+        "meditation_types", records=type_records,
+        columns=("id", "name", "description", "duration_range", "tags"),
+    )
+
+    med_records = []
+    for m in range(len(catalog["med_type"])):
+        t = int(catalog["med_type"][m])
+        med_records.append((
+            med_base + m + 1,
+            f"{catalog['type_names'][t]} · sesión {m + 1}",
+            int(catalog["med_duration"][m]),
+            DIFFICULTIES[catalog["med_difficulty"][m]],
+            type_base + t + 1,
+        ))
+    await conn.copy_records_to_table(
+        "meditations", records=med_records,
+        columns=("id", "title", "duration", "difficulty", "type_id"),
+    )
+
+
+# Usuarios
+
+def build_user_profiles(rng: np.random.Generator, n_users: int, n_sessions: int) -> Dict[str, np.ndarray]:
+    segment = rng.choice(len(SEGMENTS), n_users, p=SEGMENT_P)
+    age_days = rng.integers(1, 2 * 365, n_users)  # días desde el registro
+
+    weights = rng.lognormal(0.0, 1.0, n_users) * SEGMENT_WEIGHT[segment]
+    counts = rng.multinomial(n_sessions, weights / weights.sum())
+
+    # Ventana de días (offsets relativos a hoy, <= 0) en la que medita cada usuario
+    lo = -age_days
+    hi = np.zeros(n_users, dtype=np.int64)
+    streaky = segment == SEGMENTS.index("streaky")
+    lo[streaky] = np.maximum(lo[streaky], -np.ceil(counts[streaky] * 1.15).astype(np.int64))
+    churned = segment == SEGMENTS.index("churned")
+    hi[churned] = lo[churned] + (age_days[churned] * rng.uniform(0.1, 0.6, churned.sum())).astype(np.int64)
+
+    return {
+        "counts": counts,
+        "age_days": age_days,
+        "lo": lo,
+        "hi": hi,
+        "peak": rng.choice(len(PEAK_HOURS), n_users, p=[0.45, 0.15, 0.40]),
+    }
+
+
+def generate_sessions(rng: np.random.Generator, profiles, catalog, now: datetime) -> Dict[str, np.ndarray]:
+    """Sesiones de un grupo de usuarios, ordenadas por usuario y fecha"""
+    counts = profiles["counts"]
+    user = np.repeat(np.arange(len(counts)), counts)
+    n = len(user)
+
+    span = profiles["hi"] - profiles["lo"] + 1
+    day = profiles["lo"][user] + (rng.random(n) * span[user]).astype(np.int64)
+
+    # 80% de las sesiones cerca del pico preferido del usuario
+    peak = np.where(rng.random(n) < 0.8, profiles["peak"][user], rng.integers(0, len(PEAK_HOURS), n))
+    hour = (PEAK_HOURS[peak] + rng.normal(0.0, 1.0, n)) % 24
+
+    today = np.datetime64(now.date(), "s")
+    ts = today + (day * 86400 + (hour * 3600).astype(np.int64)).astype("timedelta64[s]")
+    ts = np.minimum(ts, np.datetime64(now, "s"))
+
+    meditation = rng.choice(len(catalog["popularity"]), n, p=catalog["popularity"])
+    duration = np.maximum(1, np.rint(catalog["med_duration"][meditation] * rng.beta(5, 1.5, n))).astype(np.int64)
+
+    order = np.lexsort((ts, user))
+    return {
+        "user": user[order],
+        "day": day[order],
+        "ts": ts[order],
+        "meditation": meditation[order],
+        "duration": duration[order],
+    }
+
+
+def derive_user_stats(sessions, n_users: int) -> Dict[str, np.ndarray]:
+    """Totales y rachas por usuario (mismas reglas que activity_streaks)"""
+    user, day = sessions["user"], sessions["day"]
+    total_sessions = np.bincount(user, minlength=n_users)
+    total_minutes = np.bincount(user, sessions["duration"], minlength=n_users).astype(np.int64)
+
+    longest = np.zeros(n_users, dtype=np.int64)
+    current = np.zeros(n_users, dtype=np.int64)
+    if len(user):
+        offset = -int(day.min())
+        keys = np.unique(user.astype(np.int64) * 10_000_000 + day + offset)
+        ku, kd = keys // 10_000_000, keys % 10_000_000
+        starts = np.r_[True, (ku[1:] != ku[:-1]) | (np.diff(kd) != 1)]
+        run_start = np.flatnonzero(starts)
+        run_end = np.r_[run_start[1:] - 1, len(keys) - 1]
+        run_len = run_end - run_start + 1
+        run_user = ku[run_start]
+        np.maximum.at(longest, run_user, run_len)
+
+        # Racha actual: la última racha del usuario, si termina hoy
+        last_run = np.r_[run_user[1:] != run_user[:-1], True]
+        ends_today = kd[run_end] == offset
+        current[run_user[last_run & ends_today]] = run_len[last_run & ends_today]
+
+    return {
+        "total_sessions": total_sessions,
+        "total_minutes": total_minutes,
+        "longest": longest,
+        "current": current,
+    }
+
+
+def derive_preferences(sessions, catalog, n_users: int):
+    """Duración, franja y top 3 tags (mismas reglas que update_user_preferences)"""
+    user = sessions["user"]
+    total_sessions = np.bincount(user, minlength=n_users)
+    avg = np.bincount(user, sessions["duration"], minlength=n_users) / np.maximum(total_sessions, 1)
+    pref_duration = np.where(avg <= 10, "short", np.where(avg <= 15, "medium", "long"))
+
+    hours = ((sessions["ts"] - sessions["ts"].astype("datetime64[D]")) // np.timedelta64(1, "h")).astype(np.int64)
+    slot = np.where((hours >= 5) & (hours < 12), 0, np.where((hours >= 12) & (hours < 18), 1, 2))
+    slot_counts = np.bincount(user * 3 + slot, minlength=n_users * 3).reshape(n_users, 3)
+    pref_time = slot_counts.argmax(axis=1)
+
+    n_types = len(catalog["type_names"])
+    type_of_session = catalog["med_type"][sessions["meditation"]]
+    type_counts = np.bincount(user * n_types + type_of_session, minlength=n_users * n_types).reshape(n_users, n_types)
+    tag_counts = type_counts @ catalog["type_tags"]
+    top = np.argsort(-tag_counts, axis=1, kind="stable")[:, :3]
+
+    goals = [
+        [TAGS[t] for t in top[u] if tag_counts[u, t] > 0]
+        for u in range(n_users)
+    ]
+    return pref_duration, pref_time, goals
+
+
+# Carga por proceso
+
+async def _copy_shard(job: dict) -> Dict[str, int]:
+    rng = np.random.default_rng(job["seed"])
+    catalog = job["catalog"]
+    now = job["now"]
+    conn = await asyncpg.connect(job["dsn"])
+    loaded = {"users": 0, "sessions": 0, "user_stats": 0, "user_preferences": 0, "notifications": 0}
+    try:
+        chunk = job["chunk_users"]
+        n_users = len(job["profiles"]["counts"])
+        session_id = job["session_base"]
+
+        for a in range(0, n_users, chunk):
+            b = min(a + chunk, n_users)
+            profiles = {k: v[a:b] for k, v in job["profiles"].items()}
+            m = b - a
+            global_index = job["user_offset"] + a + np.arange(m)
+            user_ids = job["user_base"] + global_index + 1
+
+            created = [now - timedelta(days=int(d), hours=int(h)) for d, h in zip(profiles["age_days"], rng.integers(0, 24, m))]
+            await conn.copy_records_to_table(
+                "users",
+                records=[
+                    (int(uid), f"seed-{uid}@example.com", job["password_hash"], "user", True, c)
+                    for uid, c in zip(user_ids, created)
+                ],
+                columns=("id", "email", "hashed_password", "role", "is_active", "created_at"),
+            )
+            loaded["users"] += m
+
+            sessions = generate_sessions(rng, profiles, catalog, now)
+            n = len(sessions["user"])
+            await conn.copy_records_to_table(
+                "sessions",
+                records=zip(
+                    range(session_id + 1, session_id + n + 1),
+                    user_ids[sessions["user"]].tolist(),
+                    (job["meditation_base"] + sessions["meditation"] + 1).tolist(),
+                    sessions["duration"].tolist(),
+                    sessions["ts"].astype("datetime64[us]").tolist(),
+                ),
+                columns=("id", "user_id", "meditation_id", "duration_completed", "date"),
+            )
+            session_id += n
+            loaded["sessions"] += n
+
+            # Stats y preferencias solo para usuarios con sesiones
+            stats = derive_user_stats(sessions, m)
+            pref_duration, pref_time, goals = derive_preferences(sessions, catalog, m)
+            active = np.flatnonzero(stats["total_sessions"] > 0)
+            await conn.copy_records_to_table(
+                "user_stats",
+                records=[
+                    (
+                        int(job["stats_base"] + global_index[u] + 1), int(user_ids[u]),
+                        int(stats["total_minutes"][u]), int(stats["current"][u]), int(stats["longest"][u]),
+                        int(stats["total_sessions"][u]),
+                        float(stats["total_minutes"][u] / stats["total_sessions"][u]), now,
+                    )
+                    for u in active
+                ],
+                columns=("id", "user_id", "total_minutes", "current_streak", "longest_streak",
+                         "total_sessions", "average_session_duration", "last_updated"),
+            )
+            await conn.copy_records_to_table(
+                "user_preferences",
+                records=[
+                    (int(job["prefs_base"] + global_index[u] + 1), int(user_ids[u]),
+                     str(pref_duration[u]), SLOT_NAMES[pref_time[u]], goals[u])
+                    for u in active
+                ],
+                columns=("id", "user_id", "preferred_duration", "preferred_time", "goals"),
+            )
+            loaded["user_stats"] += len(active)
+            loaded["user_preferences"] += len(active)
+
+            # Recordatorios a la hora preferida: los pasados, casi todos leídos
+            k = job["notifications_per_user"]
+            if k:
+                n_notif = m * k
+                owner = np.repeat(np.arange(m), k)
+                day_offset = rng.integers(-14, 8, n_notif)
+                hour = PEAK_HOURS[pref_time[owner]] + rng.normal(0, 0.25, n_notif)
+                scheduled = np.datetime64(now.date(), "s") + (
+                    day_offset * 86400 + (hour * 3600).astype(np.int64)
+                ).astype("timedelta64[s]")
+                delivered = scheduled < np.datetime64(now, "s")
+                is_read = delivered & (rng.random(n_notif) < 0.7)
+                message = rng.integers(0, len(REMINDER_MESSAGES), n_notif)
+                notif_ids = job["notification_base"] + (global_index[owner] * k + np.tile(np.arange(k), m)) + 1
+                scheduled_values = scheduled.astype("datetime64[us]").tolist()
+                await conn.copy_records_to_table(
+                    "notifications",
+                    records=zip(
+                        notif_ids.tolist(),
+                        user_ids[owner].tolist(),
+                        [REMINDER_MESSAGES[i] for i in message],
+                        is_read.tolist(),
+                        scheduled_values,
+                        [t if d else None for t, d in zip(scheduled_values, delivered.tolist())],
+                    ),
+                    columns=("id", "user_id", "message", "is_read", "scheduled_time", "sent_at"),
+                )
+                # Contador de no leídas: entregadas y sin leer
+                unread = np.bincount(owner, weights=delivered & ~is_read, minlength=m).astype(np.int64)
+                with_unread = np.flatnonzero(unread)
+                await conn.copy_records_to_table(
+                    "notification_counters",
+                    records=zip(user_ids[with_unread].tolist(), unread[with_unread].tolist()),
+                    columns=("user_id", "unread"),
+                )
+                loaded["notifications"] += n_notif
+    finally:
+        await conn.close()
+    return loaded
+
+
+def _load_shard(job: dict) -> Dict[str, int]:
+    return asyncio.run(_copy_shard(job))
+
+
+# Orquestación
+
+SEQUENCED_TABLES = ("users", "meditation_types", "meditations", "sessions", "user_stats", "user_preferences", "notifications")
+
+
+async def _prepare(dsn: str, truncate: bool) -> Dict[str, int]:
+    conn = await asyncpg.connect(dsn)
+    try:
+        if truncate:
+            await conn.execute(
+                "TRUNCATE users, meditation_types, meditations, sessions, user_stats, user_preferences, "
+                "notifications, notification_counters, user_activity, stats_period_cache RESTART IDENTITY CASCADE"
+            )
+        return {t: await conn.fetchval(f"SELECT COALESCE(MAX(id), 0) FROM {t}") for t in SEQUENCED_TABLES}
+    finally:
+        await conn.close()
+
+
+async def _finish(dsn: str) -> None:
+    conn = await asyncpg.connect(dsn)
+    try:
+        # Las filas se insertaron con id explícito: mover las secuencias al máximo
+        for table in SEQUENCED_TABLES:
+            await conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"GREATEST((SELECT MAX(id) FROM {table}), 1))"
+            )
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+
+
+def main(args) -> None:
+    dsn = _database_url(args.database_url)
+    started = time.perf_counter()
+    now = datetime.utcnow().replace(microsecond=0)
+
+    bases = asyncio.run(_prepare(dsn, args.truncate))
+
+    seeds = np.random.SeedSequence(args.seed)
+    main_seed, *shard_seeds = seeds.spawn(args.streams + 1)
+    rng = np.random.default_rng(main_seed)
+
+    catalog = build_catalog(rng, args.types, args.meditations)
+
+    async def _catalog():
+        conn = await asyncpg.connect(dsn)
+        try:
+            await load_catalog(conn, catalog, bases["meditation_types"], bases["meditations"])
+        finally:
+            await conn.close()
+    asyncio.run(_catalog())
+
+    profiles = build_user_profiles(rng, args.users, args.sessions)
+    # Un solo hash bcrypt para todos (hashear millones tardaría horas)
+    password_hash = bcrypt.hashpw(SEED_PASSWORD.encode(), bcrypt.gensalt()).decode()
+
+    # Rangos de usuarios contiguos por proceso; ids de sesiones contiguos por rango
+    bounds = np.linspace(0, args.users, args.streams + 1).astype(np.int64)
+    session_offsets = np.r_[0, np.cumsum(profiles["counts"])]
+    jobs = []
+    for s in range(args.streams):
+        a, b = int(bounds[s]), int(bounds[s + 1])
+        if a == b:
+            continue
+        jobs.append({
+            "dsn": dsn,
+            "seed": shard_seeds[s],
+            "now": now,
+            "catalog": catalog,
+            "profiles": {k: v[a:b] for k, v in profiles.items()},
+            "user_offset": a,
+            "user_base": bases["users"],
+            "session_base": bases["sessions"] + int(session_offsets[a]),
+            "meditation_base": bases["meditations"],
+            "stats_base": bases["user_stats"],
+            "prefs_base": bases["user_preferences"],
+            "notification_base": bases["notifications"],
+            "notifications_per_user": args.notifications_per_user,
+            "password_hash": password_hash,
+            "chunk_users": args.chunk_users,
+        })
+
+    totals: Dict[str, int] = {}
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(len(jobs)) as pool:
+        for loaded in pool.imap_unordered(_load_shard, jobs):
+            for key, value in loaded.items():
+                totals[key] = totals.get(key, 0) + value
+            print(f"  stream done: {loaded}", flush=True)
+
+    asyncio.run(_finish(dsn))
+
+    elapsed = time.perf_counter() - started
+    print(f"Loaded {totals} in {elapsed:.1f}s "
+          f"({totals.get('sessions', 0) / elapsed:,.0f} sessions/s). Password for all users: {SEED_PASSWORD}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--sessions", type=int, default=1_000_000, help="total de sesiones a generar")
+    parser.add_argument("--types", type=int, default=len(TYPE_NAMES))
+    parser.add_argument("--meditations", type=int, default=300)
+    parser.add_argument("--notifications-per-user", type=int, default=3)
+    parser.add_argument("--streams", type=int, default=os.cpu_count() or 4, help="procesos/conexiones en paralelo")
+    parser.add_argument("--chunk-users", type=int, default=5_000, help="usuarios por COPY")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="vaciar las tablas antes de cargar")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("DATABASE_URL no configurada")
+    main(args)
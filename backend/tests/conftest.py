@@ -0,0 +1,63 @@
+"""Configuración común de las pruebas.
+
+app.core.database y app.utils.security leen su configuración al importarse;
+aquí se fijan valores de prueba si no vienen del entorno. El engine de la app
+no se conecta hasta la primera consulta, así que importar las rutas no
+necesita una base de datos.
+"""
+import asyncio
+import os
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/meditation_test")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+# Base de datos desechable para las pruebas que necesitan Postgres: se borran
+# y crean todas las tablas. Sin ella esas pruebas se saltan.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def assert_max_queries():
+    """`with assert_max_queries(n):` falla si el bloque ejecuta más de n sentencias"""
+    from app.core.database import engine
+    from app.core.query_stats import assert_max_queries as max_queries, install_query_hooks
+
+    install_query_hooks(engine)
+    return max_queries
+
+
+@pytest.fixture
+def test_db():
+    """Sessionmaker sobre TEST_DATABASE_URL con el esquema recién creado"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL no está definida")
+
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.core.database import Base
+    from app.core.query_stats import install_query_hooks
+    import app.models.models  # noqa: F401  registra las tablas
+
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    install_query_hooks(engine)
+
+    async def reset_schema(create: bool):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            if create:
+                # Índices trigram del catálogo
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(reset_schema(create=True))
+    try:
+        yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    finally:
+        asyncio.run(reset_schema(create=False))
+        asyncio.run(engine.dispose())
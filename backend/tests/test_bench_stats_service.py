@@ -0,0 +1,37 @@
+"""El benchmark de stats_service corre completo y nada escala peor que lineal.
+
+Usa tamaños chicos y pocas repeticiones: no compara tiempos (dependen de la
+máquina), solo que cada función mida algo y su exponente de escalamiento.
+Corre en otro proceso porque el benchmark fija STATS_POOL_WORKERS=0.
+"""
+import json
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = "1000,5000,20000"
+# Lineal con margen para el ruido de tamaños chicos; un O(n²) da ~2
+MAX_EXPONENT = 1.5
+
+
+def test_bench_stats_service_scales_linearly():
+    proc = subprocess.run(
+        [sys.executable, "-W", "ignore", "-m", "benchmarks.bench_stats_service",
+         "--sizes", SIZES, "--min-time", "0", "--max-repeats", "3"],
+        cwd=BACKEND, capture_output=True, text=True, timeout=600,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    results = json.loads(proc.stdout)
+
+    measured = {name: result for name, result in results.items() if not name.startswith("_")}
+    assert measured
+    for name, result in measured.items():
+        assert len(result["sizes"]) == len(SIZES.split(",")), name
+
+    too_steep = {
+        name: result["exponent"]
+        for name, result in measured.items()
+        if result["exponent"] > MAX_EXPONENT
+    }
+    assert not too_steep, f"escalan peor que lineal: {too_steep}"
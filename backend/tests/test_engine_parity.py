@@ -0,0 +1,23 @@
+"""Los dos motores de estadísticas deben devolver lo mismo (desempates incluidos).
+
+Corre desde backend/:
+
+    python -m pytest tests
+"""
+import warnings
+
+import pytest
+
+from benchmarks.check_engine_parity import engine_differences
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_python_engine_matches_pandas(seed):
+    with warnings.catch_warnings():
+        # to_pydatetime() descarta los nanosegundos del fin de semana
+        warnings.simplefilter("ignore", UserWarning)
+        differences = engine_differences(cases=300, seed=seed)
+    assert not differences, "\n".join(
+        f"[caso {d.case}] {d.kind} ({d.sessions} sesiones)\n  pandas: {d.expected}\n  python: {d.actual}"
+        for d in differences[:5]
+    )
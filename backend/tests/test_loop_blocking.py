@@ -0,0 +1,74 @@
+"""Las rutas de analítica no bloquean el event loop con historiales grandes.
+
+Se llama al handler de GET /stats/analysis con la carga de sesiones y del
+bitmap reemplazada por datos sintéticos: lo que se prueba es que el cálculo
+con pandas vaya al pool de procesos y no al hilo del loop.
+"""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import process_pool
+from app.core.loop_monitor import assert_no_loop_blocking
+from app.core.process_pool import get_stats_pool, shutdown_stats_pool, stats_inline
+from app.routes.stats import get_user_analysis
+from app.services import stats_service
+from app.services.activity_service import activity_from_bits
+from benchmarks.synthetic import synthetic_columns
+
+# Con pandas este historial tarda bastante más que el umbral en el hilo del loop
+SESSIONS = 1_000_000
+THRESHOLD_MS = 100
+NOW = datetime(2025, 6, 1)
+
+pytestmark = pytest.mark.skipif(
+    process_pool.STATS_POOL_WORKERS <= 0, reason="STATS_POOL_WORKERS=0: los cálculos corren en el loop"
+)
+
+
+@pytest.fixture
+def large_history(monkeypatch):
+    cols = synthetic_columns(SESSIONS)
+
+    async def load_session_columns(user_id, db, start_date=None, end_date=None):
+        return cols
+
+    async def load_activity(user_id, db):
+        return activity_from_bits(0, NOW.date(), NOW.date())
+
+    monkeypatch.setattr(stats_service, "load_session_columns", load_session_columns)
+    monkeypatch.setattr(stats_service, "load_activity", load_activity)
+    yield
+    shutdown_stats_pool()
+
+
+async def _warm_pool():
+    # Lanzar los workers (spawn) y cargar pandas fuera de la medición
+    loop = asyncio.get_running_loop()
+    pool = get_stats_pool()
+    await asyncio.gather(*(
+        loop.run_in_executor(pool, process_pool._warm_up) for _ in range(process_pool.STATS_POOL_WORKERS)
+    ))
+
+
+def test_analysis_route_does_not_block_loop(large_history):
+    async def scenario():
+        await _warm_pool()
+        async with assert_no_loop_blocking(threshold_ms=THRESHOLD_MS):
+            analysis = await get_user_analysis(current_user=SimpleNamespace(id=1))
+        assert analysis.user_id == 1
+
+    asyncio.run(scenario())
+
+
+def test_inline_analysis_is_detected(large_history):
+    # El mismo cálculo forzado en el proceso (como al perfilar) sí bloquea:
+    # comprueba que la prueba anterior mide algo
+    async def scenario():
+        with stats_inline(), pytest.raises(AssertionError, match="Event loop blocked"):
+            async with assert_no_loop_blocking(threshold_ms=THRESHOLD_MS):
+                await get_user_analysis(current_user=SimpleNamespace(id=2))
+
+    asyncio.run(scenario())
@@ -0,0 +1,49 @@
+"""Presupuesto de consultas de las rutas de listado.
+
+La cantidad de sentencias no debe crecer con las filas (N+1). Necesitan
+Postgres: se saltan si TEST_DATABASE_URL no está definida.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.models import Meditation, MeditationSession, MeditationType, User
+from app.routes.sessions import list_all_sessions
+
+USERS = 5
+MEDITATIONS = 6
+SESSIONS = 40
+
+
+async def _seed(db) -> None:
+    types = [MeditationType(name=f"Tipo {i}", description="", tags=["enfoque"]) for i in range(3)]
+    meditations = [
+        Meditation(title=f"Meditación {i}", duration=10, difficulty="beginner", meditation_type=types[i % 3])
+        for i in range(MEDITATIONS)
+    ]
+    users = [User(email=f"user{i}@example.com", hashed_password="x") for i in range(USERS)]
+    start = datetime(2025, 1, 1, 8)
+    db.add_all(types + meditations + users + [
+        MeditationSession(
+            user=users[i % USERS],
+            meditation=meditations[i % MEDITATIONS],
+            duration_completed=10,
+            date=start + timedelta(hours=i),
+        )
+        for i in range(SESSIONS)
+    ])
+    await db.commit()
+
+
+def test_list_all_sessions_query_budget(test_db, assert_max_queries):
+    async def scenario():
+        async with test_db() as db:
+            await _seed(db)
+
+        async with test_db() as db:
+            # Sesiones + un selectinload por relación (meditación, tipo, usuario)
+            with assert_max_queries(4):
+                sessions = await list_all_sessions(db=db, current_user=None)
+        assert len(sessions) == SESSIONS
+        assert all(s.meditation.meditation_type is not None and s.user is not None for s in sessions)
+
+    asyncio.run(scenario())
@@ -0,0 +1,137 @@
+"""Heap, lotes, vencidas y reintentos del scheduler de recordatorios, sin bd.
+
+`FakeScheduler` reemplaza los accesos a la bd (`_fetch_pending`, `_claim`,
+`_release`, `_generate`) por una tabla en memoria con la misma semántica:
+reclamar marca como entregada y liberar la deja pendiente otra vez.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Set
+
+from app.services.reminder_scheduler import (
+    REMINDER_MAX_LATENESS, InMemorySender, NotificationSender, Reminder, ReminderScheduler,
+)
+
+
+class FakeScheduler(ReminderScheduler):
+    def __init__(self, reminders: List[Reminder], **kwargs):
+        super().__init__(**kwargs)
+        self.rows: Dict[int, Reminder] = {r.id: r for r in reminders}
+        self.pending: Set[int] = set(self.rows)
+        self.claims: List[List[int]] = []
+        self.released: List[int] = []
+        # Reclamadas por otro proceso entre la carga y el UPDATE
+        self.claimed_elsewhere: Set[int] = set()
+
+    async def _fetch_pending(self, horizon, after):
+        rows = sorted(
+            self.rows[i] for i in self.pending
+            if self.rows[i].scheduled_time <= horizon
+            and (after is None or (self.rows[i].scheduled_time, i) > after)
+        )
+        return rows[:self.load_limit]
+
+    async def _claim(self, ids, now, expired_before):
+        self.claims.append(list(ids))
+        claimed = self.pending.intersection(ids) - self.claimed_elsewhere
+        self.pending -= claimed
+        return claimed
+
+    async def _release(self, ids):
+        self.released.extend(ids)
+        self.pending.update(ids)
+
+    async def _generate(self, day):
+        return 0
+
+
+class FailingSender(NotificationSender):
+    async def send(self, reminders):
+        raise ConnectionError("push caído")
+
+
+class PartialSender(InMemorySender):
+    """Entrega solo las de id par"""
+
+    async def send(self, reminders):
+        await super().send(reminders)
+        return {r.id for r in reminders if r.id % 2 == 0}
+
+
+def _reminders(count: int, start: datetime, step: timedelta = timedelta(seconds=1), first_id: int = 1):
+    return [
+        Reminder(start + i * step, first_id + i, 100 + i, f"recordatorio {first_id + i}")
+        for i in range(count)
+    ]
+
+
+def test_due_reminders_are_sent_in_batches_in_order():
+    now = datetime.utcnow()
+    due = _reminders(7, now - timedelta(minutes=5))
+    later = _reminders(2, now + timedelta(hours=1), first_id=50)
+    sender = InMemorySender()
+    scheduler = FakeScheduler(due + later, sender=sender, batch_size=3, window=7200)
+
+    asyncio.run(scheduler.run_once())
+
+    assert [len(ids) for ids in scheduler.claims] == [3, 3, 1]
+    assert [r.id for r in sender.sent] == [r.id for r in due]
+    assert scheduler.pending == {50, 51}
+    assert scheduler.metrics()["queued"] == 2
+    assert (scheduler.sent, scheduler.failed, scheduler.expired) == (7, 0, 0)
+
+
+def test_reminders_older_than_max_lateness_expire_without_sending():
+    now = datetime.utcnow()
+    stale = _reminders(2, now - timedelta(seconds=REMINDER_MAX_LATENESS + 600))
+    fresh = _reminders(1, now - timedelta(minutes=1), first_id=10)
+    sender = InMemorySender()
+    scheduler = FakeScheduler(stale + fresh, sender=sender)
+
+    asyncio.run(scheduler.run_once())
+
+    assert [r.id for r in sender.sent] == [10]
+    # Las vencidas quedan reclamadas (no se vuelven a cargar) y no se liberan
+    assert scheduler.pending == set()
+    assert scheduler.released == []
+    assert (scheduler.sent, scheduler.expired) == (1, 2)
+
+
+def test_sender_failure_releases_the_whole_batch():
+    now = datetime.utcnow()
+    scheduler = FakeScheduler(_reminders(4, now - timedelta(minutes=1)), sender=FailingSender())
+
+    asyncio.run(scheduler.run_once())
+
+    assert sorted(scheduler.released) == [1, 2, 3, 4]
+    assert scheduler.pending == {1, 2, 3, 4}
+    assert (scheduler.sent, scheduler.failed) == (0, 4)
+
+
+def test_undelivered_reminders_are_released_and_retried():
+    now = datetime.utcnow()
+    sender = PartialSender()
+    scheduler = FakeScheduler(_reminders(4, now - timedelta(minutes=1)), sender=sender)
+
+    asyncio.run(scheduler.run_once())
+    assert sorted(scheduler.released) == [1, 3]
+    assert scheduler.pending == {1, 3}
+    assert (scheduler.sent, scheduler.failed) == (2, 2)
+
+    # El próximo rescan las vuelve a cargar y a intentar
+    scheduler._rescan_at = 0.0
+    asyncio.run(scheduler.run_once())
+    assert [r.id for r in sender.sent] == [1, 2, 3, 4, 1, 3]
+
+
+def test_reminders_claimed_by_another_process_are_skipped():
+    now = datetime.utcnow()
+    sender = InMemorySender()
+    scheduler = FakeScheduler(_reminders(3, now - timedelta(minutes=1)), sender=sender)
+    scheduler.claimed_elsewhere = {2}
+
+    asyncio.run(scheduler.run_once())
+
+    assert [r.id for r in sender.sent] == [1, 3]
+    assert scheduler.sent == 2
+